@@ -0,0 +1 @@
+"""Offline benchmarks for Open Agent Search (stubbed upstreams, no network)."""
@@ -0,0 +1,235 @@
+"""
+Micro-benchmarks for the HTML extraction and trimming hot path.
+
+Each case runs the CPU-bound part of ``fetch_url_content`` on raw page bytes:
+decode, ``parse_html`` and ``trim_content``, or with ``--format markdown`` the
+streaming Markdown conversion in place of ``parse_html``. For every case the harness
+reports wall time (median and best of ``--repeat`` runs), net allocations
+(blocks and KiB still allocated at the end of a run, from ``tracemalloc``)
+and peak traced memory.
+
+Timing and memory are measured in separate passes so ``tracemalloc``
+overhead does not leak into the time numbers.
+
+Run with:
+    python -m benchmarks.extraction --output extraction.json
+    python -m benchmarks.extraction --compare extraction.json --threshold 0.1
+    python -m benchmarks.extraction --format markdown --compare extraction.json
+"""
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from .stubs import corpus_pages
+
+# Default trimming budget; the route default is 2000, 20000 is the route maximum
+MAX_LENGTH = 20000
+
+PATHOLOGICAL_BYTES = 10 * 1024 * 1024
+
+
+def pathological_page(size: int = PATHOLOGICAL_BYTES) -> bytes:
+    """
+    Build a deterministic ~``size`` byte page that stresses the extractor.
+
+    It mixes thousands of stripped elements (script/nav/footer), deep inline
+    nesting, unclosed tags and a long run of text with no paragraph or
+    sentence boundary, which is the worst case for the trimming search.
+    """
+    head = b"<!DOCTYPE html><html><head><title>Pathological page</title></head><body><main>"
+    chunks = [head]
+    total = len(head)
+    i = 0
+    while total < size:
+        block = (
+            f"<script>var x{i} = {i};</script><nav><a href='/n{i}'>n{i}</a></nav>"
+            f"<div class='c{i % 7}'><span><b><i>word{i} </i></b></span>"
+            f"<p>unclosed paragraph {i} with text without any sentence boundary "
+            f"<li>item {i}<footer>f{i}</footer></div>\n"
+        ).encode()
+        chunks.append(block)
+        total += len(block)
+        i += 1
+    chunks.append(b"</main></body></html>")
+    return b"".join(chunks)
+
+
+def load_cases(
+    only: Optional[List[str]] = None, pathological_bytes: int = PATHOLOGICAL_BYTES
+) -> Dict[str, bytes]:
+    """Named page bodies: the saved corpus plus the generated pathological page."""
+    pages = corpus_pages()
+    loaders: Dict[str, Callable[[], bytes]] = {
+        "small_blog_post": pages["blog_post"].read_bytes,
+        "large_docs_page": pages["docs_page"].read_bytes,
+        "non_utf8_page": pages["windows1252_page"].read_bytes,
+        "pathological": lambda: pathological_page(pathological_bytes),
+    }
+    return {
+        name: load()
+        for name, load in loaders.items()
+        if not only or any(pattern in name for pattern in only)
+    }
+
+
+def extraction(raw: bytes, max_length: int = MAX_LENGTH, format: str = "text") -> Callable[[], str]:
+    """Return a callable running the decode, parse and trim pipeline on ``raw``."""
+    from open_agent_search.controllers.content import (
+        _decode_bytes_safely,
+        parse_html,
+        trim_content,
+    )
+    from open_agent_search.utils.markdown import close_fences, html_to_markdown
+
+    def run() -> str:
+        html_text = _decode_bytes_safely(raw)
+        _, _, content = parse_html(html_text)
+        return trim_content(content, max_length)
+
+    def run_markdown() -> str:
+        html_text = _decode_bytes_safely(raw)
+        _, _, content = html_to_markdown(html_text)
+        return close_fences(trim_content(content, max_length))
+
+    if format == "markdown":
+        return run_markdown
+
+    return run
+
+
+def measure_case(func: Callable[[], str], repeat: int) -> Dict[str, float]:
+    """Time ``func`` ``repeat`` times, then trace one run for allocations and peak."""
+    func()  # warm caches and imports
+
+    times: List[float] = []
+    gc_was_enabled = gc.isenabled()
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+        if gc_was_enabled:
+            gc.enable()
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = func()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    del result
+
+    return {
+        "median_ms": round(statistics.median(times), 3),
+        "best_ms": round(min(times), 3),
+        "alloc_blocks": sum(max(stat.count_diff, 0) for stat in stats),
+        "alloc_kib": round(sum(max(stat.size_diff, 0) for stat in stats) / 1024, 1),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def compare(
+    current: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    time_threshold: float,
+    memory_threshold: float,
+) -> List[str]:
+    """Return a description of every metric that regressed beyond its threshold."""
+    limits = {
+        "median_ms": time_threshold,
+        "alloc_blocks": memory_threshold,
+        "alloc_kib": memory_threshold,
+        "peak_kib": memory_threshold,
+    }
+    regressions = []
+    for name, stats in current.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for key, threshold in limits.items():
+            if base.get(key) and stats[key] > base[key] * (1 + threshold):
+                change = (stats[key] / base[key] - 1) * 100
+                regressions.append(f"{name}: {key} {base[key]} -> {stats[key]} (+{change:.1f}%)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--only", action="append", help="Run cases containing this text")
+    parser.add_argument("--max-length", type=int, default=MAX_LENGTH, help="Trim budget")
+    parser.add_argument(
+        "--format", choices=("text", "markdown"), default="text", help="Output format to extract"
+    )
+    parser.add_argument(
+        "--pathological-mb", type=float, default=10, help="Size of the pathological page"
+    )
+    parser.add_argument("--output", help="Write results JSON to this path")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.15,
+        help="Allowed relative time regression (0.15 = 15%%)",
+    )
+    parser.add_argument(
+        "--memory-threshold",
+        type=float,
+        default=0.1,
+        help="Allowed relative allocation/peak memory regression",
+    )
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Dict[str, float]] = {}
+    pathological_bytes = int(args.pathological_mb * 1024 * 1024)
+    for name, raw in load_cases(args.only, pathological_bytes).items():
+        results[name] = measure_case(extraction(raw, args.max_length, args.format), args.repeat)
+        stats = results[name]
+        print(
+            f"{name:<20} {len(raw) / 1024:>9.1f} KiB  "
+            f"median {stats['median_ms']:>9.2f} ms  "
+            f"alloc {stats['alloc_kib']:>9.1f} KiB / {stats['alloc_blocks']:>7} blocks  "
+            f"peak {stats['peak_kib']:>10.1f} KiB",
+            flush=True,
+        )
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "max_length": args.max_length,
+            "format": args.format,
+            "pathological_mb": args.pathological_mb,
+        },
+        "cases": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(
+            results, baseline.get("cases", {}), args.threshold, args.memory_threshold
+        )
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""
+Offline load benchmark for every route, ``search_all`` and the MCP tools.
+
+DDGS and the content fetcher are replaced by the local stubs in
+``benchmarks.stubs``, so results only reflect the service itself plus the
+configured stub latency. Results are written as JSON and can be compared
+against a saved baseline.
+
+Run with:
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --compare bench-baseline.json --threshold 0.15
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from .stubs import StubConfig, corpus_pages, corpus_url, install_stubs
+
+QUERIES = [
+    "python asyncio tutorial",
+    "rust ownership explained",
+    "climate change report",
+    "fastapi dependency injection",
+    "best hiking trails",
+    "machine learning basics",
+    "open source licenses",
+    "sourdough starter guide",
+]
+
+Operation = Callable[[random.Random], Awaitable[bool]]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of ``samples`` (0 <= pct <= 100)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+async def measure(
+    operation: Operation, requests: int, concurrency: int, seed: int, warmup: int = 5
+) -> Dict[str, Any]:
+    """Run ``operation`` ``requests`` times with bounded concurrency and summarise latency."""
+    rng = random.Random(seed)
+    for _ in range(warmup):
+        await operation(rng)
+
+    latencies: List[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            ok = await operation(rng)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 2),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p90_ms": round(percentile(latencies, 90), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+
+
+def http_scenarios(client: httpx.AsyncClient) -> Dict[str, Operation]:
+    """One operation per REST route."""
+    pages = [corpus_url(name) for name in corpus_pages()]
+
+    def get(path: str, **params: Any) -> Operation:
+        async def op(rng: random.Random) -> bool:
+            query = {k: (v(rng) if callable(v) else v) for k, v in params.items()}
+            response = await client.get(path, params=query)
+            return response.status_code == 200
+
+        return op
+
+    async def fetch_multiple(rng: random.Random) -> bool:
+        response = await client.post(
+            "/api/content/fetch-multiple",
+            json={"urls": rng.sample(pages, k=min(3, len(pages))), "max_length": 4000},
+        )
+        return response.status_code == 200
+
+    def q(rng: random.Random) -> str:
+        return rng.choice(QUERIES)
+
+    return {
+        "route:text": get("/api/search/text", q=q, max_results=10),
+        "route:images": get("/api/search/images", q=q, max_results=10),
+        "route:videos": get("/api/search/videos", q=q, max_results=10),
+        "route:news": get("/api/search/news", q=q, max_results=10),
+        "route:books": get("/api/search/books", q=q, max_results=10),
+        "route:all": get("/api/search/all", q=q, max_results_per_type=5),
+        "route:all-large": get("/api/search/all", q=q, max_results_per_type=50),
+        "route:fetch": get(
+            "/api/content/fetch", url=lambda rng: rng.choice(pages), max_length=4000
+        ),
+        "route:fetch-multiple": fetch_multiple,
+    }
+
+
+def controller_scenarios() -> Dict[str, Operation]:
+    """Operations that call controllers directly, bypassing HTTP."""
+    from open_agent_search.controllers.unified import search_all
+
+    async def run_search_all(rng: random.Random) -> bool:
+        results = await search_all(query=rng.choice(QUERIES), max_results_per_type=5)
+        return results["total_results"] > 0
+
+    return {"controller:search_all": run_search_all}
+
+
+def mcp_scenarios(client: Any) -> Dict[str, Operation]:
+    """Operations that call MCP tools through an in-memory FastMCP client."""
+    pages = [corpus_url(name) for name in corpus_pages()]
+
+    def tool(name: str, make_args: Callable[[random.Random], Dict[str, Any]]) -> Operation:
+        async def op(rng: random.Random) -> bool:
+            result = await client.call_tool(name, make_args(rng), raise_on_error=False)
+            return not result.is_error
+
+        return op
+
+    return {
+        "mcp:search_web": tool("search_web", lambda rng: {"query": rng.choice(QUERIES)}),
+        "mcp:search_everything": tool(
+            "search_everything", lambda rng: {"query": rng.choice(QUERIES)}
+        ),
+        "mcp:fetch_content": tool(
+            "fetch_content", lambda rng: {"url": rng.choice(pages), "max_length": 4000}
+        ),
+    }
+
+
+async def run_benchmarks(
+    config: StubConfig, requests: int, concurrency: int, only: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Run every scenario (or those matching ``only``) with the stubs installed."""
+    from fastmcp import Client
+
+    from open_agent_search.app import app
+    from open_agent_search.mcp import mcp
+
+    # Per-request INFO logs would dominate the measurement
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results: Dict[str, Any] = {}
+    with install_stubs(config):
+        transport = httpx.ASGITransport(app=app)
+        async with (
+            httpx.AsyncClient(transport=transport, base_url="http://bench") as http_client,
+            Client(mcp) as mcp_client,
+        ):
+            scenarios = {
+                **http_scenarios(http_client),
+                **controller_scenarios(),
+                **mcp_scenarios(mcp_client),
+            }
+            for name, operation in scenarios.items():
+                if only and not any(pattern in name for pattern in only):
+                    continue
+                results[name] = await measure(operation, requests, concurrency, config.seed)
+                print(
+                    f"{name:<28} {results[name]['throughput_rps']:>9.1f} req/s  "
+                    f"p50 {results[name]['p50_ms']:>8.2f} ms  "
+                    f"p99 {results[name]['p99_ms']:>8.2f} ms  "
+                    f"errors {results[name]['errors']}"
+                )
+    return results
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Return a description of every scenario that regressed beyond ``threshold``."""
+    regressions = []
+    for name, stats in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        for key in ("p50_ms", "p99_ms"):
+            if base[key] and stats[key] > base[key] * (1 + threshold):
+                regressions.append(f"{name}: {key} {base[key]} -> {stats[key]}")
+        if base["throughput_rps"] and stats["throughput_rps"] < base["throughput_rps"] * (
+            1 - threshold
+        ):
+            regressions.append(
+                f"{name}: throughput_rps {base['throughput_rps']} -> {stats['throughput_rps']}"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent requests")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Stub upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=5.0, help="Stub latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Injected error rate")
+    parser.add_argument("--seed", type=int, default=1234, help="RNG seed")
+    parser.add_argument("--only", action="append", help="Run scenarios containing this text")
+    parser.add_argument("--output", help="Write results JSON to this path")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%)"
+    )
+    args = parser.parse_args(argv)
+
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    scenarios = asyncio.run(run_benchmarks(config, args.requests, args.concurrency, args.only))
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "stub": config.__dict__,
+        },
+        "scenarios": scenarios,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+Cold-start benchmark for the ``oas-mcp`` stdio server and the HTTP app.
+
+Every sample runs in a fresh interpreter so nothing is cached in-process:
+
+- ``import:<module>``: time to import the module, measured inside the child.
+- ``mcp:first_tools_list``: wall time from spawning ``oas-mcp`` over stdio to
+  the first ``tools/list`` response, which is what an MCP client waits for.
+- ``cold:<mode>:<path>``: import the HTTP app and serve one request in-process,
+  with the default server profile and with ``SERVERLESS=true``. The text
+  search path is requested without ``q`` (422) so no upstream call is made.
+
+Run with:
+    python -m benchmarks.startup --output startup.json
+    python -m benchmarks.startup --compare startup.json --threshold 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+IMPORT_TARGETS = ("open_agent_search.mcp", "open_agent_search.app")
+
+# Modules the stdio server must not load before a tool is called
+HEAVY_MODULES = ("fastapi", "ddgs", "bs4", "primp", "slowapi")
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"ms": elapsed, "heavy": heavy}}))
+"""
+
+COLD_PATHS = ("/health", "/api/search/text")
+
+_FIRST_REQUEST_PROBE = """
+import asyncio, json, time
+start = time.perf_counter()
+import httpx
+from open_agent_search.app import app
+
+async def first_request():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://cold") as client:
+        return (await client.get({path!r})).status_code
+
+status = asyncio.run(first_request())
+print(json.dumps({{"ms": (time.perf_counter() - start) * 1000, "status": status}}))
+"""
+
+
+def import_sample(module: str) -> Dict[str, object]:
+    """Import ``module`` in a fresh interpreter and report time and heavy modules loaded."""
+    code = _IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def first_request_sample(path: str, serverless: bool) -> float:
+    """Import the app and serve ``path`` once in a fresh interpreter."""
+    env = {**os.environ, "SERVERLESS": "true" if serverless else "false"}
+    env.pop("VERCEL", None)
+    output = subprocess.run(
+        [sys.executable, "-c", _FIRST_REQUEST_PROBE.format(path=path)],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=env,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])["ms"]
+
+
+async def first_tools_list_sample() -> float:
+    """Spawn the stdio server and time until the first ``tools/list`` returns."""
+    from fastmcp import Client
+    from fastmcp.client.transports import StdioTransport
+
+    with open(os.devnull, "w") as server_log:
+        transport = StdioTransport(
+            command=sys.executable,
+            args=["-c", "from open_agent_search.mcp import main; main()"],
+            keep_alive=False,
+            log_file=server_log,
+        )
+        start = time.perf_counter()
+        async with Client(transport) as client:
+            tools = await client.list_tools()
+            elapsed = (time.perf_counter() - start) * 1000
+    if not tools:
+        raise RuntimeError("MCP server returned no tools")
+    return elapsed
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "median_ms": round(statistics.median(samples), 1),
+        "best_ms": round(min(samples), 1),
+        "worst_ms": round(max(samples), 1),
+    }
+
+
+def run_startup(repeat: int, only: Optional[List[str]] = None) -> Dict[str, Dict]:
+    """Collect ``repeat`` cold-start samples per scenario."""
+
+    def wanted(name: str) -> bool:
+        return not only or any(pattern in name for pattern in only)
+
+    results: Dict[str, Dict] = {}
+    for module in IMPORT_TARGETS:
+        name = f"import:{module}"
+        if not wanted(name):
+            continue
+        samples = [import_sample(module) for _ in range(repeat)]
+        results[name] = {
+            **summarize([sample["ms"] for sample in samples]),
+            "heavy_modules": samples[-1]["heavy"],
+        }
+
+    for mode in ("server", "serverless"):
+        for path in COLD_PATHS:
+            name = f"cold:{mode}:{path}"
+            if wanted(name):
+                samples = [first_request_sample(path, mode == "serverless") for _ in range(repeat)]
+                results[name] = summarize(samples)
+
+    if wanted("mcp:first_tools_list"):
+        samples = [asyncio.run(first_tools_list_sample()) for _ in range(repeat)]
+        results["mcp:first_tools_list"] = summarize(samples)
+    return results
+
+
+def compare(current: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """Return a description of every scenario whose median regressed beyond ``threshold``."""
+    regressions = []
+    for name, stats in current.items():
+        base = baseline.get(name)
+        if base and base["median_ms"] and stats["median_ms"] > base["median_ms"] * (1 + threshold):
+            regressions.append(f"{name}: median_ms {base['median_ms']} -> {stats['median_ms']}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Cold starts per scenario")
+    parser.add_argument("--only", action="append", help="Run scenarios containing this text")
+    parser.add_argument("--output", help="Write results JSON to this path")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%)"
+    )
+    args = parser.parse_args(argv)
+
+    results = run_startup(args.repeat, args.only)
+    for name, stats in results.items():
+        heavy = stats.get("heavy_modules")
+        suffix = f"  heavy: {', '.join(heavy) or '-'}" if heavy is not None else ""
+        print(
+            f"{name:<34} median {stats['median_ms']:>8.1f} ms  best {stats['best_ms']:>8.1f} ms"
+            f"{suffix}"
+        )
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "scenarios": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline.get("scenarios", {}), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+"""
+Deterministic local stand-ins for DDGS and the content HTTP client.
+
+``install_stubs()`` patches every controller so searches and page fetches are
+served locally: search results are generated from the query, pages come from
+``benchmarks/corpus``, and latency and upstream errors are injected from a
+seeded RNG. Nothing leaves the process, so runs are reproducible offline.
+"""
+
+import hashlib
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from unittest import mock
+from urllib.parse import urlparse
+
+from ddgs.exceptions import DDGSException, RatelimitException, TimeoutException
+
+CORPUS_DIR = Path(__file__).parent / "corpus"
+
+# Host used for every generated result URL and corpus page
+STUB_HOST = "bench.local"
+
+
+@dataclass
+class StubConfig:
+    """Latency and error injection settings shared by all stubs."""
+
+    latency_ms: float = 20.0
+    jitter_ms: float = 5.0
+    error_rate: float = 0.0
+    seed: int = 1234
+
+
+class _Injector:
+    """Thread-safe seeded latency and error source."""
+
+    _ERRORS = (RatelimitException, TimeoutException, DDGSException)
+
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+
+    def delay(self) -> None:
+        with self._lock:
+            jitter = self._rng.uniform(-self.config.jitter_ms, self.config.jitter_ms)
+            fail = self._rng.random() < self.config.error_rate
+            error = self._rng.choice(self._ERRORS)
+        time.sleep(max(0.0, self.config.latency_ms + jitter) / 1000)
+        if fail:
+            raise error("injected upstream error")
+
+
+def corpus_pages() -> Dict[str, Path]:
+    """Map corpus page names (file stems) to their paths."""
+    return {path.stem: path for path in sorted(CORPUS_DIR.glob("*.html"))}
+
+
+def corpus_url(name: str) -> str:
+    """URL under which the stub HTTP client serves a corpus page."""
+    return f"https://{STUB_HOST}/pages/{name}.html"
+
+
+def _results(kind: str, query: str, max_results: int, page: int) -> List[Dict[str, Any]]:
+    """Generate stable, realistically shaped results for a query."""
+    pages = list(corpus_pages())
+    seed = hashlib.sha256(f"{kind}:{query}:{page}".encode()).hexdigest()
+    results = []
+    for i in range(max_results):
+        n = (page - 1) * max_results + i
+        url = corpus_url(pages[(int(seed[:8], 16) + n) % len(pages)]) if pages else ""
+        title = f"{query.title()} — result {n + 1}"
+        words = " ".join(seed[j : j + 6] for j in range(0, 48, 6))
+        body = f"Snippet {n + 1} for {query!r}: {words}"
+        if kind == "text":
+            results.append({"title": title, "href": url, "body": body})
+        elif kind == "images":
+            results.append(
+                {
+                    "title": title,
+                    "image": f"https://{STUB_HOST}/img/{seed[:12]}-{n}.jpg",
+                    "thumbnail": f"https://{STUB_HOST}/thumb/{seed[:12]}-{n}.jpg",
+                    "url": url,
+                    "height": 720,
+                    "width": 1280,
+                    "source": "Stub",
+                }
+            )
+        elif kind == "videos":
+            results.append(
+                {
+                    "title": title,
+                    "content": url,
+                    "description": body,
+                    "duration": "4:13",
+                    "embed_html": f'<iframe src="https://{STUB_HOST}/embed/{n}"></iframe>',
+                    "embed_url": f"https://{STUB_HOST}/embed/{n}",
+                    "image_token": seed[:32],
+                    "images": {"large": f"https://{STUB_HOST}/v/{n}.jpg"},
+                    "provider": "Stub",
+                    "published": "2025-01-01T00:00:00.0000000",
+                    "publisher": "Stub Channel",
+                    "statistics": {"viewCount": 1000 + n},
+                    "uploader": "stub",
+                }
+            )
+        elif kind == "news":
+            results.append(
+                {
+                    "date": "2025-01-01T00:00:00+00:00",
+                    "title": title,
+                    "body": body,
+                    "url": url,
+                    "image": f"https://{STUB_HOST}/news/{n}.jpg",
+                    "source": "Stub News",
+                }
+            )
+        else:
+            results.append(
+                {
+                    "title": title,
+                    "author": "A. Author",
+                    "publisher": "Stub Press",
+                    "info": "English [en], pdf, 2.1MB",
+                    "url": url,
+                    "thumbnail": f"https://{STUB_HOST}/cover/{n}.jpg",
+                }
+            )
+    return results
+
+
+class StubDDGS:
+    """Drop-in replacement for ``ddgs.DDGS`` that serves generated results."""
+
+    injector: Optional[_Injector] = None
+    calls = 0
+    _calls_lock = threading.Lock()
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        pass
+
+    def _search(self, kind: str, query: str, max_results: Optional[int], page: int) -> List:
+        with StubDDGS._calls_lock:
+            StubDDGS.calls += 1
+        if self.injector is not None:
+            self.injector.delay()
+        return _results(kind, query, max_results or 10, page)
+
+    def text(self, query: str, max_results: Optional[int] = 10, page: int = 1, **kwargs: Any):
+        return self._search("text", query, max_results, page)
+
+    def images(self, query: str, max_results: Optional[int] = 10, page: int = 1, **kwargs: Any):
+        return self._search("images", query, max_results, page)
+
+    def videos(self, query: str, max_results: Optional[int] = 10, page: int = 1, **kwargs: Any):
+        return self._search("videos", query, max_results, page)
+
+    def news(self, query: str, max_results: Optional[int] = 10, page: int = 1, **kwargs: Any):
+        return self._search("news", query, max_results, page)
+
+    def books(self, query: str, max_results: Optional[int] = 10, page: int = 1, **kwargs: Any):
+        return self._search("books", query, max_results, page)
+
+
+class StubResponse:
+    """Minimal stand-in for ``ddgs.http_client.Response``."""
+
+    def __init__(self, status_code: int, content: bytes, headers: Dict[str, str]):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+        self.text = content.decode("utf-8", errors="replace")
+
+
+class StubHttpClient:
+    """Drop-in replacement for ``ddgs.http_client.HttpClient`` serving the corpus."""
+
+    injector: Optional[_Injector] = None
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        pass
+
+    def request(self, method: str, url: str, *args: Any, **kwargs: Any) -> StubResponse:
+        if self.injector is not None:
+            self.injector.delay()
+        name = Path(urlparse(url).path).stem
+        path = corpus_pages().get(name)
+        if path is None:
+            return StubResponse(404, b"not found", {"Content-Type": "text/plain"})
+        return StubResponse(200, path.read_bytes(), {"Content-Type": "text/html"})
+
+    def get(self, url: str, *args: Any, **kwargs: Any) -> StubResponse:
+        return self.request("GET", url, *args, **kwargs)
+
+
+def _stub_fallback_fetch(url: str, timeout: int, charset=None, accept_compressed=False):
+    """Serve the urllib fallback from the corpus as well."""
+    from open_agent_search.controllers.content import Fetched
+    from open_agent_search.utils.charset import decode_body
+
+    response = StubHttpClient().request("GET", url)
+    if response.status_code != 200:
+        raise Exception(f"HTTP {response.status_code}")
+    text, used = decode_body(response.content, response.headers.get("Content-Type"), charset)
+    return Fetched(text, response.status_code, used)
+
+
+_SEARCH_MODULES = (
+    "open_agent_search.controllers.text",
+    "open_agent_search.controllers.image",
+    "open_agent_search.controllers.video",
+    "open_agent_search.controllers.news",
+    "open_agent_search.controllers.book",
+)
+
+_ROUTE_MODULES = (
+    "open_agent_search.routes.text",
+    "open_agent_search.routes.image",
+    "open_agent_search.routes.video",
+    "open_agent_search.routes.news",
+    "open_agent_search.routes.book",
+    "open_agent_search.routes.unified",
+    "open_agent_search.routes.batch",
+    "open_agent_search.routes.content",
+    "open_agent_search.app",
+)
+
+
+@contextmanager
+def install_stubs(
+    config: Optional[StubConfig] = None,
+    disable_rate_limits: bool = True,
+    disable_cache: bool = True,
+) -> Iterator[StubConfig]:
+    """
+    Patch DDGS, the content and crawl HTTP clients and URL validation with local stubs.
+
+    Rate limiters and the result cache are disabled by default so load
+    generation measures the service rather than the limiter or cache hits.
+    """
+    import importlib
+
+    from open_agent_search.utils.cache import NullCache, configure_cache
+
+    config = config or StubConfig()
+    search_injector = _Injector(config)
+    fetch_injector = _Injector(StubConfig(**{**config.__dict__, "seed": config.seed + 1}))
+
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch.object(StubDDGS, "injector", search_injector))
+        stack.enter_context(mock.patch.object(StubHttpClient, "injector", fetch_injector))
+        for name in _SEARCH_MODULES:
+            module = importlib.import_module(name)
+            stack.enter_context(mock.patch.object(module, "DDGS", StubDDGS))
+
+        content = importlib.import_module("open_agent_search.controllers.content")
+        stack.enter_context(mock.patch.object(content, "HttpClient", StubHttpClient))
+        stack.enter_context(mock.patch.object(content, "_fallback_fetch", _stub_fallback_fetch))
+        stack.enter_context(mock.patch.object(content, "validate_url", lambda url: url))
+        crawl = importlib.import_module("open_agent_search.controllers.crawl")
+        stack.enter_context(mock.patch.object(crawl, "HttpClient", StubHttpClient))
+        stack.enter_context(mock.patch.object(crawl, "validate_url", lambda url: url))
+
+        if disable_rate_limits:
+            for name in _ROUTE_MODULES:
+                limiter = getattr(importlib.import_module(name), "limiter", None)
+                if limiter is not None:
+                    stack.enter_context(mock.patch.object(limiter, "enabled", False))
+        if disable_cache:
+            previous = configure_cache(NullCache())
+            stack.callback(configure_cache, previous)
+        yield config
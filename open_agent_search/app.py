@@ -1,24 +1,37 @@
 """Open Agent Search FastAPI Server — REST API + MCP over HTTP."""
 
+import asyncio
 import logging
+import time
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
+from starlette.exceptions import HTTPException as StarletteHTTPException
 from starlette.responses import Response
 
-from .config import rate_limit_config
-from .mcp import mcp
+from .config import (
+    compression_config,
+    metrics_config,
+    rate_limit_config,
+    serverless_config,
+    warmup_config,
+)
 from .models.schemas import ErrorResponse
-from .routes.book import router as book_router
-from .routes.content import router as content_router
-from .routes.image import router as image_router
-from .routes.news import router as news_router
-from .routes.text import router as text_router
-from .routes.unified import router as unified_router
-from .routes.video import router as video_router
+from .routes.admin import request_sampling, require_admin
+from .routes.admin import router as admin_router
+from .serverless import MCP_MOUNT, LazyLoadMiddleware, LazyMCP, RouterLoader
+from .utils.cache import cache_headers, cache_scope
+from .utils.circuit_breaker import circuits
+from .utils.compression import CompressionMiddleware
+from .utils.local_index import flush_local_index
+from .utils.metrics import CONTENT_TYPE_LATEST, http_request_duration, render_latest
+from .utils.serialization import FastJSONResponse
+from .utils.timing import timing_scope
+from .warmup import start_warmup, warmup_state
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -28,21 +41,50 @@ logger = logging.getLogger(__name__)
 limiter = Limiter(
     key_func=get_remote_address,  # Rate limit by IP address
     default_limits=[rate_limit_config.DEFAULT_LIMIT],  # Global default
-    storage_uri="memory://",  # In-memory storage (use Redis for production clusters)
+    storage_uri=serverless_config.rate_limit_storage(),  # Set RATE_LIMIT_STORAGE_URI for clusters
     headers_enabled=True,  # Add rate limit info to response headers
 )
+if serverless_config.ENABLED and not serverless_config.RATE_LIMIT_STORAGE_URI:
+    logger.warning(
+        "RATE_LIMIT_STORAGE_URI is not set: rate limits are counted per serverless "
+        "instance and not shared across instances"
+    )
 
-# Create MCP ASGI app
-mcp_app = mcp.http_app(path="/mcp", stateless_http=True)
-
-# Initialize FastAPI app with MCP lifespan
+# Serverless builds routers and the MCP sub-app on first use; servers build them now
+if serverless_config.ENABLED:
+    lazy_mcp = LazyMCP(MCP_MOUNT)
+    mcp_lifespan = lazy_mcp.lifespan
+else:
+    from .mcp import mcp
+
+    # Create MCP ASGI app
+    mcp_app = mcp.http_app(path="/mcp", stateless_http=True)
+    mcp_lifespan = mcp_app.lifespan
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the MCP lifespan and warm up in the background once the app starts."""
+    async with mcp_lifespan(app):
+        warmup_task = start_warmup(warmup_config) if warmup_config.ENABLED else None
+        try:
+            yield
+        finally:
+            if warmup_task is not None and not warmup_task.done():
+                warmup_task.cancel()
+                await asyncio.gather(warmup_task, return_exceptions=True)
+            flush_local_index()
+
+
+# Initialize FastAPI app with MCP lifespan and warm-up
 app = FastAPI(
     title="Open Agent Search API",
     description="Privacy-first metasearch API powered by DuckDuckGo.",
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    lifespan=mcp_app.lifespan,
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 # Add rate limiter to app state
@@ -56,17 +98,52 @@ async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
     return _rate_limit_exceeded_handler(request, exc)
 
 
+router_loader = RouterLoader(app)
+if serverless_config.ENABLED:
+    app.add_middleware(LazyLoadMiddleware, routers=router_loader, mcp=lazy_mcp)
+
+
+# Record per-route latency for /metrics and per-phase Server-Timing
+@app.middleware("http")
+async def instrumentation_middleware(request: Request, call_next):
+    """Observe request latency by route template and emit a Server-Timing header"""
+    start = time.perf_counter()
+    status = 500
+    sampled = request_sampling.begin()
+    try:
+        with timing_scope() as timings, cache_scope() as lookups:
+            response = await call_next(request)
+        status = response.status_code
+        response.headers["Server-Timing"] = timings.server_timing()
+        response.headers.update(cache_headers(lookups))
+        return response
+    finally:
+        request_sampling.end(sampled)
+        route = request.scope.get("route")
+        http_request_duration.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status),
+        )
+
+
+# Added last so it wraps everything and compresses the final body
+if compression_config.ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=compression_config.MIN_BYTES,
+        levels=compression_config.levels(),
+    )
+
+
 # Register routers
-app.include_router(text_router)
-app.include_router(image_router)
-app.include_router(video_router)
-app.include_router(news_router)
-app.include_router(book_router)
-app.include_router(unified_router)
-app.include_router(content_router)
+app.include_router(admin_router)
+if not serverless_config.ENABLED:
+    router_loader.load_all()
 
-# Mount MCP server at /ai
-app.mount("/ai", mcp_app)
+    # Mount MCP server at /ai
+    app.mount(MCP_MOUNT, mcp_app)
 
 
 # Root endpoint
@@ -85,9 +162,13 @@ async def root(request: Request, response: Response):
             "news_search": "/api/search/news",
             "book_search": "/api/search/books",
             "unified_search": "/api/search/all",
+            "batch_search": "/api/search/batch",
+            "local_search": "/api/search/local",
             "fetch_content": "/api/content/fetch",
             "fetch_multiple": "/api/content/fetch-multiple",
+            "crawl": "/api/content/crawl",
             "mcp_server": "/ai/mcp",
+            "metrics": "/metrics",
             "documentation": "/docs",
         },
     }
@@ -97,14 +178,44 @@ async def root(request: Request, response: Response):
 @app.get("/health")
 @limiter.limit(rate_limit_config.HEALTH_LIMIT)
 async def health_check(request: Request, response: Response):
-    """Health check endpoint"""
-    return {"status": "healthy", "service": "Open Agent Search (OAS)"}
+    """Health check endpoint; 503 while the startup warm-up is still running.
+
+    Open circuits are listed under ``circuits``; an open search circuit makes
+    the status ``degraded`` (still 200, since other searches keep working).
+    """
+    tripped = circuits.tripped()
+    if not warmup_state.ready:
+        response.status_code = 503
+        status = "warming_up"
+    elif any(name.startswith("search:") for name in tripped):
+        status = "degraded"
+    else:
+        status = "healthy"
+    return {
+        "status": status,
+        "service": "Open Agent Search (OAS)",
+        "warmup": warmup_state.as_dict(),
+        "circuits": tripped,
+    }
+
 
+# Prometheus metrics endpoint
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_admin)])
+async def metrics():
+    """Prometheus text exposition of latency histograms and counters (needs ADMIN_TOKEN)"""
+    if not metrics_config.ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(render_latest(), media_type=CONTENT_TYPE_LATEST)
 
-# Exception handlers
-@app.exception_handler(HTTPException)
+
+# Exception handlers (controllers raise Starlette's HTTPException, the base of FastAPI's)
+@app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request, exc):
-    return JSONResponse(status_code=exc.status_code, content=ErrorResponse(error=exc.detail).dict())
+    return JSONResponse(
+        status_code=exc.status_code,
+        content=ErrorResponse(error=exc.detail).dict(),
+        headers=getattr(exc, "headers", None),
+    )
 
 
 @app.exception_handler(Exception)
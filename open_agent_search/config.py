@@ -1,10 +1,15 @@
 """
-Rate Limiting Configuration
-Smart production-ready rate limits for different use cases
+Service Configuration
+
+Settings for every subsystem, read once from the environment at import:
+rate limits per APP_ENV, metrics, profiling, the serverless profile, the
+result cache, warm-up, batch search, prefetch, circuit breakers, content
+fetching, crawling, response compression and the local search index.
+Each subsystem has a ``*Config`` class and a module-level instance.
 """
 
 import os
-from typing import Dict
+from typing import Dict, List
 
 
 class RateLimitConfig:
@@ -36,6 +41,11 @@ class RateLimitConfig:
 
     # Heavy operations (lower limits for resource-intensive operations)
     UNIFIED_SEARCH_LIMIT = "50/minute"  # Searches across multiple sources
+    BATCH_SEARCH_LIMIT = "20/minute"  # Many searches per call, also bounded by cost
+    CRAWL_LIMIT = "5/minute"  # Up to CRAWL_MAX_PAGES fetches per call
+
+    # Local index search (no upstream calls)
+    LOCAL_SEARCH_LIMIT = "100/minute"
 
     # Burst limits (allow some burst traffic)
     BURST_MULTIPLIER = 2  # Allow 2x the normal rate for short bursts
@@ -50,6 +60,9 @@ class RateLimitConfig:
             "news": cls.NEWS_SEARCH_LIMIT,
             "book": cls.BOOK_SEARCH_LIMIT,
             "unified": cls.UNIFIED_SEARCH_LIMIT,
+            "batch": cls.BATCH_SEARCH_LIMIT,
+            "local": cls.LOCAL_SEARCH_LIMIT,
+            "crawl": cls.CRAWL_LIMIT,
         }
 
     @classmethod
@@ -64,6 +77,9 @@ class RateLimitConfig:
             "news_search": f"News search: {cls.NEWS_SEARCH_LIMIT}",
             "book_search": f"Book search: {cls.BOOK_SEARCH_LIMIT}",
             "unified_search": f"Unified search: {cls.UNIFIED_SEARCH_LIMIT} (resource intensive)",
+            "batch_search": f"Batch search: {cls.BATCH_SEARCH_LIMIT} (cost-limited per call)",
+            "local_search": f"Local index search: {cls.LOCAL_SEARCH_LIMIT}",
+            "crawl": f"Crawl: {cls.CRAWL_LIMIT} (many page fetches per call)",
         }
 
 
@@ -78,6 +94,9 @@ class ProductionRateLimitConfig(RateLimitConfig):
     NEWS_SEARCH_LIMIT = "20/minute"
     BOOK_SEARCH_LIMIT = "20/minute"
     UNIFIED_SEARCH_LIMIT = "5/minute"
+    BATCH_SEARCH_LIMIT = "5/minute"
+    CRAWL_LIMIT = "2/minute"
+    LOCAL_SEARCH_LIMIT = "60/minute"
 
 
 class DevelopmentRateLimitConfig(RateLimitConfig):
@@ -90,6 +109,9 @@ class DevelopmentRateLimitConfig(RateLimitConfig):
     NEWS_SEARCH_LIMIT = "60/minute"
     BOOK_SEARCH_LIMIT = "60/minute"
     UNIFIED_SEARCH_LIMIT = "20/minute"
+    BATCH_SEARCH_LIMIT = "20/minute"
+    CRAWL_LIMIT = "10/minute"
+    LOCAL_SEARCH_LIMIT = "200/minute"
 
 
 # Select configuration based on environment
@@ -102,3 +124,275 @@ elif ENVIRONMENT == "production":
     rate_limit_config = ProductionRateLimitConfig()
 else:
     rate_limit_config = RateLimitConfig()
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    """Read a boolean flag from the environment (1/true/yes/on)."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class MetricsConfig:
+    """
+    Metrics configuration.
+
+    The /metrics endpoint serves Prometheus text format to requests carrying
+    the ADMIN_TOKEN, and answers 404 while no token is set. Disable it with
+    METRICS_ENABLED=false when the API is exposed without a scraper.
+    """
+
+    ENABLED = _env_flag("METRICS_ENABLED", True)
+
+
+metrics_config = MetricsConfig()
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float from the environment, falling back to ``default`` when unset or invalid."""
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _env_list(name: str) -> List[str]:
+    """Read a comma-separated list from the environment, dropping empty items."""
+    return [item.strip() for item in os.getenv(name, "").split(",") if item.strip()]
+
+
+class ProfilingConfig:
+    """
+    Sampling profiler configuration.
+
+    Profiling endpoints under /admin are only served when ADMIN_TOKEN is set.
+    PROFILE_SAMPLE_RATE (0-1) selects the fraction of requests that keep the
+    background stack sampler running; 0 disables request sampling.
+    """
+
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+    SAMPLE_RATE = min(max(_env_float("PROFILE_SAMPLE_RATE", 0.0), 0.0), 1.0)
+    INTERVAL_MS = max(_env_float("PROFILE_INTERVAL_MS", 10.0), 1.0)
+    MAX_SECONDS = 60
+
+
+profiling_config = ProfilingConfig()
+
+
+class ServerlessConfig:
+    """
+    Serverless profile (Vercel, Lambda-style runtimes).
+
+    Enabled with SERVERLESS=true and automatically on Vercel. Routers and the
+    MCP sub-app are built on first use. Rate limits are counted in memory
+    per warm instance unless RATE_LIMIT_STORAGE_URI points at shared storage
+    (e.g. redis://); per-instance limits still bound each instance, but are
+    not shared across instances or kept across cold starts.
+    """
+
+    ENABLED = _env_flag("SERVERLESS", bool(os.getenv("VERCEL")))
+    RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", "")
+
+    @classmethod
+    def rate_limit_storage(cls) -> str:
+        """Storage URI for slowapi limiters (memory unless configured)."""
+        return cls.RATE_LIMIT_STORAGE_URI or "memory://"
+
+
+serverless_config = ServerlessConfig()
+
+
+class CacheConfig:
+    """
+    Search result cache.
+
+    CACHE_URL selects the backend: memory:// (default), redis://host:6379/0
+    (needs the optional redis package) or none:// to disable caching.
+
+    After its TTL an entry is served stale, and refreshed in the background,
+    for up to CACHE_MAX_STALE_SECONDS more; 0 disables stale serving.
+
+    With CACHE_SIMILAR_QUERIES on, a search that misses on the text or news
+    route is answered from the fresh cached result of a near-duplicate query
+    (shingle Jaccard similarity of at least CACHE_SIMILARITY_THRESHOLD),
+    flagged as approximate. Other routes and MCP tools only use exact matches.
+    """
+
+    URL = os.getenv("CACHE_URL", "memory://")
+    TTL_SECONDS = max(_env_float("CACHE_TTL_SECONDS", 300.0), 0.0)
+    CONTENT_TTL_SECONDS = max(_env_float("CACHE_CONTENT_TTL_SECONDS", 900.0), 0.0)
+    MAX_STALE_SECONDS = max(_env_float("CACHE_MAX_STALE_SECONDS", 900.0), 0.0)
+    MAX_ENTRIES = int(_env_float("CACHE_MAX_ENTRIES", 1024))
+    SIMILAR_QUERIES = _env_flag("CACHE_SIMILAR_QUERIES", False)
+    SIMILARITY_THRESHOLD = min(max(_env_float("CACHE_SIMILARITY_THRESHOLD", 0.8), 0.5), 1.0)
+
+
+cache_config = CacheConfig()
+
+
+class WarmupConfig:
+    """
+    Warm-up stage run in the background when the app starts.
+
+    /health answers 503 until it finishes. Executor threads, per-thread DDGS
+    clients and parser imports are always warmed; DNS pre-resolution
+    (WARMUP_DNS_HOSTS) and hot-query replay into the result cache
+    (WARMUP_QUERIES) are opt-in. Disabled by default in the serverless profile.
+    """
+
+    ENABLED = _env_flag("WARMUP_ENABLED", not ServerlessConfig.ENABLED)
+    EXECUTOR_THREADS = int(_env_float("WARMUP_EXECUTOR_THREADS", 8))
+    DNS_HOSTS = _env_list("WARMUP_DNS_HOSTS")
+    QUERIES = _env_list("WARMUP_QUERIES")
+    TIMEOUT_SECONDS = _env_float("WARMUP_TIMEOUT_SECONDS", 30.0)
+
+
+warmup_config = WarmupConfig()
+
+
+class BatchConfig:
+    """
+    Batch search limits.
+
+    A batch is limited by cost rather than by the number of specs: each
+    unique spec costs one unit per 10 requested results, and duplicates or
+    specs already in the result cache are free.
+    """
+
+    MAX_COST = int(_env_float("BATCH_MAX_COST", 50))
+    MAX_SPECS = int(_env_float("BATCH_MAX_SPECS", 50))
+    MAX_CONCURRENCY = int(_env_float("BATCH_MAX_CONCURRENCY", 8))
+
+
+batch_config = BatchConfig()
+
+
+class PrefetchConfig:
+    """
+    Speculative next-page prefetch (opt-in).
+
+    After page N of a search is served, page N+1 is fetched on a separate
+    low-priority executor and stored in the result cache. Prefetches are
+    skipped while foreground jobs are queued and are capped by
+    PREFETCH_MAX_INFLIGHT and PREFETCH_PER_MINUTE.
+    """
+
+    ENABLED = _env_flag("PREFETCH_ENABLED", False)
+    WORKERS = max(int(_env_float("PREFETCH_WORKERS", 1)), 1)
+    MAX_INFLIGHT = max(int(_env_float("PREFETCH_MAX_INFLIGHT", 2)), 1)
+    PER_MINUTE = max(int(_env_float("PREFETCH_PER_MINUTE", 30)), 1)
+
+
+prefetch_config = PrefetchConfig()
+
+
+class CircuitConfig:
+    """
+    Circuit breakers per search type and backend, and per fetched host.
+
+    A circuit opens when at least CIRCUIT_MIN_CALLS calls were made in the
+    last CIRCUIT_WINDOW_SECONDS and CIRCUIT_FAILURE_RATIO of them failed.
+    Calls are then rejected with 503 for CIRCUIT_OPEN_SECONDS, after which
+    CIRCUIT_HALF_OPEN_PROBES calls probe whether the upstream recovered.
+    """
+
+    ENABLED = _env_flag("CIRCUIT_ENABLED", True)
+    WINDOW_SECONDS = _env_float("CIRCUIT_WINDOW_SECONDS", 30.0)
+    MIN_CALLS = max(int(_env_float("CIRCUIT_MIN_CALLS", 5)), 1)
+    FAILURE_RATIO = min(max(_env_float("CIRCUIT_FAILURE_RATIO", 0.5), 0.0), 1.0)
+    OPEN_SECONDS = _env_float("CIRCUIT_OPEN_SECONDS", 30.0)
+    HALF_OPEN_PROBES = max(int(_env_float("CIRCUIT_HALF_OPEN_PROBES", 1)), 1)
+
+
+circuit_config = CircuitConfig()
+
+
+class FetchConfig:
+    """
+    Content fetcher settings.
+
+    The fetcher that worked for a host (primp or urllib), with the charset and
+    compression it saw, is remembered for FETCH_STRATEGY_TTL_SECONDS (0
+    disables this) for up to FETCH_STRATEGY_MAX_HOSTS hosts.
+
+    With FETCH_SITE_TEMPLATES, the element holding a host's main content and
+    the lines recurring across its pages are learned for up to
+    FETCH_TEMPLATE_MAX_HOSTS hosts.
+    """
+
+    STRATEGY_TTL_SECONDS = max(_env_float("FETCH_STRATEGY_TTL_SECONDS", 3600.0), 0.0)
+    STRATEGY_MAX_HOSTS = max(int(_env_float("FETCH_STRATEGY_MAX_HOSTS", 1024)), 1)
+    SITE_TEMPLATES = _env_flag("FETCH_SITE_TEMPLATES", True)
+    TEMPLATE_MAX_HOSTS = max(int(_env_float("FETCH_TEMPLATE_MAX_HOSTS", 512)), 1)
+
+
+fetch_config = FetchConfig()
+
+
+class CrawlConfig:
+    """
+    Crawl limits.
+
+    A crawl follows links from a seed URL on its host, for at most
+    CRAWL_MAX_DEPTH links deep and CRAWL_MAX_PAGES pages, fetching up to
+    CRAWL_MAX_CONCURRENCY pages of the host at once. robots.txt rules for
+    CRAWL_USER_AGENT (or ``*``) are always obeyed; they are cached per site
+    for CRAWL_ROBOTS_TTL_SECONDS, and a Crawl-delay is honoured up to
+    CRAWL_MAX_DELAY_SECONDS.
+    """
+
+    MAX_DEPTH = max(int(_env_float("CRAWL_MAX_DEPTH", 3)), 0)
+    MAX_PAGES = max(int(_env_float("CRAWL_MAX_PAGES", 50)), 1)
+    MAX_CONCURRENCY = max(int(_env_float("CRAWL_MAX_CONCURRENCY", 4)), 1)
+    USER_AGENT = os.getenv("CRAWL_USER_AGENT", "open-agent-search")
+    ROBOTS_TTL_SECONDS = max(_env_float("CRAWL_ROBOTS_TTL_SECONDS", 3600.0), 0.0)
+    MAX_DELAY_SECONDS = max(_env_float("CRAWL_MAX_DELAY_SECONDS", 5.0), 0.0)
+
+
+crawl_config = CrawlConfig()
+
+
+class CompressionConfig:
+    """
+    Response compression.
+
+    Complete response bodies of at least COMPRESSION_MIN_BYTES are compressed
+    with the best encoding the client accepts: zstd or brotli when the
+    optional zstandard / brotli packages are installed, gzip otherwise.
+    """
+
+    ENABLED = _env_flag("COMPRESSION_ENABLED", True)
+    MIN_BYTES = int(_env_float("COMPRESSION_MIN_BYTES", 1024))
+    GZIP_LEVEL = int(_env_float("COMPRESSION_GZIP_LEVEL", 5))
+    BROTLI_LEVEL = int(_env_float("COMPRESSION_BROTLI_LEVEL", 4))
+    ZSTD_LEVEL = int(_env_float("COMPRESSION_ZSTD_LEVEL", 3))
+
+    @classmethod
+    def levels(cls) -> Dict[str, int]:
+        return {"gzip": cls.GZIP_LEVEL, "br": cls.BROTLI_LEVEL, "zstd": cls.ZSTD_LEVEL}
+
+
+compression_config = CompressionConfig()
+
+
+class LocalIndexConfig:
+    """
+    Local search index over fetched pages and search result snippets (opt-in).
+
+    Documents are kept in segments under LOCAL_INDEX_PATH and searched with
+    /api/search/local. With LOCAL_INDEX_MIX on, fresh local pages matching
+    every query term are also put ahead of text search results.
+    """
+
+    ENABLED = _env_flag("LOCAL_INDEX_ENABLED", False)
+    PATH = os.getenv("LOCAL_INDEX_PATH", ".oas-index")
+    FLUSH_DOCS = max(int(_env_float("LOCAL_INDEX_FLUSH_DOCS", 256)), 1)
+    MAX_SEGMENTS = max(int(_env_float("LOCAL_INDEX_MAX_SEGMENTS", 8)), 1)
+    MAX_DOCS = max(int(_env_float("LOCAL_INDEX_MAX_DOCS", 100000)), 1)
+    MIX_RESULTS = _env_flag("LOCAL_INDEX_MIX", False)
+    MIX_COUNT = max(int(_env_float("LOCAL_INDEX_MIX_COUNT", 2)), 1)
+    FRESH_SECONDS = _env_float("LOCAL_INDEX_FRESH_SECONDS", 3600.0)
+
+
+local_index_config = LocalIndexConfig()
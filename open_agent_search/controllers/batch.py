@@ -0,0 +1,157 @@
+"""
+Batch Search Controller - many query specs in one call
+
+Specs of any search type run through the regular controllers with bounded
+parallelism. Identical specs are executed once and their result is fanned
+out to every input index. A batch is limited by its cost, not by how many
+specs it contains.
+"""
+
+import asyncio
+import logging
+import math
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List
+
+from starlette.exceptions import HTTPException
+
+from ..models.schemas import BatchSearchSpec, SearchType
+from ..utils import run_in_threadpool
+from ..utils.cache import get_cache
+from ..utils.projection import project
+from .book import search_books
+from .image import search_images
+from .news import search_news
+from .text import search_text
+from .video import search_videos
+
+logger = logging.getLogger(__name__)
+
+SEARCH_FUNCTIONS: Dict[SearchType, Callable[..., List[Dict[str, Any]]]] = {
+    SearchType.text: search_text,
+    SearchType.images: search_images,
+    SearchType.videos: search_videos,
+    SearchType.news: search_news,
+    SearchType.books: search_books,
+}
+
+# Upstream engines return roughly this many results per request
+RESULTS_PER_UNIT = 10
+
+
+def _call_kwargs(spec: BatchSearchSpec) -> Dict[str, Any]:
+    """Map a spec onto the keyword arguments of its controller."""
+    kwargs: Dict[str, Any] = {
+        "query": spec.query,
+        "max_results": spec.max_results,
+        "page": spec.page,
+        "backend": spec.backend,
+    }
+    if spec.type != SearchType.books:
+        kwargs.update(region=spec.region, safesearch=spec.safesearch, timelimit=spec.timelimit)
+    if spec.type == SearchType.images:
+        kwargs.update(size=spec.size, color=spec.color)
+    elif spec.type == SearchType.videos:
+        kwargs.update(resolution=spec.resolution, duration=spec.duration)
+    return kwargs
+
+
+def spec_cost(spec: BatchSearchSpec) -> int:
+    """Cost units of one uncached spec: one per ``RESULTS_PER_UNIT`` requested results."""
+    return math.ceil(spec.max_results / RESULTS_PER_UNIT)
+
+
+@dataclass
+class _Group:
+    """One unique search and the input indices waiting for it, with their own specs."""
+
+    spec: BatchSearchSpec
+    func: Callable[..., List[Dict[str, Any]]]
+    kwargs: Dict[str, Any]
+    indices: List[int] = field(default_factory=list)
+    # Spec of each index; specs differing only in ``fields`` share the search
+    specs: List[BatchSearchSpec] = field(default_factory=list)
+
+
+@dataclass
+class BatchPlan:
+    groups: List[_Group]
+    count: int
+    cost: int
+
+
+def plan_batch(specs: List[BatchSearchSpec], max_cost: int) -> BatchPlan:
+    """
+    Deduplicate specs and price the batch.
+
+    Raises:
+        HTTPException: 400 if the batch costs more than ``max_cost``
+    """
+    groups: Dict[str, _Group] = {}
+    cache = get_cache()
+    cost = 0
+    for index, spec in enumerate(specs):
+        func = SEARCH_FUNCTIONS[spec.type]
+        kwargs = _call_kwargs(spec)
+        key = func.key_for(**kwargs)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = _Group(spec, func, kwargs)
+            # Stale entries are refreshed upstream, so only fresh ones are free
+            entry = cache.get(key)
+            if entry is None or not entry.fresh:
+                cost += spec_cost(spec)
+        group.indices.append(index)
+        group.specs.append(spec)
+
+    if cost > max_cost:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch cost {cost} exceeds the limit of {max_cost}. "
+            "Request fewer results or split the batch.",
+        )
+    return BatchPlan(groups=list(groups.values()), count=len(specs), cost=cost)
+
+
+def _item(index: int, spec: BatchSearchSpec, outcome: Any) -> Dict[str, Any]:
+    # Every BatchSearchItem field is present, since routes serialize items unvalidated
+    item: Dict[str, Any] = {
+        "index": index,
+        "type": spec.type.value,
+        "query": spec.query,
+        "results_count": 0,
+        "results": [],
+        "error": None,
+        "status_code": None,
+    }
+    if isinstance(outcome, HTTPException):
+        item.update(success=False, error=outcome.detail, status_code=outcome.status_code)
+    elif isinstance(outcome, Exception):
+        item.update(success=False, error=f"Search error: {outcome}", status_code=500)
+    else:
+        item.update(success=True, results_count=len(outcome), results=project(outcome, spec.fields))
+    return item
+
+
+async def iter_batch(plan: BatchPlan, concurrency: int) -> AsyncIterator[Dict[str, Any]]:
+    """Run the plan and yield one item per input index as each search finishes."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(group: _Group):
+        async with semaphore:
+            try:
+                return group, await run_in_threadpool(group.func, **group.kwargs)
+            except Exception as e:
+                logger.warning("Batch %s search failed: %s", group.spec.type.value, e)
+                return group, e
+
+    for finished in asyncio.as_completed([run(group) for group in plan.groups]):
+        group, outcome = await finished
+        for index, spec in zip(group.indices, group.specs):
+            yield _item(index, spec, outcome)
+
+
+async def search_batch(plan: BatchPlan, concurrency: int) -> List[Dict[str, Any]]:
+    """Run the plan and return every item ordered by input index."""
+    items = [item async for item in iter_batch(plan, concurrency)]
+    return sorted(items, key=lambda item: item["index"])
@@ -7,11 +7,17 @@ from typing import Any, Dict, List
 
 from ddgs import DDGS
 from ddgs.exceptions import DDGSException, RatelimitException, TimeoutException
-from fastapi import HTTPException
+from starlette.exceptions import HTTPException
+
+from ..utils.cache import cached_search
+from ..utils.circuit_breaker import CircuitOpenError, search_circuit
+from ..utils.clients import thread_client
+from ..utils.metrics import track_search
 
 logger = logging.getLogger(__name__)
 
 
+@cached_search("books")
 def search_books(
     query: str, max_results: int = 10, page: int = 1, backend: str = "auto"
 ) -> List[Dict[str, Any]]:
@@ -33,11 +39,14 @@ def search_books(
     try:
         logger.info("Book search: query=%r, max_results=%d", query, max_results)
 
-        ddgs = DDGS(timeout=10)
-        results = ddgs.books(query=query, max_results=max_results, page=page, backend=backend)
+        ddgs = thread_client(DDGS, timeout=10)
+        with search_circuit("book", backend), track_search("book", backend):
+            results = ddgs.books(query=query, max_results=max_results, page=page, backend=backend)
 
         return results
 
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=e.headers)
     except RatelimitException:
         raise HTTPException(status_code=429, detail="Rate limit exceeded")
     except TimeoutException:
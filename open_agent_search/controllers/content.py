@@ -4,41 +4,127 @@ Fetches and extracts content from URLs
 """
 
 import asyncio
+import html
+import json
 import logging
+import re
+import time
 import urllib.request
-from typing import Any, Dict, List
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
 
 from bs4 import BeautifulSoup
 from ddgs.http_client import HttpClient
-from fastapi import HTTPException
-
+from starlette.exceptions import HTTPException
+
+from ..config import local_index_config
+from ..utils import run_in_threadpool
+from ..utils.cache import cache_scope, cached_fetch
+from ..utils.charset import StreamDecoder, decode_body
+from ..utils.circuit_breaker import CircuitOpenError, fetch_circuit, fetch_failed
+from ..utils.fetch_strategy import get_fetch_strategies
+from ..utils.local_index import index_page
+from ..utils.markdown import close_fences, html_to_markdown
+from ..utils.metrics import bytes_downloaded, fetch_duration, record_upstream_error
+from ..utils.passages import select_passages
+from ..utils.readability import extract_main
+from ..utils.sniffing import (
+    HTML,
+    JSON,
+    MARKDOWN,
+    SNIFF_BYTES,
+    XML,
+    UnsupportedContent,
+    header,
+    sniff,
+)
+from ..utils.structure import empty_structure, html_structure, markdown_structure
+from ..utils.timing import phase, timing_scope
+from ..utils.tokens import (
+    allocate_budget,
+    estimate_tokens,
+    query_terms,
+    relevance,
+    token_offset,
+)
 from ..utils.url_validator import validate_url
 
 logger = logging.getLogger(__name__)
 
 
-# Maximum bytes to download in the fallback fetcher (10 MB)
+# Maximum bytes to download in the fallback fetcher (10 MB), read in chunks
 _MAX_DOWNLOAD_BYTES = 10 * 1024 * 1024
+_READ_CHUNK_BYTES = 64 * 1024
+
+# Characters kept per page: by default, and when trimming to a token budget
+DEFAULT_MAX_LENGTH = 2000
+MAX_CONTENT_LENGTH = 20000
+# Characters of a page searched for passages matching a query
+PASSAGE_SOURCE_LENGTH = 100_000
+
+
+def _resolve_max_length(max_length: Optional[int], max_tokens: Optional[int]) -> int:
+    if max_length is not None:
+        return max_length
+    return DEFAULT_MAX_LENGTH if max_tokens is None else MAX_CONTENT_LENGTH
+
+
+def _extract_length(
+    max_length: Optional[int], max_tokens: Optional[int], query: Optional[str]
+) -> int:
+    """Characters to extract: the whole searchable page when selecting passages."""
+    return PASSAGE_SOURCE_LENGTH if query else _resolve_max_length(max_length, max_tokens)
+
+
+@dataclass
+class Fetched:
+    """A downloaded page, the charset it was decoded with and whether it came compressed."""
+
+    text: str
+    status_code: int
+    charset: Optional[str] = None
+    compressed: bool = False
+    kind: str = HTML  # see utils.sniffing
 
 
 def _decode_bytes_safely(raw: bytes) -> str:
-    """Attempt multiple encodings to decode raw bytes into a string.
+    """Decode raw bytes into a string with the detected charset."""
+    return decode_body(raw)[0]
 
-    Order matters: utf-8 first (most common), then cp1252 (Windows superset
-    of latin-1 with extra printable chars), then latin-1 as a guaranteed
-    fallback (maps all 256 byte values).
-    """
-    for encoding in ("utf-8", "cp1252"):
+
+def _decompress(raw: bytes, encoding: str) -> bytes:
+    """Inflate a gzip or deflate body, up to the download cap (truncated input is fine)."""
+    # 47 accepts both gzip and zlib headers; -15 is a bare deflate stream
+    for wbits in (47, -15):
         try:
-            return raw.decode(encoding)
-        except (UnicodeDecodeError, LookupError):
+            return zlib.decompressobj(wbits).decompress(raw, _MAX_DOWNLOAD_BYTES)
+        except zlib.error:
             continue
-    # latin-1 never raises UnicodeDecodeError — guaranteed to succeed
-    return raw.decode("latin-1")
+    raise ValueError(f"Could not decode {encoding} response body")
 
 
-def _fallback_fetch(url: str, timeout: int) -> tuple[str, int]:
-    """Fallback fetcher using stdlib urllib when primp/DDGS client fails to decode."""
+def _timed_out(exc: BaseException) -> bool:
+    message = str(exc).lower()
+    return (
+        isinstance(exc, TimeoutError)
+        or "timeout" in type(exc).__name__.lower()
+        or "timed out" in message
+        or "timeout" in message
+    )
+
+
+def _fallback_fetch(
+    url: str, timeout: int, charset: Optional[str] = None, accept_compressed: bool = False
+) -> Fetched:
+    """Fallback fetcher using stdlib urllib when primp/DDGS client fails to decode.
+
+    ``charset`` is used when neither the response nor the page declares
+    one. Hosts known to compress regardless are asked for gzip
+    (``accept_compressed``). Uncompressed bodies are decoded chunk by chunk
+    as they arrive.
+    """
     req = urllib.request.Request(
         url,
         headers={
@@ -49,29 +135,240 @@ def _fallback_fetch(url: str, timeout: int) -> tuple[str, int]:
             ),
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
             "Accept-Language": "en-US,en;q=0.5",
-            "Accept-Encoding": "identity",  # Avoid compressed responses that may fail to decode
+            # Identity avoids bodies we cannot decode; gzip/deflate are inflated below
+            "Accept-Encoding": "gzip, deflate" if accept_compressed else "identity",
         },
     )
     with urllib.request.urlopen(req, timeout=timeout) as resp:
         status_code = resp.getcode()
-        raw_bytes = resp.read(_MAX_DOWNLOAD_BYTES)
-        # Try charset from headers first
         content_type = resp.headers.get("Content-Type", "")
-    charset = None
-    if "charset=" in content_type:
-        charset = content_type.split("charset=")[-1].strip().split(";")[0].strip()
-    if charset:
+        content_encoding = resp.headers.get("Content-Encoding", "").strip().lower()
+        compressed = content_encoding in ("gzip", "x-gzip", "deflate")
+        if not compressed and content_encoding not in ("", "identity"):
+            raise ValueError(f"Could not decode {content_encoding} response body")
+        raw_bytes = resp.read(SNIFF_BYTES)
+        bytes_downloaded.inc(len(raw_bytes), fetcher="urllib")
+        if compressed:
+            rest = resp.read(_MAX_DOWNLOAD_BYTES - len(raw_bytes))
+            bytes_downloaded.inc(len(rest), fetcher="urllib")
+            raw_bytes += rest
+        else:
+            # Stop before downloading the rest of a PDF, image or archive
+            kind = sniff(content_type, raw_bytes, url)
+            decoder = StreamDecoder(content_type, charset)
+            decoder.feed(raw_bytes)
+            remaining = _MAX_DOWNLOAD_BYTES - len(raw_bytes)
+            while remaining > 0:
+                chunk = resp.read(min(_READ_CHUNK_BYTES, remaining))
+                if not chunk:
+                    break
+                bytes_downloaded.inc(len(chunk), fetcher="urllib")
+                remaining -= len(chunk)
+                decoder.feed(chunk)
+    with phase("decode"):
+        if compressed:
+            raw_bytes = _decompress(raw_bytes, content_encoding)
+            kind = sniff(content_type, raw_bytes[:SNIFF_BYTES], url)
+            text, used = decode_body(raw_bytes, content_type, charset)
+        else:
+            text, used = decoder.close(), decoder.charset
+    return Fetched(text, status_code, used, compressed, kind)
+
+
+def _response_content_type(response: Any) -> str:
+    """Content-Type of a DDGS ``Response`` (its headers live on the wrapped primp response)."""
+    headers = getattr(response, "headers", None)
+    if headers is None:
+        headers = getattr(getattr(response, "_resp", None), "headers", None)
+    return header(headers, "Content-Type")
+
+
+def parse_html(html_text: str, url: str = "") -> tuple[str, str, str]:
+    """
+    Extract title, meta description and main text content from an HTML document.
+
+    The main content is found by Readability-style scoring, helped by what
+    was learned about the URL's host (see ``utils.readability``).
+    CPU-bound; callers on the event loop should run it in the thread pool.
+
+    Returns:
+        Tuple of (title, description, content)
+    """
+    return _parse_html(html_text, url, structured=False)[:3]
+
+
+def _parse_html(
+    html_text: str, url: str, structured: bool
+) -> tuple[str, str, str, Optional[Dict[str, Any]]]:
+    """``parse_html``, plus the page structure from the same parse when ``structured``."""
+    try:
+        soup = BeautifulSoup(html_text, "html.parser")
+    except Exception as parse_err:
+        logger.warning(f"HTML parsing failed for {url!r}: {parse_err!r}")
+        # Return raw text stripped of obvious tags as best-effort
+        raw = re.sub(r"<[^>]+>", " ", html_text)
+        raw = re.sub(r"\s+", " ", raw).strip()
+        return "", "", raw, empty_structure() if structured else None
+
+    # Extract title
+    title = soup.find("title")
+    title_text = title.get_text().strip() if title else ""
+
+    # Extract main content; script, style, nav, footer and header are skipped
+    content, elements = extract_main(soup, url, urlparse(url).hostname or "" if url else "")
+
+    # Extract meta description
+    meta_desc = soup.find("meta", attrs={"name": "description"})
+    description = meta_desc.get("content", "") if meta_desc else ""
+
+    structure = html_structure(soup, elements, url) if structured else None
+    return title_text, description, content, structure
+
+
+def _normalize_lines(text: str) -> str:
+    """Strip trailing whitespace and collapse runs of blank lines to one."""
+    lines = [line.rstrip() for line in text.strip().splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+
+def extract_content(text: str, kind: str, url: str = "") -> tuple[str, str, str]:
+    """
+    Extract title, description and content from a document of a sniffed ``kind``.
+
+    Only HTML goes through BeautifulSoup. JSON is pretty-printed, XML
+    (feeds, sitemaps) is reduced to its text, and Markdown and plain text
+    are kept as they are, with a Markdown page titled by its first heading.
+
+    Returns:
+        Tuple of (title, description, content)
+    """
+    if kind == HTML:
+        return parse_html(text, url)
+    if kind == JSON:
         try:
-            return raw_bytes.decode(charset), status_code
-        except (UnicodeDecodeError, LookupError):
-            pass
-    return _decode_bytes_safely(raw_bytes), status_code
+            return "", "", json.dumps(json.loads(text), indent=2, ensure_ascii=False)
+        except ValueError:
+            return "", "", text.strip()
+    if kind == XML:
+        match = re.search(r"<title[^>]*>(.*?)</title>", text, re.S | re.I)
+        title = match.group(1) if match else ""
+        body = re.sub(r"<!\[CDATA\[(.*?)\]\]>", r"\1", text, flags=re.S)
+        body = re.sub(r"<\?.*?\?>|<!--.*?-->|<[^>]+>", "\n", body, flags=re.S)
+        lines = [line.strip() for line in html.unescape(body).splitlines() if line.strip()]
+        title = html.unescape(re.sub(r"<!\[CDATA\[|\]\]>|<[^>]+>", "", title)).strip()
+        return title, "", "\n".join(lines)
+    content = _normalize_lines(text)
+    title = ""
+    if kind == MARKDOWN:
+        match = re.search(r"^#\s+(.+)$", content, re.M)
+        title = match.group(1).strip().strip("#").strip() if match else ""
+    return title, "", content
+
+
+def extract_structured(text: str, kind: str, url: str = "") -> tuple[str, str, str, Dict[str, Any]]:
+    """
+    ``extract_content``, plus the document's sections, links, tables and code.
+
+    Returns:
+        Tuple of (title, description, content, structure)
+    """
+    if kind == HTML:
+        title, description, content, structure = _parse_html(text, url, structured=True)
+        return title, description, content, structure or empty_structure()
+    title, description, content = extract_content(text, kind, url)
+    structure = markdown_structure(text, url) if kind == MARKDOWN else empty_structure()
+    return title, description, content, structure
+
+
+def extract_markdown(text: str, kind: str, url: str = "") -> tuple[str, str, str]:
+    """
+    ``extract_content`` with HTML converted to Markdown instead of plain text.
+
+    The conversion streams through the page once without building a tree
+    (see ``utils.markdown``). If it finds no text, e.g. because all of it sat
+    in skipped boilerplate, the page's plain text is returned instead.
+    Markdown documents are returned as they are.
+
+    Returns:
+        Tuple of (title, description, content)
+    """
+    if kind == HTML:
+        title, description, content = html_to_markdown(text, url)
+        if content:
+            return title, description, content
+    return extract_content(text, kind, url)
+
+
+def trim_content(content: str, max_length: int) -> str:
+    """
+    Trim content to at most ``max_length`` characters at a natural boundary.
+
+    Prefers a paragraph break in the last 30% of the window, then a sentence
+    end in the last 20%, and otherwise cuts hard at ``max_length``.
+    """
+    if len(content) <= max_length:
+        return content
+
+    # Try to cut at paragraph boundary
+    trimmed_content = content[:max_length]
+    last_para = trimmed_content.rfind("\n\n")
+    last_sentence = trimmed_content.rfind(". ")
+
+    if last_para > max_length * 0.7:  # If paragraph break is not too far back
+        return content[:last_para]
+    if last_sentence > max_length * 0.8:  # Otherwise try sentence boundary
+        return content[: last_sentence + 1]
+    return trimmed_content
+
+
+def trim_tokens(content: str, max_tokens: int) -> str:
+    """Trim content to about ``max_tokens`` tokens, at a natural boundary like ``trim_content``."""
+    return trim_content(content, token_offset(content, max_tokens))
+
+
+def _fit_content(
+    result: Dict[str, Any],
+    query: Optional[str],
+    max_length: Optional[int],
+    max_tokens: Optional[int],
+) -> None:
+    """
+    Cut a fetched result down to its budget and report what was kept.
+
+    With a query, the best matching passages within ``max_length``
+    characters (2000 by default unless ``max_tokens`` is set) and
+    ``max_tokens`` tokens are kept; otherwise the head of the page is
+    trimmed to ``max_tokens``.
+    """
+    original = result["content"]
+    if query:
+        if max_length is None and max_tokens is None:
+            max_length = DEFAULT_MAX_LENGTH
+        selection = select_passages(original, query, max_chars=max_length, max_tokens=max_tokens)
+        content = selection.content
+        result["passages"] = {"selected": selection.selected, "total": selection.total}
+    else:
+        content = trim_tokens(original, max_tokens)
+    if result.get("format") == "markdown":
+        content = close_fences(content)
+    result.update(
+        content=content,
+        trimmed=result["trimmed"] or len(content) < len(original),
+        returned_length=len(content),
+    )
+    if max_tokens is not None:
+        result.update(returned_tokens=estimate_tokens(content), token_budget=max_tokens)
 
 
 async def fetch_url_content(
     url: str,
     timeout: int = 10,
-    max_length: int = 2000,
+    max_length: Optional[int] = None,
+    include_timings: bool = False,
+    max_tokens: Optional[int] = None,
+    query: Optional[str] = None,
+    structured: bool = False,
+    format: str = "text",
 ) -> Dict[str, Any]:
     """
     Fetch and extract content from a single URL (non-blocking async).
@@ -79,120 +376,163 @@ async def fetch_url_content(
     Args:
         url: URL to fetch
         timeout: Request timeout in seconds
-        max_length: Maximum content length in characters (default: 2000)
+        max_length: Maximum content length in characters (default: 2000,
+            or 20000 when trimming to ``max_tokens``)
+        include_timings: Add per-phase timings (ms) under a "timings" key
+        max_tokens: Also trim to about this many tokens
+        query: Keep the passages that best match this query (BM25) instead
+            of the head of the page
+        structured: Add the page's sections, links, tables and code blocks
+            under a "structure" key
+        format: "text" for plain text, or "markdown" to keep headings,
+            lists, links, emphasis, code blocks and tables as Markdown
 
     Returns:
-        Dictionary with URL, title, content, and metadata
+        Dictionary with URL, title, content, and metadata. Results served
+        from the cache carry a "cache" key with its status (hit or stale)
+        and age in seconds.
 
     Raises:
         HTTPException: On fetch errors
     """
+    with timing_scope() as timings, cache_scope() as lookups:
+        result = await _fetch_and_extract(
+            url, timeout, _extract_length(max_length, max_tokens, query), structured, format
+        )
+        if query or max_tokens is not None:
+            with phase("passages" if query else "trim.tokens"):
+                await run_in_threadpool(_fit_content, result, query, max_length, max_tokens)
+    if lookups and lookups[-1].status != "miss":
+        result["cache"] = {"status": lookups[-1].status, "age": int(lookups[-1].age)}
+    if include_timings:
+        result["timings"] = timings.as_dict()
+    return result
+
+
+@cached_fetch("content", ignore=("timeout",))
+async def _fetch_and_extract(
+    url: str, timeout: int, max_length: int, structured: bool = False, format: str = "text"
+) -> Dict[str, Any]:
+    """Fetch, parse and trim one URL, recording each phase in the active timing scope."""
     try:
         # SSRF protection: validate URL before fetching
-        validate_url(url)
+        with phase("validate"):
+            validate_url(url)
 
         logger.info(f"Fetching content from: {url!r}")
 
+        host = urlparse(url).hostname or ""
+        strategies = get_fetch_strategies()
+        strategy = strategies.get(host)
+
         # Use DDGS HttpClient with browser impersonation for better compatibility
         # This uses primp which handles browser fingerprinting automatically
-        def fetch_with_ddgs():
+        def fetch_with_ddgs() -> Fetched:
             """Network I/O done in thread pool to avoid blocking.
-            Falls back to stdlib urllib if primp can't decode the response."""
+            Falls back to stdlib urllib if primp can't fetch the response."""
             client = HttpClient(timeout=timeout, verify=True)
             response = client.request("GET", url)
+            bytes_downloaded.inc(len(response.content), fetcher="primp")
             if response.status_code != 200:
                 raise Exception(f"HTTP {response.status_code}")
+            content_type = _response_content_type(response)
+            kind = sniff(content_type, response.content[:SNIFF_BYTES], url)
+
+            # Decode the body once ourselves: primp's .text only honours the
+            # header charset, not <meta charset> or the host's known charset
+            with phase("decode"):
+                html_text, charset = decode_body(
+                    response.content, content_type, strategy.charset if strategy else None
+                )
+            return Fetched(html_text, response.status_code, charset, kind=kind)
+
+        def fetch_with_urllib() -> Fetched:
+            """Fallback using stdlib urllib — no primp dependency."""
+            if strategy is None:
+                return _fallback_fetch(url, timeout)
+            return _fallback_fetch(url, timeout, strategy.charset, strategy.compressed)
 
-            # Try .text first; fall back to raw bytes decoding on DecodeError
+        async def timed_fetch(fetcher: str, func) -> Fetched:
+            """Run a fetcher in the thread pool, recording its latency and failures."""
+            start = time.perf_counter()
             try:
-                html_text = response.text
-            except Exception:
-                logger.warning(f"Primary decode failed for {url!r}, trying raw bytes fallback")
+                with phase(f"download.{fetcher}"):
+                    return await run_in_threadpool(func)
+            except UnsupportedContent:
+                raise
+            except Exception as e:
+                record_upstream_error(f"fetch:{fetcher}", e)
+                raise
+            finally:
+                fetch_duration.observe(time.perf_counter() - start, fetcher=fetcher)
+
+        async def download() -> Fetched:
+            """
+            Fetch with the fetcher that last worked for this host (primp when
+            unknown), falling back to the other one unless the first timed out.
+            """
+            fetchers = {"primp": fetch_with_ddgs, "urllib": fetch_with_urllib}
+            order = ["primp", "urllib"]
+            if strategy is not None and strategy.fetcher == "urllib":
+                order.reverse()
+            for attempt, fetcher in enumerate(order):
                 try:
-                    html_text = _decode_bytes_safely(response.content)
-                except Exception:
+                    fetched = await timed_fetch(fetcher, fetchers[fetcher])
+                except Exception as err:
+                    if attempt or _timed_out(err) or isinstance(err, UnsupportedContent):
+                        # The other fetcher would wait out the same timeout, or get
+                        # the same binary document, again
+                        raise
                     logger.warning(
-                        f"Raw bytes fallback also failed for {url!r}, falling back to stdlib urllib"
+                        f"{fetcher} failed for {url!r}: {err!r}. Retrying with {order[1]}."
                     )
-                    raise  # will be caught by outer handler to trigger urllib fallback
-            return html_text, response.status_code
-
-        def fetch_with_urllib():
-            """Fallback using stdlib urllib — no primp dependency."""
-            return _fallback_fetch(url, timeout)
-
-        # Run network I/O in thread pool to keep it non-blocking
-        loop = asyncio.get_running_loop()
-        try:
-            html_text, status_code = await loop.run_in_executor(None, fetch_with_ddgs)
-        except Exception as primary_err:
-            logger.warning(
-                f"DDGS client failed for {url!r}: {primary_err!r}. "
-                "Retrying with stdlib urllib fallback."
-            )
-            html_text, status_code = await loop.run_in_executor(None, fetch_with_urllib)
-
-        def parse_html():
-            """CPU-intensive parsing done in thread pool to avoid blocking"""
-            try:
-                soup = BeautifulSoup(html_text, "html.parser")
-            except Exception as parse_err:
-                logger.warning(f"HTML parsing failed for {url!r}: {parse_err!r}")
-                # Return raw text stripped of obvious tags as best-effort
-                import re
-
-                raw = re.sub(r"<[^>]+>", " ", html_text)
-                raw = re.sub(r"\s+", " ", raw).strip()
-                return "", "", raw
-
-            # Remove script and style elements
-            for element in soup(["script", "style", "nav", "footer", "header"]):
-                element.decompose()
-
-            # Extract title
-            title = soup.find("title")
-            title_text = title.get_text().strip() if title else ""
-
-            # Extract main content
-            main_content = soup.find("main") or soup.find("article") or soup.find("body")
-            content = (
-                main_content.get_text(separator="\n", strip=True)
-                if main_content
-                else soup.get_text(separator="\n", strip=True)
-            )
-
-            # Clean up content
-            lines = [line.strip() for line in content.split("\n") if line.strip()]
-            content = "\n".join(lines)
-
-            # Extract meta description
-            meta_desc = soup.find("meta", attrs={"name": "description"})
-            description = meta_desc.get("content", "") if meta_desc else ""
-
-            return title_text, description, content
-
-        # Run CPU-intensive parsing in thread pool
-        title_text, description, content = await loop.run_in_executor(None, parse_html)
+                    continue
+                strategies.remember(host, fetcher, fetched.charset, fetched.compressed)
+                return fetched
+
+        # Run network I/O in thread pool to keep it non-blocking; fail fast
+        # while the host's circuit is open
+        circuit = fetch_circuit(host)
+        if circuit is None:
+            fetched = await download()
+        else:
+            with circuit.guard(fetch_failed):
+                fetched = await download()
+        html_text, status_code = fetched.text, fetched.status_code
+
+        # Run CPU-intensive parsing in thread pool; non-HTML documents skip it
+        with phase("parse"):
+            if format == "markdown":
+                title_text, description, content = await run_in_threadpool(
+                    extract_markdown, html_text, fetched.kind, url
+                )
+                if structured:
+                    # The streaming conversion keeps no tree to take the structure from
+                    structure = (
+                        await run_in_threadpool(extract_structured, html_text, fetched.kind, url)
+                    )[3]
+            elif structured:
+                title_text, description, content, structure = await run_in_threadpool(
+                    extract_structured, html_text, fetched.kind, url
+                )
+            else:
+                title_text, description, content = await run_in_threadpool(
+                    extract_content, html_text, fetched.kind, url
+                )
+
+        if local_index_config.ENABLED:
+            with phase("index"):
+                await run_in_threadpool(index_page, url, title_text, content)
 
         # Intelligent content trimming
         full_length = len(content)
-        trimmed_content = content
-        is_truncated = False
-
-        if full_length > max_length:
-            # Try to cut at paragraph boundary
-            trimmed_content = content[:max_length]
-            last_para = trimmed_content.rfind("\n\n")
-            last_sentence = trimmed_content.rfind(". ")
-
-            if last_para > max_length * 0.7:  # If paragraph break is not too far back
-                trimmed_content = content[:last_para]
-            elif last_sentence > max_length * 0.8:  # Otherwise try sentence boundary
-                trimmed_content = content[: last_sentence + 1]
+        is_truncated = full_length > max_length
+        with phase("trim"):
+            trimmed_content = trim_content(content, max_length)
+            if format == "markdown":
+                trimmed_content = close_fences(trimmed_content)
 
-            is_truncated = True
-
-        return {
+        result = {
             "url": url,
             "title": title_text,
             "description": description,
@@ -201,11 +541,23 @@ async def fetch_url_content(
             "trimmed": is_truncated,
             "returned_length": len(trimmed_content),
             "status_code": status_code,
+            "content_type": fetched.kind,
+            "format": format,
         }
+        if structured:
+            result["structure"] = structure
+        return result
 
     except HTTPException:
         # Re-raise FastAPI exceptions (e.g. from validate_url SSRF checks) as-is
         raise
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=e.headers)
+    except UnsupportedContent as e:
+        raise HTTPException(
+            status_code=415,
+            detail=f"{e} ({url}). Only HTML, XML, JSON, Markdown and text can be extracted.",
+        )
     except Exception as e:
         error_msg = str(e)
         logger.error(f"Error fetching {url}: {error_msg}")
@@ -237,10 +589,44 @@ async def fetch_url_content(
         raise HTTPException(status_code=400, detail=f"Failed to fetch URL: {error_msg}")
 
 
+def share_token_budget(
+    results: List[Dict[str, Any]],
+    max_tokens: int,
+    query: Optional[str] = None,
+    max_length: Optional[int] = None,
+) -> None:
+    """
+    Split one token budget across fetched pages and fit each to its share.
+
+    Without a query every page weighs the same and keeps its head. With one,
+    a page's weight grows with the fraction of query terms in its title,
+    description and content, and it keeps its best matching passages. Pages
+    shorter than their share pass the rest on to the others.
+    """
+    fetched = [result for result in results if "content" in result]
+    terms = query_terms(query)
+    weights = []
+    for result in fetched:
+        if terms:
+            text = f"{result['title']} {result['description']} {result['content']}"
+            result["relevance"] = round(relevance(terms, text), 3)
+            weights.append(0.25 + result["relevance"])
+        else:
+            weights.append(1.0)
+    sizes = [estimate_tokens(result["content"]) for result in fetched]
+    for result, budget in zip(fetched, allocate_budget(sizes, weights, max_tokens)):
+        _fit_content(result, query, max_length, budget)
+
+
 async def fetch_multiple_urls(
     urls: List[str],
     timeout: int = 10,
-    max_length: int = 2000,
+    max_length: Optional[int] = None,
+    include_timings: bool = False,
+    max_tokens: Optional[int] = None,
+    query: Optional[str] = None,
+    structured: bool = False,
+    format: str = "text",
 ) -> List[Dict[str, Any]]:
     """
     Fetch and extract content from multiple URLs in parallel (non-blocking).
@@ -248,16 +634,35 @@ async def fetch_multiple_urls(
     Args:
         urls: List of URLs to fetch
         timeout: Request timeout in seconds
-        max_length: Maximum content length per URL in characters (default: 2000)
+        max_length: Maximum content length per URL in characters (default:
+            2000, or 20000 when sharing ``max_tokens``)
+        include_timings: Add per-phase timings (ms) to each successful result
+        max_tokens: Token budget shared by all pages
+        query: Keep each page's best matching passages, and spend more of
+            ``max_tokens`` on pages that match
+        structured: Add each page's sections, links, tables and code blocks
+        format: "text" or "markdown", as for ``fetch_url_content``
 
     Returns:
         List of dictionaries with URL content
     """
+    if max_tokens is None:
+        page_options: Dict[str, Any] = {"max_length": max_length, "query": query}
+    else:
+        # Pages are fitted to the shared budget once they are all in
+        page_options = {"max_length": _extract_length(max_length, max_tokens, query)}
 
     async def fetch_one(url: str):
         try:
-            validate_url(url)  # SSRF protection for each URL
-            return await fetch_url_content(url, timeout, max_length)
+            # fetch_url_content runs the SSRF validation for each URL
+            return await fetch_url_content(
+                url,
+                timeout,
+                include_timings=include_timings,
+                structured=structured,
+                format=format,
+                **page_options,
+            )
         except HTTPException as e:
             logger.error(f"Blocked or failed URL {url!r}: {e.detail}")
             return {
@@ -275,6 +680,9 @@ async def fetch_multiple_urls(
 
     # Fetch all URLs in parallel for better performance
     tasks = [fetch_one(url) for url in urls[:10]]  # Limit to 10 URLs
-    results = await asyncio.gather(*tasks)
+    results = list(await asyncio.gather(*tasks))
 
-    return list(results)
+    if max_tokens is not None:
+        with phase("trim.tokens"):
+            await run_in_threadpool(share_token_budget, results, max_tokens, query, max_length)
+    return results
@@ -0,0 +1,273 @@
+"""
+Crawl Controller - bounded link following from a seed URL
+
+A crawl fetches the seed page with ``fetch_url_content``, then the pages it
+links to, up to ``max_depth`` links away and ``max_pages`` pages in all.
+Links found on a page are queued as soon as it is extracted, with at most
+``concurrency`` fetches running at once. Only links in scope are followed:
+the seed's host, and with the ``prefix`` scope only paths under the seed's
+directory. robots.txt is always obeyed.
+
+URLs are normalized before they are queued, so ``/a``, ``/a#top`` and
+``/a?utm_source=x`` are fetched once. Pages whose extracted content matches
+a page already returned (mirrors, ``?page=1`` aliases) are reported as
+duplicates and their links are not followed. Pages are yielded as soon as
+they are extracted.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from ddgs.http_client import HttpClient
+from starlette.exceptions import HTTPException
+
+from ..config import crawl_config
+from ..utils import run_in_threadpool
+from ..utils.robots import RobotsRules, get_robots_cache, robots_url, site_of
+from ..utils.sniffing import urlpath_suffix
+from ..utils.url_validator import validate_url
+from .content import fetch_url_content
+
+logger = logging.getLogger(__name__)
+
+# Links to these are never pages worth extracting
+_SKIPPED_SUFFIXES = frozenset(
+    {
+        ".7z",
+        ".avi",
+        ".css",
+        ".dmg",
+        ".exe",
+        ".gif",
+        ".gz",
+        ".ico",
+        ".jpeg",
+        ".jpg",
+        ".js",
+        ".mp3",
+        ".mp4",
+        ".pdf",
+        ".png",
+        ".svg",
+        ".tar",
+        ".webp",
+        ".woff",
+        ".woff2",
+        ".zip",
+    }
+)
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+_DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a URL for deduplication.
+
+    Lowercases the scheme and host, drops default ports, fragments and
+    tracking parameters, sorts the query and gives an empty path a ``/``.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port is not None and str(parts.port) != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(_TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+def scope_prefix(seed: str, scope: str) -> str:
+    """URL prefix every crawled page must start with."""
+    if scope == "host":
+        return site_of(seed) + "/"
+    return seed[: seed.rfind("/") + 1]
+
+
+@dataclass
+class CrawlPlan:
+    seed: str
+    prefix: str
+    robots: RobotsRules
+    max_depth: int
+    max_pages: int
+    concurrency: int
+    stats: Dict[str, int] = field(
+        default_factory=lambda: {
+            "pages": 0,
+            "duplicates": 0,
+            "errors": 0,
+            "robots_skipped": 0,
+            "limit_skipped": 0,
+        }
+    )
+
+
+def _fetch_robots(url: str, timeout: int) -> RobotsRules:
+    """Download and parse the robots.txt governing ``url``."""
+    user_agent = crawl_config.USER_AGENT
+    try:
+        response = HttpClient(timeout=timeout, verify=True).request("GET", robots_url(url))
+    except Exception as e:
+        logger.warning(f"Could not fetch robots.txt for {url!r}: {e!r}")
+        return RobotsRules.unreachable(user_agent)
+    text = response.content.decode("utf-8", errors="replace")
+    return RobotsRules.from_status(response.status_code, text, user_agent)
+
+
+async def plan_crawl(
+    url: str, max_depth: int, max_pages: int, scope: str, concurrency: int, timeout: int
+) -> CrawlPlan:
+    """
+    Check the seed URL and load its site's robots.txt.
+
+    Raises:
+        HTTPException: 400 for an unsafe seed URL, 403 if robots.txt disallows it,
+            503 if robots.txt cannot be fetched (server error or network failure)
+    """
+    seed = normalize_url(url)
+    validate_url(seed)
+    cache = get_robots_cache()
+    site = site_of(seed)
+    robots = cache.get(site)
+    if robots is None:
+        validate_url(robots_url(seed))
+        robots = await run_in_threadpool(_fetch_robots, seed, timeout)
+        if not robots.reachable:
+            # Not cached, so one failed download does not lock the site out
+            raise HTTPException(
+                status_code=503, detail=f"robots.txt for {site} is unreachable; try again later"
+            )
+        cache.put(site, robots)
+    if not robots.allowed(seed):
+        raise HTTPException(status_code=403, detail=f"robots.txt disallows crawling {seed}")
+    return CrawlPlan(
+        seed=seed,
+        prefix=scope_prefix(seed, scope),
+        robots=robots,
+        max_depth=max_depth,
+        max_pages=max_pages,
+        concurrency=concurrency,
+    )
+
+
+def _content_hash(result: Dict[str, Any]) -> bytes:
+    text = f"{result.get('title', '')}\n{result.get('content', '')}"
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+async def iter_crawl(
+    plan: CrawlPlan,
+    timeout: int = 10,
+    max_length: Optional[int] = None,
+    structured: bool = False,
+    format: str = "text",
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run the crawl and yield one item per fetched page as it is extracted.
+
+    Pages carry the ``fetch_url_content`` result plus their ``depth``.
+    Duplicates carry ``duplicate_of`` and failures ``error``.
+    """
+    stats = plan.stats
+    seen: Set[str] = {plan.seed}
+    hashes: Dict[bytes, str] = {}
+    semaphore = asyncio.Semaphore(plan.concurrency)
+    delay = min(plan.robots.crawl_delay(), crawl_config.MAX_DELAY_SECONDS)
+    next_start = 0.0
+    pace_lock = asyncio.Lock()
+
+    async def pace() -> None:
+        """Space out request starts by the site's Crawl-delay."""
+        nonlocal next_start
+        if not delay:
+            return
+        async with pace_lock:
+            wait = next_start - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            next_start = time.monotonic() + delay
+
+    async def crawl_one(url: str, depth: int) -> Tuple[str, int, Any]:
+        async with semaphore:
+            await pace()
+            try:
+                # structure["links"] is where the next level comes from
+                result = await fetch_url_content(
+                    url, timeout, max_length=max_length, structured=True, format=format
+                )
+            except HTTPException as e:
+                return url, depth, e
+            except Exception as e:
+                logger.warning(f"Crawl of {url!r} failed: {e!r}")
+                return url, depth, e
+        return url, depth, result
+
+    def follow(links: List[Dict[str, str]]) -> List[str]:
+        """In-scope, allowed and unseen URLs among ``links``."""
+        found = []
+        for link in links:
+            url = normalize_url(link["url"])
+            if (
+                url in seen
+                or not url.startswith(plan.prefix)
+                or urlpath_suffix(url) in _SKIPPED_SUFFIXES
+            ):
+                continue
+            seen.add(url)
+            if not plan.robots.allowed(url):
+                stats["robots_skipped"] += 1
+                continue
+            found.append(url)
+        return found
+
+    scheduled = 1
+    pending = {asyncio.ensure_future(crawl_one(plan.seed, 0))}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                url, depth, outcome = task.result()
+                if isinstance(outcome, Exception):
+                    stats["errors"] += 1
+                    status = outcome.status_code if isinstance(outcome, HTTPException) else None
+                    detail = outcome.detail if isinstance(outcome, HTTPException) else str(outcome)
+                    yield {"url": url, "depth": depth, "error": detail, "status_code": status}
+                    continue
+
+                structure = outcome.pop("structure", None) or {}
+                digest = _content_hash(outcome)
+                if digest in hashes:
+                    stats["duplicates"] += 1
+                    yield {"url": url, "depth": depth, "duplicate_of": hashes[digest]}
+                    continue
+                hashes[digest] = url
+                stats["pages"] += 1
+                if structured:
+                    outcome["structure"] = structure
+                yield {**outcome, "depth": depth}
+
+                if depth >= plan.max_depth:
+                    continue
+                for link in follow(structure.get("links", [])):
+                    if scheduled >= plan.max_pages:
+                        stats["limit_skipped"] += 1
+                        continue
+                    scheduled += 1
+                    pending.add(asyncio.ensure_future(crawl_one(link, depth + 1)))
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def crawl(plan: CrawlPlan, **options: Any) -> List[Dict[str, Any]]:
+    """Run the crawl and return every item, in the order they were extracted."""
+    return [item async for item in iter_crawl(plan, **options)]
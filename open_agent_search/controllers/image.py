@@ -7,13 +7,18 @@ from typing import Any, Dict, List, Optional
 
 from ddgs import DDGS
 from ddgs.exceptions import DDGSException, RatelimitException, TimeoutException
-from fastapi import HTTPException
+from starlette.exceptions import HTTPException
 
 from ..models.schemas import ImageColor, ImageSize, SafeSearch, TimeLimit
+from ..utils.cache import cached_search
+from ..utils.circuit_breaker import CircuitOpenError, search_circuit
+from ..utils.clients import thread_client
+from ..utils.metrics import track_search
 
 logger = logging.getLogger(__name__)
 
 
+@cached_search("images")
 def search_images(
     query: str,
     region: str = "us-en",
@@ -52,23 +57,26 @@ def search_images(
     try:
         logger.info("Image search: query=%r, max_results=%d", query, max_results)
 
-        ddgs = DDGS(timeout=10)
-        results = ddgs.images(
-            query=query,
-            region=region,
-            safesearch=safesearch.value,
-            timelimit=timelimit.value if timelimit else None,
-            max_results=max_results,
-            page=page,
-            backend=backend,
-            size=size.value if size else None,
-            color=color.value if color else None,
-            type_image=type_image,
-            layout=layout,
-        )
+        ddgs = thread_client(DDGS, timeout=10)
+        with search_circuit("image", backend), track_search("image", backend):
+            results = ddgs.images(
+                query=query,
+                region=region,
+                safesearch=safesearch.value,
+                timelimit=timelimit.value if timelimit else None,
+                max_results=max_results,
+                page=page,
+                backend=backend,
+                size=size.value if size else None,
+                color=color.value if color else None,
+                type_image=type_image,
+                layout=layout,
+            )
 
         return results
 
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=e.headers)
     except RatelimitException:
         raise HTTPException(status_code=429, detail="Rate limit exceeded")
     except TimeoutException:
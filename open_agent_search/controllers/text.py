@@ -7,13 +7,19 @@ from typing import Any, Dict, List, Optional
 
 from ddgs import DDGS
 from ddgs.exceptions import DDGSException, RatelimitException, TimeoutException
-from fastapi import HTTPException
+from starlette.exceptions import HTTPException
 
 from ..models.schemas import SafeSearch, TimeLimit
+from ..utils.cache import cached_search
+from ..utils.circuit_breaker import CircuitOpenError, search_circuit
+from ..utils.clients import thread_client
+from ..utils.local_index import index_results
+from ..utils.metrics import track_search
 
 logger = logging.getLogger(__name__)
 
 
+@cached_search("text", similar="query")
 def search_text(
     query: str,
     region: str = "us-en",
@@ -44,19 +50,23 @@ def search_text(
     try:
         logger.info("Text search: query=%r, max_results=%d", query, max_results)
 
-        ddgs = DDGS(timeout=10)
-        results = ddgs.text(
-            query=query,
-            region=region,
-            safesearch=safesearch.value,
-            timelimit=timelimit.value if timelimit else None,
-            max_results=max_results,
-            page=page,
-            backend=backend,
-        )
+        ddgs = thread_client(DDGS, timeout=10)
+        with search_circuit("text", backend), track_search("text", backend):
+            results = ddgs.text(
+                query=query,
+                region=region,
+                safesearch=safesearch.value,
+                timelimit=timelimit.value if timelimit else None,
+                max_results=max_results,
+                page=page,
+                backend=backend,
+            )
 
+        index_results(results)
         return results
 
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=e.headers)
     except RatelimitException:
         raise HTTPException(status_code=429, detail="Rate limit exceeded. Please try again later.")
     except TimeoutException:
@@ -4,9 +4,11 @@ Unified Search Controller - searches all sources at once in parallel
 
 import asyncio
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from ..models.schemas import SafeSearch, TimeLimit
+from ..utils import run_in_threadpool
+from ..utils.projection import project
 from .book import search_books
 from .image import search_images
 from .news import search_news
@@ -23,6 +25,7 @@ async def search_all(
     timelimit: Optional[TimeLimit] = None,
     max_results_per_type: int = 5,
     backend: str = "auto",
+    fields: Optional[List[str]] = None,
 ) -> Dict[str, Any]:
     """
     Search all sources (text, images, videos, news, books) at once in parallel.
@@ -34,6 +37,7 @@ async def search_all(
         timelimit: Time limit for results
         max_results_per_type: Maximum number of results per search type
         backend: Search backend
+        fields: Result fields to keep in every list (default: all fields)
 
     Returns:
         Dictionary containing results from all search types
@@ -44,22 +48,17 @@ async def search_all(
         max_results_per_type,
     )
 
-    # Create a thread pool executor for running blocking I/O operations
-    loop = asyncio.get_running_loop()
-
     # Define async wrapper functions for each search
     async def get_text_results():
         try:
-            return await loop.run_in_executor(
-                None,
-                lambda: search_text(
-                    query=query,
-                    region=region,
-                    safesearch=safesearch,
-                    timelimit=timelimit,
-                    max_results=max_results_per_type,
-                    backend=backend,
-                ),
+            return await run_in_threadpool(
+                search_text,
+                query=query,
+                region=region,
+                safesearch=safesearch,
+                timelimit=timelimit,
+                max_results=max_results_per_type,
+                backend=backend,
             )
         except Exception as e:
             logger.warning(f"Text search failed: {str(e)}")
@@ -67,16 +66,14 @@ async def search_all(
 
     async def get_image_results():
         try:
-            return await loop.run_in_executor(
-                None,
-                lambda: search_images(
-                    query=query,
-                    region=region,
-                    safesearch=safesearch,
-                    timelimit=timelimit,
-                    max_results=max_results_per_type,
-                    backend=backend,
-                ),
+            return await run_in_threadpool(
+                search_images,
+                query=query,
+                region=region,
+                safesearch=safesearch,
+                timelimit=timelimit,
+                max_results=max_results_per_type,
+                backend=backend,
             )
         except Exception as e:
             logger.warning(f"Image search failed: {str(e)}")
@@ -84,16 +81,14 @@ async def search_all(
 
     async def get_video_results():
         try:
-            return await loop.run_in_executor(
-                None,
-                lambda: search_videos(
-                    query=query,
-                    region=region,
-                    safesearch=safesearch,
-                    timelimit=timelimit,
-                    max_results=max_results_per_type,
-                    backend=backend,
-                ),
+            return await run_in_threadpool(
+                search_videos,
+                query=query,
+                region=region,
+                safesearch=safesearch,
+                timelimit=timelimit,
+                max_results=max_results_per_type,
+                backend=backend,
             )
         except Exception as e:
             logger.warning(f"Video search failed: {str(e)}")
@@ -101,16 +96,14 @@ async def search_all(
 
     async def get_news_results():
         try:
-            return await loop.run_in_executor(
-                None,
-                lambda: search_news(
-                    query=query,
-                    region=region,
-                    safesearch=safesearch,
-                    timelimit=timelimit,
-                    max_results=max_results_per_type,
-                    backend=backend,
-                ),
+            return await run_in_threadpool(
+                search_news,
+                query=query,
+                region=region,
+                safesearch=safesearch,
+                timelimit=timelimit,
+                max_results=max_results_per_type,
+                backend=backend,
             )
         except Exception as e:
             logger.warning(f"News search failed: {str(e)}")
@@ -118,11 +111,8 @@ async def search_all(
 
     async def get_book_results():
         try:
-            return await loop.run_in_executor(
-                None,
-                lambda: search_books(
-                    query=query, max_results=max_results_per_type, backend=backend
-                ),
+            return await run_in_threadpool(
+                search_books, query=query, max_results=max_results_per_type, backend=backend
             )
         except Exception as e:
             logger.warning(f"Book search failed: {str(e)}")
@@ -146,10 +136,10 @@ async def search_all(
     )
 
     return {
-        "text_results": text_results,
-        "image_results": image_results,
-        "video_results": video_results,
-        "news_results": news_results,
-        "book_results": book_results,
+        "text_results": project(text_results, fields),
+        "image_results": project(image_results, fields),
+        "video_results": project(video_results, fields),
+        "news_results": project(news_results, fields),
+        "book_results": project(book_results, fields),
         "total_results": total_results,
     }
@@ -7,13 +7,18 @@ from typing import Any, Dict, List, Optional
 
 from ddgs import DDGS
 from ddgs.exceptions import DDGSException, RatelimitException, TimeoutException
-from fastapi import HTTPException
+from starlette.exceptions import HTTPException
 
 from ..models.schemas import SafeSearch, TimeLimit, VideoDuration, VideoResolution
+from ..utils.cache import cached_search
+from ..utils.circuit_breaker import CircuitOpenError, search_circuit
+from ..utils.clients import thread_client
+from ..utils.metrics import track_search
 
 logger = logging.getLogger(__name__)
 
 
+@cached_search("videos")
 def search_videos(
     query: str,
     region: str = "us-en",
@@ -50,22 +55,25 @@ def search_videos(
     try:
         logger.info("Video search: query=%r, max_results=%d", query, max_results)
 
-        ddgs = DDGS(timeout=10)
-        results = ddgs.videos(
-            query=query,
-            region=region,
-            safesearch=safesearch.value,
-            timelimit=timelimit.value if timelimit else None,
-            max_results=max_results,
-            page=page,
-            backend=backend,
-            resolution=resolution.value if resolution else None,
-            duration=duration.value if duration else None,
-            license_videos=license_videos,
-        )
+        ddgs = thread_client(DDGS, timeout=10)
+        with search_circuit("video", backend), track_search("video", backend):
+            results = ddgs.videos(
+                query=query,
+                region=region,
+                safesearch=safesearch.value,
+                timelimit=timelimit.value if timelimit else None,
+                max_results=max_results,
+                page=page,
+                backend=backend,
+                resolution=resolution.value if resolution else None,
+                duration=duration.value if duration else None,
+                license_videos=license_videos,
+            )
 
         return results
 
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=e.headers)
     except RatelimitException:
         raise HTTPException(status_code=429, detail="Rate limit exceeded")
     except TimeoutException:
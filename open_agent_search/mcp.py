@@ -1,17 +1,21 @@
-"""MCP Server for Open Agent Search — provides LLM-friendly search tools via FastMCP."""
+"""
+MCP Server for Open Agent Search — provides LLM-friendly search tools via FastMCP.
+
+Controllers (and with them ddgs, bs4 and primp) are imported inside each tool
+so that ``oas-mcp`` answers ``initialize`` and ``tools/list`` without paying
+for them; FastAPI is never imported by the stdio server.
+
+Search results carry no cache status, so the search tools run in a
+``cache_scope(fresh_only=True)``: an expired entry is refreshed rather than
+served stale, as the HTTP routes do when they can say so in ``Cache-Status``.
+"""
 
 from typing import Any, Dict, List, Optional
 
 from fastmcp import FastMCP
 
-from .controllers.book import search_books as controller_search_books
-from .controllers.content import fetch_multiple_urls, fetch_url_content
-from .controllers.image import search_images as controller_search_images
-from .controllers.news import search_news as controller_search_news
-from .controllers.text import search_text as controller_search_text
-from .controllers.unified import search_all
-from .controllers.video import search_videos as controller_search_videos
 from .models.schemas import (
+    BatchSearchSpec,
     ImageColor,
     ImageSize,
     SafeSearch,
@@ -30,6 +34,7 @@ def search_web(
     region: str = "us-en",
     max_results: int = 10,
     safesearch: str = "moderate",
+    fields: Optional[List[str]] = None,
 ) -> List[Dict[str, Any]]:
     """
     Search the web for text content.
@@ -39,18 +44,27 @@ def search_web(
         region: Region code like 'us-en', 'uk-en', 'in-en' (default: 'us-en')
         max_results: Maximum number of results, 1-100 (default: 10)
         safesearch: Safe search level: 'on', 'moderate', 'off' (default: 'moderate')
+        fields: Result keys to keep, e.g. ['title', 'href', 'body'] (default: all)
 
     Returns:
         List of search results with title, body, and url
     """
-    return controller_search_text(
-        query=query,
-        region=region,
-        safesearch=SafeSearch(safesearch),
-        max_results=min(max_results, 100),
-        page=1,
-        backend="auto",
-    )
+    from .controllers.text import search_text as controller_search_text
+    from .utils.cache import cache_scope
+    from .utils.local_index import mix_local_results
+    from .utils.projection import parse_fields, project
+
+    with cache_scope(fresh_only=True):
+        results = controller_search_text(
+            query=query,
+            region=region,
+            safesearch=SafeSearch(safesearch),
+            max_results=min(max_results, 100),
+            page=1,
+            backend="auto",
+        )
+    results = mix_local_results(query, results, min(max_results, 100))
+    return project(results, parse_fields(fields))
 
 
 @mcp.tool()
@@ -61,6 +75,7 @@ def search_images(
     safesearch: str = "moderate",
     size: Optional[str] = None,
     color: Optional[str] = None,
+    fields: Optional[List[str]] = None,
 ) -> List[Dict[str, Any]]:
     """
     Search for images.
@@ -73,19 +88,26 @@ def search_images(
         size: Image size filter: 'small', 'medium', 'large', 'wallpaper'
         color: Color filter: 'color', 'monochrome', 'red', 'orange', 'yellow',
             'green', 'blue', 'purple', 'pink', 'brown', 'black', 'gray', 'teal', 'white'
+        fields: Result keys to keep, e.g. ['title', 'image', 'url'] (default: all)
 
     Returns:
         List of images with title, image url, thumbnail, source, and more
     """
-    return controller_search_images(
-        query=query,
-        region=region,
-        safesearch=SafeSearch(safesearch),
-        max_results=min(max_results, 100),
-        size=ImageSize(size) if size else None,
-        color=ImageColor(color) if color else None,
-        page=1,
-    )
+    from .controllers.image import search_images as controller_search_images
+    from .utils.cache import cache_scope
+    from .utils.projection import parse_fields, project
+
+    with cache_scope(fresh_only=True):
+        results = controller_search_images(
+            query=query,
+            region=region,
+            safesearch=SafeSearch(safesearch),
+            max_results=min(max_results, 100),
+            size=ImageSize(size) if size else None,
+            color=ImageColor(color) if color else None,
+            page=1,
+        )
+    return project(results, parse_fields(fields))
 
 
 @mcp.tool()
@@ -96,6 +118,7 @@ def search_videos(
     safesearch: str = "moderate",
     resolution: Optional[str] = None,
     duration: Optional[str] = None,
+    fields: Optional[List[str]] = None,
 ) -> List[Dict[str, Any]]:
     """
     Search for videos.
@@ -107,19 +130,26 @@ def search_videos(
         safesearch: Safe search: 'on', 'moderate', 'off' (default: 'moderate')
         resolution: Video resolution: 'high', 'standard'
         duration: Video duration: 'short', 'medium', 'long'
+        fields: Result keys to keep, e.g. ['title', 'content', 'duration'] (default: all)
 
     Returns:
         List of videos with title, description, url, duration, and more
     """
-    return controller_search_videos(
-        query=query,
-        region=region,
-        safesearch=SafeSearch(safesearch),
-        max_results=min(max_results, 100),
-        resolution=VideoResolution(resolution) if resolution else None,
-        duration=VideoDuration(duration) if duration else None,
-        page=1,
-    )
+    from .controllers.video import search_videos as controller_search_videos
+    from .utils.cache import cache_scope
+    from .utils.projection import parse_fields, project
+
+    with cache_scope(fresh_only=True):
+        results = controller_search_videos(
+            query=query,
+            region=region,
+            safesearch=SafeSearch(safesearch),
+            max_results=min(max_results, 100),
+            resolution=VideoResolution(resolution) if resolution else None,
+            duration=VideoDuration(duration) if duration else None,
+            page=1,
+        )
+    return project(results, parse_fields(fields))
 
 
 @mcp.tool()
@@ -129,6 +159,7 @@ def search_news(
     max_results: int = 10,
     safesearch: str = "moderate",
     timelimit: Optional[str] = None,
+    fields: Optional[List[str]] = None,
 ) -> List[Dict[str, Any]]:
     """
     Search for news articles.
@@ -139,35 +170,51 @@ def search_news(
         max_results: Maximum results, 1-100 (default: 10)
         safesearch: Safe search: 'on', 'moderate', 'off' (default: 'moderate')
         timelimit: Time limit: 'd' (day), 'w' (week), 'm' (month)
+        fields: Result keys to keep, e.g. ['title', 'url', 'date'] (default: all)
 
     Returns:
         List of news articles with title, body, url, date, and source
     """
-    return controller_search_news(
-        query=query,
-        region=region,
-        safesearch=SafeSearch(safesearch),
-        timelimit=TimeLimit(timelimit) if timelimit else None,
-        max_results=min(max_results, 100),
-        page=1,
-    )
+    from .controllers.news import search_news as controller_search_news
+    from .utils.cache import cache_scope
+    from .utils.projection import parse_fields, project
+
+    with cache_scope(fresh_only=True):
+        results = controller_search_news(
+            query=query,
+            region=region,
+            safesearch=SafeSearch(safesearch),
+            timelimit=TimeLimit(timelimit) if timelimit else None,
+            max_results=min(max_results, 100),
+            page=1,
+        )
+    return project(results, parse_fields(fields))
 
 
 @mcp.tool()
-def search_books(query: str, max_results: int = 10) -> List[Dict[str, Any]]:
+def search_books(
+    query: str, max_results: int = 10, fields: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
     """
     Search for books.
 
     Args:
         query: Book search query (required)
         max_results: Maximum results, 1-100 (default: 10)
+        fields: Result keys to keep, e.g. ['title', 'author', 'url'] (default: all)
 
     Returns:
         List of books with title, authors, and links
     """
-    return controller_search_books(
-        query=query, max_results=min(max_results, 100), page=1, backend="auto"
-    )
+    from .controllers.book import search_books as controller_search_books
+    from .utils.cache import cache_scope
+    from .utils.projection import parse_fields, project
+
+    with cache_scope(fresh_only=True):
+        results = controller_search_books(
+            query=query, max_results=min(max_results, 100), page=1, backend="auto"
+        )
+    return project(results, parse_fields(fields))
 
 
 @mcp.tool()
@@ -176,6 +223,7 @@ async def search_everything(
     region: str = "us-en",
     max_results_per_type: int = 5,
     safesearch: str = "moderate",
+    fields: Optional[List[str]] = None,
 ) -> Dict[str, Any]:
     """
     Search all sources at once (text, images, videos, news, books).
@@ -185,41 +233,118 @@ async def search_everything(
         region: Region code (default: 'us-en')
         max_results_per_type: Results per category, 1-20 (default: 5)
         safesearch: Safe search: 'on', 'moderate', 'off' (default: 'moderate')
+        fields: Result keys to keep in every category (default: all)
 
     Returns:
         Dictionary with results from all search types
     """
-    return await search_all(
-        query=query,
-        region=region,
-        safesearch=SafeSearch(safesearch),
-        max_results_per_type=min(max_results_per_type, 20),
-    )
+    from .controllers.unified import search_all
+    from .utils.cache import cache_scope
+    from .utils.projection import parse_fields
+
+    with cache_scope(fresh_only=True):
+        return await search_all(
+            query=query,
+            region=region,
+            safesearch=SafeSearch(safesearch),
+            max_results_per_type=min(max_results_per_type, 20),
+            fields=parse_fields(fields),
+        )
+
+
+@mcp.tool()
+async def search_batch(searches: List[BatchSearchSpec], concurrency: int = 4) -> Dict[str, Any]:
+    """
+    Run many searches in one call, e.g. all queries of a research plan.
+
+    Args:
+        searches: List of search specs (required). Each has 'query' and optional
+            'type' ('text', 'images', 'videos', 'news', 'books'; default 'text'),
+            'region', 'safesearch', 'timelimit', 'max_results', 'page', and the
+            image ('size', 'color') or video ('resolution', 'duration') filters,
+            and 'fields' (result keys to keep)
+        concurrency: Searches run in parallel, 1-8 (default: 4)
+
+    Returns:
+        Results keyed by the index of each spec, plus the batch cost. Identical
+        specs run once; each unique spec costs one unit per 10 results and
+        batches above the cost limit are rejected.
+    """
+    from .config import batch_config
+    from .controllers.batch import plan_batch
+    from .controllers.batch import search_batch as controller_search_batch
+    from .utils.cache import cache_scope
+
+    plan = plan_batch(searches[: batch_config.MAX_SPECS], batch_config.MAX_COST)
+    with cache_scope(fresh_only=True):
+        results = await controller_search_batch(
+            plan, min(max(concurrency, 1), batch_config.MAX_CONCURRENCY)
+        )
+    return {
+        "results": results,
+        "count": plan.count,
+        "unique_searches": len(plan.groups),
+        "cost": plan.cost,
+    }
 
 
 @mcp.tool()
-async def fetch_content(url: str, timeout: int = 10, max_length: int = 2000) -> Dict[str, Any]:
+async def fetch_content(
+    url: str,
+    timeout: int = 10,
+    max_length: Optional[int] = None,
+    timings: bool = False,
+    max_tokens: Optional[int] = None,
+    query: Optional[str] = None,
+    structured: bool = False,
+    format: str = "text",
+) -> Dict[str, Any]:
     """
     Fetch and extract content from a URL with intelligent trimming (non-blocking).
 
     Args:
         url: URL to fetch content from (required)
         timeout: Request timeout in seconds, 5-30 (default: 10)
-        max_length: Maximum content length in characters, 100-20000 (default: 2000)
+        max_length: Maximum content length in characters, 100-20000 (default: 2000,
+            or 20000 with max_tokens)
+        timings: Include per-phase timings in milliseconds (default: False)
+        max_tokens: Trim the content to about this many tokens, 50-20000
+        query: Return the passages that best match this question or topic instead
+            of the beginning of the page
+        structured: Also return the page's heading tree, links with anchor text,
+            tables as rows and code blocks, to avoid fetching it again (default: False)
+        format: 'text' for plain text or 'markdown' to keep headings, lists, links,
+            code blocks and tables (default: 'text')
 
     Returns:
         Extracted content with title, description, and intelligently trimmed text
     """
+    from .controllers.content import fetch_url_content
+
+    if format not in ("text", "markdown"):
+        raise ValueError("format must be 'text' or 'markdown'")
     return await fetch_url_content(
         url=url,
         timeout=min(max(timeout, 5), 30),
-        max_length=min(max(max_length, 100), 20000),
+        max_length=min(max(max_length, 100), 20000) if max_length else None,
+        include_timings=timings,
+        max_tokens=min(max(max_tokens, 50), 20000) if max_tokens else None,
+        query=query,
+        structured=structured,
+        format=format,
     )
 
 
 @mcp.tool()
 async def fetch_multiple_contents(
-    urls: List[str], timeout: int = 10, max_length: int = 2000
+    urls: List[str],
+    timeout: int = 10,
+    max_length: Optional[int] = None,
+    timings: bool = False,
+    max_tokens: Optional[int] = None,
+    query: Optional[str] = None,
+    structured: bool = False,
+    format: str = "text",
 ) -> Dict[str, Any]:
     """
     Fetch and extract content from multiple URLs in parallel (max 10, non-blocking).
@@ -227,19 +352,122 @@ async def fetch_multiple_contents(
     Args:
         urls: List of URLs to fetch (required, max 10)
         timeout: Request timeout in seconds, 5-30 (default: 10)
-        max_length: Maximum content length per URL, 100-20000 (default: 2000)
+        max_length: Maximum content length per URL, 100-20000 (default: 2000,
+            or 20000 with max_tokens)
+        timings: Include per-phase timings in milliseconds per URL (default: False)
+        max_tokens: Token budget shared by all pages, 50-50000
+        query: Return each page's passages that best match this question or topic,
+            and give matching pages more of the token budget
+        structured: Also return each page's heading tree, links, tables and code
+            blocks (default: False)
+        format: 'text' for plain text or 'markdown' to keep headings, lists, links,
+            code blocks and tables (default: 'text')
 
     Returns:
         Dictionary with list of extracted content from each URL
     """
+    from .controllers.content import fetch_multiple_urls
+
+    if format not in ("text", "markdown"):
+        raise ValueError("format must be 'text' or 'markdown'")
     results = await fetch_multiple_urls(
         urls=urls[:10],
         timeout=min(max(timeout, 5), 30),
-        max_length=min(max(max_length, 100), 20000),
+        max_length=min(max(max_length, 100), 20000) if max_length else None,
+        include_timings=timings,
+        max_tokens=min(max(max_tokens, 50), 50000) if max_tokens else None,
+        query=query,
+        structured=structured,
+        format=format,
     )
     return {"results": results, "count": len(results)}
 
 
+@mcp.tool()
+async def crawl_site(
+    url: str,
+    max_depth: int = 1,
+    max_pages: int = 10,
+    scope: str = "prefix",
+    concurrency: int = 2,
+    max_length: Optional[int] = None,
+    format: str = "text",
+) -> Dict[str, Any]:
+    """
+    Fetch a whole site section, e.g. a documentation chapter, by following links
+    from a seed URL instead of fetching its pages one by one. Obeys robots.txt.
+
+    Args:
+        url: Seed URL to start from (required)
+        max_depth: Links to follow away from the seed, 0-3 (default: 1)
+        max_pages: Maximum pages to fetch, 1-50 (default: 10)
+        scope: 'prefix' for pages under the seed's directory or 'host' for the whole
+            host (default: 'prefix')
+        concurrency: Pages fetched at once, 1-4 (default: 2)
+        max_length: Maximum content length per page, 100-20000 (default: 2000)
+        format: 'text' for plain text or 'markdown' to keep headings, lists, links,
+            code blocks and tables (default: 'text')
+
+    Returns:
+        Pages with title, content, url and link depth, plus crawl stats. Pages with
+        the same content as an earlier one are listed with 'duplicate_of' instead.
+    """
+    from .config import crawl_config
+    from .controllers.crawl import crawl, plan_crawl
+
+    if scope not in ("prefix", "host"):
+        raise ValueError("scope must be 'prefix' or 'host'")
+    if format not in ("text", "markdown"):
+        raise ValueError("format must be 'text' or 'markdown'")
+    plan = await plan_crawl(
+        url,
+        max_depth=min(max(max_depth, 0), crawl_config.MAX_DEPTH),
+        max_pages=min(max(max_pages, 1), crawl_config.MAX_PAGES),
+        scope=scope,
+        concurrency=min(max(concurrency, 1), crawl_config.MAX_CONCURRENCY),
+        timeout=10,
+    )
+    results = await crawl(
+        plan,
+        max_length=min(max(max_length, 100), 20000) if max_length else None,
+        format=format,
+    )
+    return {"seed": plan.seed, "results": results, "count": len(results), "stats": plan.stats}
+
+
+@mcp.tool()
+def search_local(
+    query: str,
+    max_results: int = 10,
+    kind: Optional[str] = None,
+    max_age: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Search pages fetched earlier and search result snippets seen earlier,
+    instantly and without calling any search engine. Needs LOCAL_INDEX_ENABLED.
+
+    Args:
+        query: Search query (required)
+        max_results: Maximum results, 1-100 (default: 10)
+        kind: 'page' for fetched pages or 'snippet' for search result snippets (default: both)
+        max_age: Only documents indexed at most this many seconds ago
+
+    Returns:
+        List of results with title, href, best-matching passage as body, score and age
+    """
+    from .utils.local_index import get_local_index
+    from .utils.local_index import search_local as index_search
+
+    index = get_local_index()
+    if index is None:
+        raise ValueError("Local index is disabled (set LOCAL_INDEX_ENABLED=true)")
+    if kind not in (None, "page", "snippet"):
+        raise ValueError("kind must be 'page' or 'snippet'")
+    return index_search(
+        index, query, max_results=min(max(max_results, 1), 100), kind=kind, max_age=max_age
+    )
+
+
 def main():
     """CLI entry point: run the MCP server over stdio (for Claude Desktop / Cursor)."""
     mcp.run(transport="stdio")
@@ -5,7 +5,7 @@ Pydantic models and enums for DDGS API
 from enum import Enum
 from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 # Enums for validation
@@ -52,12 +52,42 @@ class VideoDuration(str, Enum):
     long = "long"
 
 
+class SearchType(str, Enum):
+    text = "text"
+    images = "images"
+    videos = "videos"
+    news = "news"
+    books = "books"
+
+
+# Request Models
+class BatchSearchSpec(BaseModel):
+    """One search in a batch; type-specific filters are ignored by other types."""
+
+    type: SearchType = SearchType.text
+    query: str = Field(..., min_length=1)
+    region: str = "us-en"
+    safesearch: SafeSearch = SafeSearch.moderate
+    timelimit: Optional[TimeLimit] = None
+    max_results: int = Field(10, ge=1, le=100)
+    page: int = Field(1, ge=1)
+    backend: str = "auto"
+    size: Optional[ImageSize] = None
+    color: Optional[ImageColor] = None
+    resolution: Optional[VideoResolution] = None
+    duration: Optional[VideoDuration] = None
+    fields: Optional[List[str]] = None
+
+
 # Response Models
 class SearchResponse(BaseModel):
     success: bool = True
     query: str
     results_count: int
     results: List[Dict[str, Any]]
+    timings: Optional[Dict[str, float]] = None
+    # Set when the results were cached for a near-duplicate query: {"query", "similarity"}
+    approximate: Optional[Dict[str, Any]] = None
 
 
 class UnifiedSearchResponse(BaseModel):
@@ -69,9 +99,30 @@ class UnifiedSearchResponse(BaseModel):
     news_results: List[Dict[str, Any]]
     book_results: List[Dict[str, Any]]
     total_results: int
+    timings: Optional[Dict[str, float]] = None
 
 
 class ErrorResponse(BaseModel):
     success: bool = False
     error: str
     details: Optional[str] = None
+
+
+class BatchSearchItem(BaseModel):
+    index: int
+    type: SearchType
+    query: str
+    success: bool
+    results_count: int = 0
+    results: List[Dict[str, Any]] = []
+    error: Optional[str] = None
+    status_code: Optional[int] = None
+
+
+class BatchSearchResponse(BaseModel):
+    success: bool = True
+    count: int
+    unique_searches: int
+    cost: int
+    results: List[BatchSearchItem]
+    timings: Optional[Dict[str, float]] = None
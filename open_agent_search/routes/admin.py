@@ -0,0 +1,86 @@
+"""
+Admin Routes (sampling profiler)
+
+Every route requires the ADMIN_TOKEN from the environment, passed as
+``Authorization: Bearer <token>`` or ``X-Admin-Token``. When no token is
+configured the routes answer 404 as if they did not exist.
+"""
+
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from ..config import profiling_config
+from ..utils.profiler import RequestSampling, StackSampler, profile_for
+
+router = APIRouter(prefix="/admin", tags=["Admin"], include_in_schema=False)
+
+# Shared sampler kept running while sampled requests are in flight
+request_sampling = RequestSampling(
+    StackSampler(interval=profiling_config.INTERVAL_MS / 1000),
+    rate=profiling_config.SAMPLE_RATE,
+)
+
+_on_demand_busy = False
+
+
+def require_admin(
+    authorization: Optional[str] = Header(None),
+    x_admin_token: Optional[str] = Header(None),
+) -> None:
+    """Reject the request unless it carries the configured admin token."""
+    expected = profiling_config.ADMIN_TOKEN
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    supplied = x_admin_token or ""
+    if authorization and authorization.lower().startswith("bearer "):
+        supplied = authorization[7:].strip()
+    if not secrets.compare_digest(supplied.encode(), expected.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+def _collapsed_response(sampler: StackSampler) -> PlainTextResponse:
+    return PlainTextResponse(
+        sampler.collapsed(), headers={"X-Profile-Samples": str(sampler.samples)}
+    )
+
+
+@router.get("/profile", dependencies=[Depends(require_admin)])
+async def profile_route(
+    seconds: float = Query(5, gt=0, le=profiling_config.MAX_SECONDS, description="Duration"),
+    interval_ms: float = Query(
+        profiling_config.INTERVAL_MS, ge=1, le=1000, description="Sampling interval"
+    ),
+    idle: bool = Query(False, description="Keep samples of parked/idle threads"),
+):
+    """
+    Profile the whole process for N seconds
+
+    Samples every thread (event loop and executor workers) and returns
+    collapsed stacks, ready for flamegraph.pl, speedscope or inferno.
+    """
+    global _on_demand_busy
+    if _on_demand_busy:
+        raise HTTPException(status_code=409, detail="A profile is already being captured")
+    _on_demand_busy = True
+    try:
+        sampler = await profile_for(seconds, interval=interval_ms / 1000, include_idle=idle)
+    finally:
+        _on_demand_busy = False
+    return _collapsed_response(sampler)
+
+
+@router.get("/profile/sampled", dependencies=[Depends(require_admin)])
+async def sampled_profile_route(
+    reset: bool = Query(False, description="Clear the accumulated samples after reading"),
+):
+    """
+    Collapsed stacks accumulated from sampled requests (PROFILE_SAMPLE_RATE)
+    """
+    sampler = request_sampling.sampler
+    response = _collapsed_response(sampler)
+    if reset:
+        sampler.reset()
+    return response
@@ -0,0 +1,75 @@
+"""
+Batch Search Routes - many searches in one request
+"""
+
+from typing import List
+
+from fastapi import APIRouter, Body, Request, Response
+from fastapi.responses import StreamingResponse
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+
+from ..config import batch_config, rate_limit_config, serverless_config
+from ..controllers.batch import iter_batch, plan_batch, search_batch
+from ..models.schemas import BatchSearchResponse, BatchSearchSpec
+from ..utils.serialization import dumps, model_payload, render
+from ..utils.timing import timings_payload
+
+router = APIRouter(prefix="/api/search", tags=["Batch Search"])
+
+# Initialize limiter for this router
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=serverless_config.rate_limit_storage(),
+)
+
+
+@router.post("/batch", response_model=BatchSearchResponse)
+@limiter.limit(rate_limit_config.BATCH_SEARCH_LIMIT)
+async def batch_search_route(
+    request: Request,
+    response: Response,
+    searches: List[BatchSearchSpec] = Body(
+        ...,
+        min_length=1,
+        max_length=batch_config.MAX_SPECS,
+        description="Search specs; each has a type (text, images, videos, news, books) and query",
+    ),
+    concurrency: int = Body(
+        4, ge=1, le=batch_config.MAX_CONCURRENCY, description="Searches run in parallel"
+    ),
+    stream: bool = Body(False, description="Stream results as NDJSON lines in completion order"),
+    timings: bool = Body(False, description="Include per-phase timings (ms) in the response"),
+):
+    """
+    Batch Search Endpoint
+
+    Run many searches, of mixed types, in one call. Identical specs run once.
+    Each unique uncached spec costs one unit per 10 requested results and the
+    batch is rejected (400) above BATCH_MAX_COST. Results are keyed by the
+    index of their spec in the request.
+    """
+    plan = plan_batch(searches, batch_config.MAX_COST)
+    headers = {"X-Batch-Cost": str(plan.cost), "X-Batch-Unique": str(len(plan.groups))}
+
+    if stream:
+
+        async def lines():
+            async for item in iter_batch(plan, concurrency):
+                yield dumps(item) + b"\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson", headers=headers)
+
+    results = await search_batch(plan, concurrency)
+    return render(
+        request,
+        model_payload(
+            BatchSearchResponse,
+            count=plan.count,
+            unique_searches=len(plan.groups),
+            cost=plan.cost,
+            results=results,
+            timings=timings_payload(timings),
+        ),
+        headers=headers,
+    )
@@ -2,19 +2,27 @@
 Book Search Routes
 """
 
+from typing import Optional
+
 from fastapi import APIRouter, Query, Request, Response
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-from ..config import rate_limit_config
+from ..config import rate_limit_config, serverless_config
 from ..controllers.book import search_books
 from ..models.schemas import SearchResponse
 from ..utils import run_in_threadpool
+from ..utils.projection import parse_fields, project
+from ..utils.serialization import model_payload, render
+from ..utils.timing import timings_payload
 
 router = APIRouter(prefix="/api/search", tags=["Book Search"])
 
 # Initialize limiter for this router
-limiter = Limiter(key_func=get_remote_address)
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=serverless_config.rate_limit_storage(),
+)
 
 
 @router.get("/books", response_model=SearchResponse)
@@ -26,6 +34,10 @@ async def book_search_route(
     max_results: int = Query(10, ge=1, le=100, description="Maximum results"),
     page: int = Query(1, ge=1, description="Page number"),
     backend: str = Query("auto", description="Search backend"),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated result fields to return (default: all fields)"
+    ),
+    timings: bool = Query(False, description="Include per-phase timings (ms) in the response"),
 ):
     """
     Book Search Endpoint
@@ -38,4 +50,13 @@ async def book_search_route(
         search_books, query=q, max_results=max_results, page=page, backend=backend
     )
 
-    return SearchResponse(query=q, results_count=len(results), results=results)
+    return render(
+        request,
+        model_payload(
+            SearchResponse,
+            query=q,
+            results_count=len(results),
+            results=project(results, parse_fields(fields)),
+            timings=timings_payload(timings),
+        ),
+    )
@@ -2,19 +2,25 @@
 Content Fetching Routes
 """
 
-from typing import List
+from typing import List, Literal, Optional
 
 from fastapi import APIRouter, Body, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-from ..config import rate_limit_config
+from ..config import crawl_config, rate_limit_config, serverless_config
 from ..controllers.content import fetch_multiple_urls, fetch_url_content
+from ..controllers.crawl import crawl, iter_crawl, plan_crawl
+from ..utils.serialization import dumps, render
 
 router = APIRouter(prefix="/api/content", tags=["Content Fetching"])
 
 # Initialize limiter for this router
-limiter = Limiter(key_func=get_remote_address)
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=serverless_config.rate_limit_storage(),
+)
 
 
 @router.get("/fetch")
@@ -24,8 +30,24 @@ async def fetch_content_route(
     response: Response,
     url: str = Query(..., description="URL to fetch content from"),
     timeout: int = Query(10, ge=5, le=30, description="Request timeout in seconds"),
-    max_length: int = Query(
-        2000, ge=100, le=20000, description="Maximum content length (default: 2000)"
+    max_length: Optional[int] = Query(
+        None,
+        ge=100,
+        le=20000,
+        description="Maximum content length (default: 2000, or 20000 with max_tokens)",
+    ),
+    max_tokens: Optional[int] = Query(
+        None, ge=50, le=20000, description="Trim the content to about this many tokens"
+    ),
+    query: Optional[str] = Query(
+        None, description="Return the passages that best match this query instead of the head"
+    ),
+    timings: bool = Query(False, description="Include per-phase timings (ms) in the response"),
+    structured: bool = Query(
+        False, description="Also return the page's sections, links, tables and code blocks"
+    ),
+    format: Literal["text", "markdown"] = Query(
+        "text", description="Return the content as plain text or as Markdown"
     ),
 ):
     """
@@ -34,9 +56,22 @@ async def fetch_content_route(
     Extracts the main text content, title, and description from a webpage.
     Intelligently trims content at paragraph/sentence boundaries.
     Useful for getting article text, documentation, or any web content.
+    With a query, the passages that best match it (BM25) are returned
+    instead of the beginning of the page. With structured, the heading tree,
+    links, tables and code blocks are returned as well. With format=markdown,
+    headings, lists, links, code blocks and tables are kept as Markdown.
     """
-    result = await fetch_url_content(url=url, timeout=timeout, max_length=max_length)
-    return result
+    result = await fetch_url_content(
+        url=url,
+        timeout=timeout,
+        max_length=max_length,
+        include_timings=timings,
+        max_tokens=max_tokens,
+        query=query,
+        structured=structured,
+        format=format,
+    )
+    return render(request, result)
 
 
 @router.post("/fetch-multiple")
@@ -46,11 +81,26 @@ async def fetch_multiple_route(
     response: Response,
     urls: List[str] = Body(..., description="List of URLs to fetch (max 10)"),
     timeout: int = Body(10, ge=5, le=30, description="Request timeout in seconds"),
-    max_length: int = Body(
-        2000,
+    max_length: Optional[int] = Body(
+        None,
         ge=100,
         le=20000,
-        description="Maximum content length per URL (default: 2000)",
+        description="Maximum content length per URL (default: 2000, or 20000 with max_tokens)",
+    ),
+    max_tokens: Optional[int] = Body(
+        None, ge=50, le=50000, description="Token budget shared by all pages"
+    ),
+    query: Optional[str] = Body(
+        None,
+        description="Return each page's passages that best match this query, and give "
+        "matching pages more of the token budget",
+    ),
+    timings: bool = Body(False, description="Include per-phase timings (ms) per URL"),
+    structured: bool = Body(
+        False, description="Also return each page's sections, links, tables and code blocks"
+    ),
+    format: Literal["text", "markdown"] = Body(
+        "text", description="Return each page's content as plain text or as Markdown"
     ),
 ):
     """
@@ -59,6 +109,80 @@ async def fetch_multiple_route(
     Processes up to 10 URLs and returns their content.
     Intelligently trims content at paragraph/sentence boundaries.
     Failed URLs will include error information instead of content.
+    With a query, each page returns its best matching passages. With
+    max_tokens, one token budget is split across the pages, weighted by how
+    well each matches the query.
     """
-    results = await fetch_multiple_urls(urls=urls[:10], timeout=timeout, max_length=max_length)
-    return {"results": results, "count": len(results)}
+    results = await fetch_multiple_urls(
+        urls=urls[:10],
+        timeout=timeout,
+        max_length=max_length,
+        include_timings=timings,
+        max_tokens=max_tokens,
+        query=query,
+        structured=structured,
+        format=format,
+    )
+    return render(request, {"results": results, "count": len(results)})
+
+
+@router.post("/crawl")
+@limiter.limit(rate_limit_config.CRAWL_LIMIT)
+async def crawl_route(
+    request: Request,
+    response: Response,
+    url: str = Body(..., description="Seed URL to start crawling from"),
+    max_depth: int = Body(
+        1, ge=0, le=crawl_config.MAX_DEPTH, description="Links to follow away from the seed"
+    ),
+    max_pages: int = Body(
+        10, ge=1, le=crawl_config.MAX_PAGES, description="Maximum pages to fetch"
+    ),
+    scope: Literal["prefix", "host"] = Body(
+        "prefix",
+        description="Follow links under the seed's directory (prefix) or anywhere on its host",
+    ),
+    concurrency: int = Body(
+        2, ge=1, le=crawl_config.MAX_CONCURRENCY, description="Pages fetched at once"
+    ),
+    timeout: int = Body(10, ge=5, le=30, description="Request timeout per page in seconds"),
+    max_length: Optional[int] = Body(
+        None, ge=100, le=20000, description="Maximum content length per page (default: 2000)"
+    ),
+    structured: bool = Body(
+        False, description="Also return each page's sections, links, tables and code blocks"
+    ),
+    format: Literal["text", "markdown"] = Body(
+        "text", description="Return each page's content as plain text or as Markdown"
+    ),
+    stream: bool = Body(False, description="Stream pages as NDJSON lines as they are extracted"),
+):
+    """
+    Crawl a site section from a seed URL
+
+    Follows links from the seed on the same host (and, with the prefix scope,
+    under the seed's directory), obeying robots.txt. URLs are deduplicated
+    after normalization and pages by content hash. Returns 403 if robots.txt
+    disallows the seed and 503 if it cannot be fetched.
+    """
+    plan = await plan_crawl(url, max_depth, max_pages, scope, concurrency, timeout)
+    options = {
+        "timeout": timeout,
+        "max_length": max_length,
+        "structured": structured,
+        "format": format,
+    }
+
+    if stream:
+
+        async def lines():
+            async for item in iter_crawl(plan, **options):
+                yield dumps(item) + b"\n"
+            yield dumps({"done": True, "stats": plan.stats}) + b"\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    results = await crawl(plan, **options)
+    return render(
+        request, {"seed": plan.seed, "results": results, "count": len(results), "stats": plan.stats}
+    )
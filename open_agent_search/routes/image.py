@@ -8,7 +8,7 @@ from fastapi import APIRouter, Query, Request, Response
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-from ..config import rate_limit_config
+from ..config import rate_limit_config, serverless_config
 from ..controllers.image import search_images
 from ..models.schemas import (
     ImageColor,
@@ -18,11 +18,17 @@ from ..models.schemas import (
     TimeLimit,
 )
 from ..utils import run_in_threadpool
+from ..utils.projection import parse_fields, project
+from ..utils.serialization import model_payload, render
+from ..utils.timing import timings_payload
 
 router = APIRouter(prefix="/api/search", tags=["Image Search"])
 
 # Initialize limiter for this router
-limiter = Limiter(key_func=get_remote_address)
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=serverless_config.rate_limit_storage(),
+)
 
 
 @router.get("/images", response_model=SearchResponse)
@@ -43,6 +49,10 @@ async def image_search_route(
         None, description="Image type (photo, clipart, gif, transparent, line)"
     ),
     layout: Optional[str] = Query(None, description="Image layout (Square, Tall, Wide)"),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated result fields to return (default: all fields)"
+    ),
+    timings: bool = Query(False, description="Include per-phase timings (ms) in the response"),
 ):
     """
     Image Search Endpoint
@@ -66,4 +76,13 @@ async def image_search_route(
         layout=layout,
     )
 
-    return SearchResponse(query=q, results_count=len(results), results=results)
+    return render(
+        request,
+        model_payload(
+            SearchResponse,
+            query=q,
+            results_count=len(results),
+            results=project(results, parse_fields(fields)),
+            timings=timings_payload(timings),
+        ),
+    )
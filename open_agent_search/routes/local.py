@@ -0,0 +1,59 @@
+"""
+Local Index Search Routes
+"""
+
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Query, Request, Response
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+from starlette.exceptions import HTTPException
+
+from ..config import rate_limit_config, serverless_config
+from ..models.schemas import SearchResponse
+from ..utils import run_in_threadpool
+from ..utils.local_index import get_local_index, search_local
+from ..utils.serialization import model_payload, render
+
+router = APIRouter(prefix="/api/search", tags=["Local Search"])
+
+# Initialize limiter for this router
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=serverless_config.rate_limit_storage(),
+)
+
+
+@router.get("/local", response_model=SearchResponse)
+@limiter.limit(rate_limit_config.LOCAL_SEARCH_LIMIT)
+async def local_search_route(
+    request: Request,
+    response: Response,
+    q: str = Query(..., description="Search query", min_length=1),
+    max_results: int = Query(10, ge=1, le=100, description="Maximum number of results"),
+    kind: Optional[Literal["page", "snippet"]] = Query(
+        None, description="Only fetched pages or only search result snippets (default: both)"
+    ),
+    max_age: Optional[int] = Query(
+        None, ge=1, description="Only documents indexed at most this many seconds ago"
+    ),
+):
+    """
+    Local Index Search Endpoint
+
+    Search pages fetched through /api/content and text/news result snippets
+    seen earlier, without calling any upstream engine. Requires
+    LOCAL_INDEX_ENABLED=true.
+    """
+    index = get_local_index()
+    if index is None:
+        raise HTTPException(
+            status_code=404, detail="Local index is disabled (set LOCAL_INDEX_ENABLED=true)"
+        )
+    results = await run_in_threadpool(
+        search_local, index, q, max_results=max_results, kind=kind, max_age=max_age
+    )
+    return render(
+        request,
+        model_payload(SearchResponse, query=q, results_count=len(results), results=results),
+    )
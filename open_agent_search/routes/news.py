@@ -8,15 +8,22 @@ from fastapi import APIRouter, Query, Request, Response
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-from ..config import rate_limit_config
+from ..config import rate_limit_config, serverless_config
 from ..controllers.news import search_news
 from ..models.schemas import SafeSearch, SearchResponse, TimeLimit
 from ..utils import run_in_threadpool
+from ..utils.cache import approximate_match, cache_scope
+from ..utils.projection import parse_fields, project
+from ..utils.serialization import model_payload, render
+from ..utils.timing import timings_payload
 
 router = APIRouter(prefix="/api/search", tags=["News Search"])
 
 # Initialize limiter for this router
-limiter = Limiter(key_func=get_remote_address)
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=serverless_config.rate_limit_storage(),
+)
 
 
 @router.get("/news", response_model=SearchResponse)
@@ -31,6 +38,10 @@ async def news_search_route(
     max_results: int = Query(10, ge=1, le=100, description="Maximum results"),
     page: int = Query(1, ge=1, description="Page number"),
     backend: str = Query("auto", description="Search backend (auto, duckduckgo, yahoo)"),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated result fields to return (default: all fields)"
+    ),
+    timings: bool = Query(False, description="Include per-phase timings (ms) in the response"),
 ):
     """
     News Search Endpoint
@@ -39,15 +50,26 @@ async def news_search_route(
     Rate limit: 30 requests per minute per IP (production)
     """
     # Run blocking DDGS call in thread pool
-    results = await run_in_threadpool(
-        search_news,
-        query=q,
-        region=region,
-        safesearch=safesearch,
-        timelimit=timelimit,
-        max_results=max_results,
-        page=page,
-        backend=backend,
-    )
+    with cache_scope(approximate=True) as lookups:
+        results = await run_in_threadpool(
+            search_news,
+            query=q,
+            region=region,
+            safesearch=safesearch,
+            timelimit=timelimit,
+            max_results=max_results,
+            page=page,
+            backend=backend,
+        )
 
-    return SearchResponse(query=q, results_count=len(results), results=results)
+    return render(
+        request,
+        model_payload(
+            SearchResponse,
+            query=q,
+            results_count=len(results),
+            results=project(results, parse_fields(fields)),
+            timings=timings_payload(timings),
+            approximate=approximate_match(lookups),
+        ),
+    )
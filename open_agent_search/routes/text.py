@@ -8,15 +8,23 @@ from fastapi import APIRouter, Query, Request, Response
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-from ..config import rate_limit_config
+from ..config import rate_limit_config, serverless_config
 from ..controllers.text import search_text
 from ..models.schemas import SafeSearch, SearchResponse, TimeLimit
 from ..utils import run_in_threadpool
+from ..utils.cache import approximate_match, cache_scope
+from ..utils.local_index import mix_local_results
+from ..utils.projection import parse_fields, project
+from ..utils.serialization import model_payload, render
+from ..utils.timing import timings_payload
 
 router = APIRouter(prefix="/api/search", tags=["Text Search"])
 
 # Initialize limiter for this router
-limiter = Limiter(key_func=get_remote_address)
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=serverless_config.rate_limit_storage(),
+)
 
 
 @router.get("/text", response_model=SearchResponse)
@@ -31,6 +39,10 @@ async def text_search_route(
     max_results: int = Query(10, ge=1, le=100, description="Maximum number of results"),
     page: int = Query(1, ge=1, description="Page number"),
     backend: str = Query("auto", description="Search backend (auto, google, bing, brave, etc.)"),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated result fields to return (default: all fields)"
+    ),
+    timings: bool = Query(False, description="Include per-phase timings (ms) in the response"),
 ):
     """
     Text/Web Search Endpoint
@@ -39,15 +51,27 @@ async def text_search_route(
     Rate limit: 30 requests per minute per IP (production)
     """
     # Run blocking DDGS call in thread pool
-    results = await run_in_threadpool(
-        search_text,
-        query=q,
-        region=region,
-        safesearch=safesearch,
-        timelimit=timelimit,
-        max_results=max_results,
-        page=page,
-        backend=backend,
-    )
+    with cache_scope(approximate=True) as lookups:
+        results = await run_in_threadpool(
+            search_text,
+            query=q,
+            region=region,
+            safesearch=safesearch,
+            timelimit=timelimit,
+            max_results=max_results,
+            page=page,
+            backend=backend,
+        )
+    results = await run_in_threadpool(mix_local_results, q, results, max_results)
 
-    return SearchResponse(query=q, results_count=len(results), results=results)
+    return render(
+        request,
+        model_payload(
+            SearchResponse,
+            query=q,
+            results_count=len(results),
+            results=project(results, parse_fields(fields)),
+            timings=timings_payload(timings),
+            approximate=approximate_match(lookups),
+        ),
+    )
@@ -8,14 +8,20 @@ from fastapi import APIRouter, Query, Request, Response
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-from ..config import rate_limit_config
+from ..config import rate_limit_config, serverless_config
 from ..controllers.unified import search_all
 from ..models.schemas import SafeSearch, TimeLimit, UnifiedSearchResponse
+from ..utils.projection import parse_fields
+from ..utils.serialization import model_payload, render
+from ..utils.timing import timings_payload
 
 router = APIRouter(prefix="/api/search", tags=["Unified Search"])
 
 # Initialize limiter for this router
-limiter = Limiter(key_func=get_remote_address)
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=serverless_config.rate_limit_storage(),
+)
 
 
 @router.get("/all", response_model=UnifiedSearchResponse)
@@ -31,6 +37,10 @@ async def unified_search_route(
         5, ge=1, le=50, description="Maximum number of results per search type"
     ),
     backend: str = Query("auto", description="Search backend"),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated result fields to return (default: all fields)"
+    ),
+    timings: bool = Query(False, description="Include per-phase timings (ms) in the response"),
 ):
     """
     Unified Search Endpoint (Parallel)
@@ -48,14 +58,20 @@ async def unified_search_route(
         timelimit=timelimit,
         max_results_per_type=max_results_per_type,
         backend=backend,
+        fields=parse_fields(fields),
     )
 
-    return UnifiedSearchResponse(
-        query=q,
-        text_results=results["text_results"],
-        image_results=results["image_results"],
-        video_results=results["video_results"],
-        news_results=results["news_results"],
-        book_results=results["book_results"],
-        total_results=results["total_results"],
+    return render(
+        request,
+        model_payload(
+            UnifiedSearchResponse,
+            query=q,
+            text_results=results["text_results"],
+            image_results=results["image_results"],
+            video_results=results["video_results"],
+            news_results=results["news_results"],
+            book_results=results["book_results"],
+            total_results=results["total_results"],
+            timings=timings_payload(timings),
+        ),
     )
@@ -8,7 +8,7 @@ from fastapi import APIRouter, Query, Request, Response
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-from ..config import rate_limit_config
+from ..config import rate_limit_config, serverless_config
 from ..controllers.video import search_videos
 from ..models.schemas import (
     SafeSearch,
@@ -18,11 +18,17 @@ from ..models.schemas import (
     VideoResolution,
 )
 from ..utils import run_in_threadpool
+from ..utils.projection import parse_fields, project
+from ..utils.serialization import model_payload, render
+from ..utils.timing import timings_payload
 
 router = APIRouter(prefix="/api/search", tags=["Video Search"])
 
 # Initialize limiter for this router
-limiter = Limiter(key_func=get_remote_address)
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=serverless_config.rate_limit_storage(),
+)
 
 
 @router.get("/videos", response_model=SearchResponse)
@@ -46,6 +52,10 @@ async def video_search_route(
     license_videos: Optional[str] = Query(
         None, description="Video license (creativeCommon, youtube)"
     ),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated result fields to return (default: all fields)"
+    ),
+    timings: bool = Query(False, description="Include per-phase timings (ms) in the response"),
 ):
     """
     Video Search Endpoint
@@ -68,4 +78,13 @@ async def video_search_route(
         license_videos=license_videos,
     )
 
-    return SearchResponse(query=q, results_count=len(results), results=results)
+    return render(
+        request,
+        model_payload(
+            SearchResponse,
+            query=q,
+            results_count=len(results),
+            results=project(results, parse_fields(fields)),
+            timings=timings_payload(timings),
+        ),
+    )
@@ -0,0 +1,163 @@
+"""
+Router Registry and Serverless Loading
+
+``ROUTERS`` maps URL path prefixes to the route modules serving them. A
+long-running server includes every router when the app is imported. The
+serverless profile (``SERVERLESS=true``, on by default on Vercel) instead
+installs ``LazyLoadMiddleware``: each request imports and includes only the
+router it needs, and the MCP sub-app is built, and its lifespan started, on
+the first ``/ai`` request. A cold start for ``/health`` therefore never
+imports ddgs, bs4 or fastmcp.
+"""
+
+import asyncio
+import importlib
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from .utils.timing import current_timings
+
+logger = logging.getLogger(__name__)
+
+ROUTERS: Dict[str, str] = {
+    "/api/search/text": "open_agent_search.routes.text",
+    "/api/search/images": "open_agent_search.routes.image",
+    "/api/search/videos": "open_agent_search.routes.video",
+    "/api/search/news": "open_agent_search.routes.news",
+    "/api/search/books": "open_agent_search.routes.book",
+    "/api/search/all": "open_agent_search.routes.unified",
+    "/api/search/batch": "open_agent_search.routes.batch",
+    "/api/search/local": "open_agent_search.routes.local",
+    "/api/content/": "open_agent_search.routes.content",
+}
+
+# The OpenAPI schema describes every route, so it needs every router
+_SCHEMA_PATHS = ("/openapi.json",)
+
+MCP_MOUNT = "/ai"
+
+
+class RouterLoader:
+    """Imports route modules and includes their routers into the app once."""
+
+    def __init__(self, app: Any):
+        self.app = app
+        self.loaded: set = set()
+        self._lock = threading.Lock()
+
+    def load(self, module_name: str) -> None:
+        if module_name in self.loaded:
+            return
+        with self._lock:
+            if module_name in self.loaded:
+                return
+            start = time.perf_counter()
+            module = importlib.import_module(module_name)
+            self.app.include_router(module.router)
+            self.app.openapi_schema = None
+            self.loaded.add(module_name)
+            elapsed = time.perf_counter() - start
+
+        logger.info("Loaded %s in %.1f ms", module_name, elapsed * 1000)
+        timings = current_timings()
+        if timings is not None:
+            timings.add(f"load.{module_name.rsplit('.', 1)[-1]}", elapsed)
+
+    def load_all(self) -> None:
+        for module_name in dict.fromkeys(ROUTERS.values()):
+            self.load(module_name)
+
+    def load_for_path(self, path: str) -> None:
+        if path in _SCHEMA_PATHS:
+            self.load_all()
+            return
+        for prefix, module_name in ROUTERS.items():
+            if path.startswith(prefix):
+                self.load(module_name)
+
+
+class LazyMCP:
+    """
+    Builds and mounts the MCP sub-app on first use.
+
+    The sub-app's lifespan (the streamable HTTP session manager) runs in a
+    dedicated task so it is entered and exited from the same task, as anyio
+    requires, whether or not the host runs ASGI lifespan events.
+    """
+
+    def __init__(self, mount_path: str = MCP_MOUNT):
+        self.mount_path = mount_path
+        self._task: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def started(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def ensure_started(self, app: Any) -> None:
+        if self.started:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self.started:
+                return
+            start = time.perf_counter()
+            from .mcp import mcp
+
+            mcp_app = mcp.http_app(path="/mcp", stateless_http=True)
+            ready = asyncio.Event()
+            self._stop = asyncio.Event()
+            self._task = asyncio.create_task(self._run(mcp_app, ready))
+            ready_wait = asyncio.create_task(ready.wait())
+            await asyncio.wait({self._task, ready_wait}, return_when=asyncio.FIRST_COMPLETED)
+            if not ready.is_set():
+                ready_wait.cancel()
+                self._task.result()  # re-raise the lifespan failure
+            app.mount(self.mount_path, mcp_app)
+            elapsed = time.perf_counter() - start
+
+        logger.info("Started MCP sub-app in %.1f ms", elapsed * 1000)
+        timings = current_timings()
+        if timings is not None:
+            timings.add("load.mcp", elapsed)
+
+    async def _run(self, mcp_app: Any, ready: asyncio.Event) -> None:
+        async with mcp_app.lifespan(mcp_app):
+            ready.set()
+            await self._stop.wait()
+
+    async def shutdown(self) -> None:
+        if self._task is not None and self._stop is not None:
+            self._stop.set()
+            await self._task
+
+    @asynccontextmanager
+    async def lifespan(self, app: Any) -> AsyncIterator[None]:
+        """App lifespan that stops the MCP sub-app if it was started."""
+        try:
+            yield
+        finally:
+            await self.shutdown()
+
+
+class LazyLoadMiddleware:
+    """ASGI middleware that loads the router or MCP sub-app a request needs."""
+
+    def __init__(self, app: Any, routers: RouterLoader, mcp: LazyMCP):
+        self.app = app
+        self.routers = routers
+        self.mcp = mcp
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] == "http":
+            path = scope["path"]
+            if path == self.mcp.mount_path or path.startswith(self.mcp.mount_path + "/"):
+                await self.mcp.ensure_started(scope["app"])
+            else:
+                self.routers.load_for_path(path)
+        await self.app(scope, receive, send)
@@ -3,9 +3,46 @@ Utility functions for async operations
 """
 
 import asyncio
+import contextvars
+import threading
 from functools import partial, wraps
 from typing import Any, Callable
 
+from .metrics import executor_jobs_running, executor_queue_depth
+
+
+class _TrackedJob:
+    """Executor job that moves the executor gauges from queued to running to done.
+
+    The caller's context is copied (like ``asyncio.to_thread``) so per-request
+    context variables such as phase timings are visible in the worker thread.
+    """
+
+    __slots__ = ("func", "context", "dequeued", "lock")
+
+    def __init__(self, func: Callable):
+        self.func = func
+        self.context = contextvars.copy_context()
+        self.dequeued = False
+        self.lock = threading.Lock()
+        executor_queue_depth.inc()
+
+    def dequeue(self) -> bool:
+        with self.lock:
+            if self.dequeued:
+                return False
+            self.dequeued = True
+        executor_queue_depth.dec()
+        return True
+
+    def __call__(self) -> Any:
+        self.dequeue()
+        executor_jobs_running.inc()
+        try:
+            return self.context.run(self.func)
+        finally:
+            executor_jobs_running.dec()
+
 
 async def run_in_threadpool(func: Callable, *args, **kwargs) -> Any:
     """
@@ -30,10 +67,15 @@ async def run_in_threadpool(func: Callable, *args, **kwargs) -> Any:
     # If function has kwargs, use partial to bind them
     if kwargs:
         func_with_args = partial(func, *args, **kwargs)
-        return await loop.run_in_executor(None, func_with_args)
     else:
         func_with_args = partial(func, *args) if args else func
-        return await loop.run_in_executor(None, func_with_args)
+
+    job = _TrackedJob(func_with_args)
+    try:
+        return await loop.run_in_executor(None, job)
+    finally:
+        # A job cancelled before it started never runs, so dequeue it here
+        job.dequeue()
 
 
 def async_wrap(func: Callable) -> Callable:
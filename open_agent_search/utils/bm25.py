@@ -0,0 +1,59 @@
+"""
+BM25 Ranking
+
+Okapi BM25 over small in-memory collections, such as the passages of one
+page. Term postings are built once, so scoring a query only touches the
+documents that contain one of its terms.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+_TOKEN = re.compile(r"\w+")
+
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens of ``text``."""
+    return _TOKEN.findall(text.lower())
+
+
+def idf(doc_freq: int, doc_count: int) -> float:
+    """BM25 inverse document frequency (always positive)."""
+    return math.log(1 + (doc_count - doc_freq + 0.5) / (doc_freq + 0.5))
+
+
+def term_score(tf: int, doc_length: int, avg_length: float, term_idf: float) -> float:
+    """Contribution of one query term with frequency ``tf`` to a document's score."""
+    norm = K1 * (1 - B + B * doc_length / avg_length) if avg_length else K1
+    return term_idf * tf * (K1 + 1) / (tf + norm)
+
+
+class BM25:
+    """BM25 index over a fixed list of tokenized documents."""
+
+    def __init__(self, documents: Iterable[Sequence[str]]):
+        self.lengths: List[int] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        for doc_id, tokens in enumerate(documents):
+            self.lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                self.postings.setdefault(term, []).append((doc_id, tf))
+        self.count = len(self.lengths)
+        self.avg_length = sum(self.lengths) / self.count if self.count else 0.0
+
+    def scores(self, query_terms: Iterable[str]) -> List[float]:
+        """Score of every document for the query (0 for documents without a query term)."""
+        scores = [0.0] * self.count
+        for term in set(query_terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            term_idf = idf(len(postings), self.count)
+            for doc_id, tf in postings:
+                scores[doc_id] += term_score(tf, self.lengths[doc_id], self.avg_length, term_idf)
+        return scores
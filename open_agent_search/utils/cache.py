@@ -0,0 +1,612 @@
+"""
+Search Result Cache
+
+Pluggable TTL cache for controller results. The backend is chosen by
+``CACHE_URL``:
+
+- ``memory://`` (default): bounded in-process LRU.
+- ``redis://`` / ``rediss://``: shared across processes and serverless
+  invocations. Requires the optional ``redis`` package.
+- ``none://``: caching disabled.
+
+``cached_search()`` wraps a synchronous controller and ``cached_fetch()`` an
+async one, so identical calls within the TTL are served from the cache.
+
+Entries stay servable for ``CACHE_MAX_STALE_SECONDS`` past their TTL
+(stale-while-revalidate): a stale entry is returned immediately and refreshed
+in the background, so only the first caller after the hard cutoff waits on
+upstream. Lookups made while handling a request are collected by
+``cache_scope()`` and reported in ``Cache-Status`` and ``Age`` headers.
+
+With CACHE_SIMILAR_QUERIES on, a search that misses may be answered from the
+fresh cached result of a near-duplicate query (see ``similar_queries``), but
+only inside a ``cache_scope(approximate=True)``: callers opt in where they can
+report it. Such lookups are recorded as ``approximate`` and never stored under
+the new key.
+"""
+
+import asyncio
+import contextvars
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from .metrics import cache_requests
+from .similar_queries import QueryIndex, SimilarQuery
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    """A cached value with the time it was stored, its TTL and its stale window."""
+
+    value: Any
+    stored_at: float
+    ttl: float
+    max_stale: float = 0.0
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+    @property
+    def fresh(self) -> bool:
+        return self.age < self.ttl
+
+    @property
+    def servable(self) -> bool:
+        """Fresh, or stale but still within the hard max-staleness cutoff."""
+        return self.age < self.ttl + self.max_stale
+
+
+class CacheBackend:
+    """Interface for cache backends. Implementations must be thread-safe."""
+
+    name = "base"
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float, max_stale: float = 0.0) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class NullCache(CacheBackend):
+    """Backend that never stores anything."""
+
+    name = "none"
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        return None
+
+    def set(self, key: str, value: Any, ttl: float, max_stale: float = 0.0) -> None:
+        pass
+
+    def delete(self, key: str) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """Bounded in-process LRU cache with per-entry TTL and stale window."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if not entry.servable:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: Any, ttl: float, max_stale: float = 0.0) -> None:
+        with self._lock:
+            self._entries[key] = CacheEntry(value, time.time(), ttl, max_stale)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCache(CacheBackend):
+    """Redis-backed cache; values must be JSON-serializable.
+
+    Connection errors are logged and treated as misses so an unavailable
+    cache never fails a request.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "oas:"):
+        import redis  # optional dependency
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        try:
+            raw = self._client.get(self.prefix + key)
+        except Exception as e:
+            logger.warning("Redis cache get failed: %r", e)
+            return None
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        return CacheEntry(data["value"], data["stored_at"], data["ttl"], data.get("max_stale", 0.0))
+
+    def set(self, key: str, value: Any, ttl: float, max_stale: float = 0.0) -> None:
+        payload = json.dumps(
+            {"value": value, "stored_at": time.time(), "ttl": ttl, "max_stale": max_stale}
+        )
+        try:
+            # Redis expires the key at the hard cutoff, not at the TTL
+            self._client.set(self.prefix + key, payload, ex=max(1, int(ttl + max_stale)))
+        except Exception as e:
+            logger.warning("Redis cache set failed: %r", e)
+
+    def delete(self, key: str) -> None:
+        try:
+            self._client.delete(self.prefix + key)
+        except Exception as e:
+            logger.warning("Redis cache delete failed: %r", e)
+
+    def clear(self) -> None:
+        try:
+            for key in self._client.scan_iter(match=self.prefix + "*"):
+                self._client.delete(key)
+        except Exception as e:
+            logger.warning("Redis cache clear failed: %r", e)
+
+
+def create_cache(url: str, max_entries: int = 1024) -> CacheBackend:
+    """Build a backend from a cache URL (memory://, redis://, rediss://, none://)."""
+    scheme = url.split("://", 1)[0].lower() if url else "memory"
+    if scheme == "memory":
+        return MemoryCache(max_entries=max_entries)
+    if scheme in ("none", "off"):
+        return NullCache()
+    if scheme in ("redis", "rediss"):
+        try:
+            return RedisCache(url)
+        except ImportError:
+            logger.warning("CACHE_URL uses Redis but the redis package is not installed")
+            return MemoryCache(max_entries=max_entries)
+    raise ValueError(f"Unsupported cache URL scheme: {scheme}")
+
+
+_cache: Optional[CacheBackend] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> CacheBackend:
+    """Return the process-wide cache, creating it from the config on first use."""
+    global _cache
+    if _cache is None:
+        from ..config import cache_config
+
+        with _cache_lock:
+            if _cache is None:
+                _cache = create_cache(cache_config.URL, cache_config.MAX_ENTRIES)
+    return _cache
+
+
+def configure_cache(backend: Optional[CacheBackend]) -> Optional[CacheBackend]:
+    """Replace the process-wide cache and return the previous backend.
+
+    ``None`` resets it so the next ``get_cache()`` builds one from the config.
+    """
+    global _cache
+    with _cache_lock:
+        previous, _cache = _cache, backend
+    return previous
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def cache_key(namespace: str, params: Dict[str, Any]) -> str:
+    """Stable key for a namespace and call parameters."""
+    normalized = {name: _normalize(value) for name, value in sorted(params.items())}
+    digest = hashlib.sha256(json.dumps(normalized, default=str).encode()).hexdigest()
+    return f"{namespace}:{digest[:32]}"
+
+
+@dataclass
+class CacheLookup:
+    """Outcome of one cache lookup: ``hit``, ``stale``, ``approximate`` or ``miss``."""
+
+    namespace: str
+    status: str
+    age: Optional[float] = None
+    ttl: Optional[float] = None
+    # For approximate lookups: the cached query that was used, and how similar it is
+    similar_to: Optional[str] = None
+    similarity: Optional[float] = None
+
+
+_lookups: contextvars.ContextVar[Optional[List[CacheLookup]]] = contextvars.ContextVar(
+    "oas_cache_lookups", default=None
+)
+# Whether a near-duplicate query's result may be served in this context
+_approximate: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "oas_cache_approximate", default=False
+)
+# Whether expired entries must be refreshed instead of served stale in this context
+_fresh_only: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "oas_cache_fresh_only", default=False
+)
+
+
+@contextmanager
+def cache_scope(approximate: bool = False, fresh_only: bool = False) -> Iterator[List[CacheLookup]]:
+    """Collect the cache lookups made in this context (including thread-pool jobs).
+
+    Scopes nest: an inner scope's lookups are also reported to the outer one.
+    With ``approximate``, searches in the scope may be answered from a
+    near-duplicate query; the caller must then report ``approximate_match``.
+    With ``fresh_only``, expired search entries are refreshed before they are
+    returned, for callers with no way to report staleness.
+    """
+    parent = _lookups.get()
+    lookups: List[CacheLookup] = []
+    token = _lookups.set(lookups)
+    approximate_token = _approximate.set(True) if approximate else None
+    fresh_token = _fresh_only.set(True) if fresh_only else None
+    try:
+        yield lookups
+    finally:
+        if fresh_token is not None:
+            _fresh_only.reset(fresh_token)
+        if approximate_token is not None:
+            _approximate.reset(approximate_token)
+        _lookups.reset(token)
+        if parent is not None:
+            parent.extend(lookups)
+
+
+def _record(
+    namespace: str,
+    status: str,
+    entry: Optional[CacheEntry] = None,
+    similar: Optional[SimilarQuery] = None,
+) -> None:
+    cache_requests.inc(namespace=namespace, result=status)
+    lookups = _lookups.get()
+    if lookups is not None:
+        lookup = CacheLookup(namespace, status)
+        if entry is not None:
+            lookup.age, lookup.ttl = entry.age, entry.ttl
+        if similar is not None:
+            lookup.similar_to, lookup.similarity = similar.query, similar.similarity
+        lookups.append(lookup)
+
+
+def cache_headers(lookups: Iterable[CacheLookup]) -> Dict[str, str]:
+    """
+    ``Cache-Status`` (RFC 9211) and ``Age`` headers for a request's lookups.
+
+    Stale hits carry a negative ``ttl`` (seconds past expiry) and hits for a
+    near-duplicate query an ``approximate`` parameter. ``Age`` is the age of
+    the oldest entry served.
+    """
+    lookups = list(lookups)
+    if not lookups:
+        return {}
+    parts = []
+    for lookup in lookups:
+        if lookup.status == "miss":
+            parts.append(f"oas; fwd=miss; stored; detail={lookup.namespace}")
+        else:
+            remaining = int(lookup.ttl - lookup.age)
+            part = f"oas; hit; ttl={remaining}; detail={lookup.namespace}"
+            parts.append(f"{part}; approximate" if lookup.status == "approximate" else part)
+    headers = {"Cache-Status": ", ".join(parts)}
+    ages = [lookup.age for lookup in lookups if lookup.age is not None]
+    if ages:
+        headers["Age"] = str(int(max(ages)))
+    return headers
+
+
+def approximate_match(lookups: Iterable[CacheLookup]) -> Optional[Dict[str, Any]]:
+    """``{"query", "similarity"}`` of the first approximate lookup, if any."""
+    for lookup in lookups:
+        if lookup.status == "approximate":
+            return {"query": lookup.similar_to, "similarity": round(lookup.similarity or 0.0, 3)}
+    return None
+
+
+_query_index: Optional[QueryIndex] = None
+
+
+def get_query_index() -> QueryIndex:
+    """Process-wide index of cached search queries (created on first use)."""
+    global _query_index
+    if _query_index is None:
+        from ..config import cache_config
+
+        with _cache_lock:
+            if _query_index is None:
+                _query_index = QueryIndex(
+                    threshold=cache_config.SIMILARITY_THRESHOLD,
+                    max_entries=cache_config.MAX_ENTRIES,
+                )
+    return _query_index
+
+
+def _similar_scope(namespace: str, query_param: str, params: Dict[str, Any]) -> str:
+    """Key of every parameter except the query: only these must match exactly."""
+    return cache_key(namespace, {k: v for k, v in params.items() if k != query_param})
+
+
+def _find_similar(
+    namespace: str, query_param: str, params: Dict[str, Any], cache: CacheBackend
+) -> Optional[tuple[SimilarQuery, CacheEntry]]:
+    """A fresh cached entry of a near-duplicate query, if there is one."""
+    index = get_query_index()
+    similar = index.lookup(_similar_scope(namespace, query_param, params), params[query_param])
+    if similar is None:
+        return None
+    entry = cache.get(similar.cache_key)
+    if entry is None:
+        index.discard(similar.cache_key)
+        return None
+    # Only fresh entries: an approximate answer should not also be stale
+    return (similar, entry) if entry.fresh else None
+
+
+def _prefetch_next_page(
+    namespace: str,
+    func: Callable[..., Any],
+    params: Dict[str, Any],
+    value: Any,
+    cache: CacheBackend,
+) -> None:
+    """Warm page N+1 in the background after page N was served (if enabled)."""
+    from .prefetch import get_prefetcher, in_prefetch
+
+    if "page" not in params or in_prefetch() or isinstance(cache, NullCache):
+        return
+    # A short page is the last one
+    if not isinstance(value, list) or len(value) < params.get("max_results", 0):
+        return
+    prefetcher = get_prefetcher()
+    if prefetcher is None:
+        return
+    next_params = {**params, "page": params["page"] + 1}
+    key = cache_key(namespace, next_params)
+    entry = cache.get(key)
+    if entry is None or not entry.fresh:
+        prefetcher.submit(namespace, key, func, next_params)
+
+
+# Keys with a background refresh in flight, so a burst of stale hits
+# triggers one upstream call
+_revalidating: set = set()
+_revalidate_lock = threading.Lock()
+_revalidate_executor: Optional[ThreadPoolExecutor] = None
+_revalidate_tasks: set = set()
+
+
+def _claim_revalidation(key: str) -> bool:
+    with _revalidate_lock:
+        if key in _revalidating:
+            return False
+        _revalidating.add(key)
+        return True
+
+
+def _release_revalidation(key: str) -> None:
+    with _revalidate_lock:
+        _revalidating.discard(key)
+
+
+def _revalidate(namespace: str, key: str, func: Callable[..., Any], params: Dict) -> None:
+    """Refresh a stale entry of a sync function on a small dedicated executor."""
+    global _revalidate_executor
+    if not _claim_revalidation(key):
+        return
+    with _revalidate_lock:
+        if _revalidate_executor is None:
+            _revalidate_executor = ThreadPoolExecutor(
+                max_workers=2, thread_name_prefix="oas-revalidate"
+            )
+
+    def run() -> None:
+        from ..config import cache_config
+
+        try:
+            value = func(**params)
+            get_cache().set(key, value, cache_config.TTL_SECONDS, cache_config.MAX_STALE_SECONDS)
+        except Exception as e:
+            logger.debug("Revalidating %s failed: %r", namespace, e)
+        finally:
+            _release_revalidation(key)
+
+    _revalidate_executor.submit(run)
+
+
+def _revalidate_async(
+    namespace: str, key: str, func: Callable[..., Any], params: Dict, ttl: float
+) -> None:
+    """Refresh a stale entry of an async function in a background task."""
+    if not _claim_revalidation(key):
+        return
+
+    async def run() -> None:
+        from ..config import cache_config
+
+        try:
+            value = await func(**params)
+            get_cache().set(key, value, ttl, cache_config.MAX_STALE_SECONDS)
+        except Exception as e:
+            logger.debug("Revalidating %s failed: %r", namespace, e)
+        finally:
+            _release_revalidation(key)
+
+    # A fresh context keeps the refresh out of the request's timings and lookups
+    task = asyncio.create_task(run(), context=contextvars.Context())
+    _revalidate_tasks.add(task)
+    task.add_done_callback(_revalidate_tasks.discard)
+
+
+def _binder(
+    func: Callable[..., Any], namespace: str, ignore: Iterable[str]
+) -> tuple[Callable[..., Dict[str, Any]], Callable[[Dict[str, Any]], str]]:
+    """Build ``bind`` (call arguments) and ``key_of`` (their cache key) for ``func``."""
+    signature = inspect.signature(func)
+    ignored = frozenset(ignore)
+
+    def bind(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return dict(bound.arguments)
+
+    def key_of(params: Dict[str, Any]) -> str:
+        return cache_key(namespace, {k: v for k, v in params.items() if k not in ignored})
+
+    return bind, key_of
+
+
+def cached_search(
+    namespace: str, similar: Optional[str] = None
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Cache a synchronous controller's result by its bound arguments.
+
+    The wrapper exposes ``key_for(*args, **kwargs)`` so callers can address
+    the cache entry a given call would use. Paginated controllers also get
+    next-page prefetch when PREFETCH_ENABLED is set. ``similar`` names the
+    query argument; with CACHE_SIMILAR_QUERIES on, a miss inside a
+    ``cache_scope(approximate=True)`` may then be served the result of a
+    near-duplicate query with otherwise identical arguments. Inside a
+    ``cache_scope(fresh_only=True)`` expired entries are refreshed before
+    returning instead of served stale.
+    """
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        bind, key_of = _binder(func, namespace, ())
+
+        def key_for(*args: Any, **kwargs: Any) -> str:
+            return key_of(bind(*args, **kwargs))
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            from ..config import cache_config
+
+            params = bind(*args, **kwargs)
+            key = key_of(params)
+            cache = get_cache()
+            entry = cache.get(key)
+            if entry is not None and entry.fresh:
+                _record(namespace, "hit", entry)
+                value = entry.value
+            elif entry is not None and not _fresh_only.get():
+                _record(namespace, "stale", entry)
+                value = entry.value
+                _revalidate(namespace, key, func, params)
+            else:
+                match = None
+                if similar and cache_config.SIMILAR_QUERIES and _approximate.get():
+                    match = _find_similar(namespace, similar, params, cache)
+                if match is not None:
+                    _record(namespace, "approximate", match[1], match[0])
+                    return match[1].value
+                _record(namespace, "miss")
+                value = func(**params)
+                cache.set(key, value, cache_config.TTL_SECONDS, cache_config.MAX_STALE_SECONDS)
+                if similar and cache_config.SIMILAR_QUERIES:
+                    get_query_index().add(
+                        _similar_scope(namespace, similar, params), params[similar], key
+                    )
+
+            _prefetch_next_page(namespace, wrapper, params, value, cache)
+            return value
+
+        wrapper.key_for = key_for  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
+
+
+def cached_fetch(
+    namespace: str, ignore: Iterable[str] = ()
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Cache an async function's result, with CACHE_CONTENT_TTL_SECONDS as the TTL.
+
+    Arguments named in ``ignore`` (e.g. a timeout) do not affect the key.
+    Exceptions are not cached. The returned value is a copy, so callers may
+    add keys to it without touching the cached entry.
+    """
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        bind, key_of = _binder(func, namespace, ignore)
+
+        def key_for(*args: Any, **kwargs: Any) -> str:
+            return key_of(bind(*args, **kwargs))
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            from ..config import cache_config
+
+            ttl = cache_config.CONTENT_TTL_SECONDS
+            params = bind(*args, **kwargs)
+            key = key_of(params)
+            cache = get_cache()
+            entry = cache.get(key)
+            if entry is not None and entry.fresh:
+                _record(namespace, "hit", entry)
+                value = entry.value
+            elif entry is not None:
+                _record(namespace, "stale", entry)
+                value = entry.value
+                _revalidate_async(namespace, key, func, params, ttl)
+            else:
+                _record(namespace, "miss")
+                value = await func(**params)
+                cache.set(key, value, ttl, cache_config.MAX_STALE_SECONDS)
+            return dict(value) if isinstance(value, dict) else value
+
+        wrapper.key_for = key_for  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
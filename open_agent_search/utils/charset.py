@@ -0,0 +1,240 @@
+"""
+Charset Detection and Decoding
+
+Fetched pages are decoded in one pass with a charset chosen from the first
+bytes of the body, in this order:
+
+1. A byte order mark.
+2. The ``charset`` parameter of the ``Content-Type`` header.
+3. A ``<meta charset>`` / ``http-equiv`` declaration or an XML declaration.
+4. The charset that worked for the host last time (a hint).
+5. ``detect_charset`` on a sample: valid UTF-8 (or plain ASCII) is UTF-8,
+   isolated high bytes between ASCII letters are Western European (cp1252),
+   and runs of high bytes are Cyrillic or CJK. Those are settled by the
+   optional ``charset_normalizer`` package when it is installed, and by
+   checking which legacy charset decodes the sample into its expected script
+   otherwise.
+
+Only if the chosen charset turns out to be wrong further into the body is the
+page decoded again, with utf-8, cp1252 and finally latin-1 (which never fails).
+Labels follow the WHATWG mapping: latin-1 and ASCII are read as cp1252.
+"""
+
+import codecs
+import re
+from typing import List, Optional, Tuple
+
+try:
+    from charset_normalizer import from_bytes
+except ImportError:  # optional dependency
+    from_bytes = None
+
+# Bytes of the body searched for a declaration, and used for detection
+DECLARATION_BYTES = 8192
+DETECT_BYTES = 65536
+NORMALIZER_BYTES = 16384
+
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+_WHATWG_ALIASES = {"latin-1": "cp1252", "iso8859-1": "cp1252", "ascii": "cp1252"}
+
+_META = re.compile(rb"""<meta[^>]+?charset\s*=\s*["']?\s*([\w.:-]+)""", re.I)
+_XML_DECLARATION = re.compile(rb"""^\s*<\?xml[^>]+encoding\s*=\s*["']([\w.:-]+)""", re.I)
+_HIGH_RUN = re.compile(rb"[\x80-\xff]+")
+_HEADER = re.compile(r"""charset\s*=\s*["']?([\w.:-]+)""", re.I)
+
+# Legacy charsets tried in order without charset_normalizer: the first whose
+# decoded sample has at least the given share of its non-ASCII characters in
+# the ranges typical of its language wins (kana for Japanese, since Chinese
+# and Korean decode as valid kanji too). Cyrillic comes last: its odd-length
+# words between spaces are not valid double-byte text
+_CJK = ((0x4E00, 0x9FFF), (0x3000, 0x303F), (0xFF01, 0xFF5E))
+_LEGACY = (
+    ("shift_jis", ((0x3040, 0x30FF),), 0.2),
+    ("euc-jp", ((0x3040, 0x30FF),), 0.2),
+    ("euc-kr", ((0xAC00, 0xD7AF), (0x3130, 0x318F)), 0.8),
+    ("gb18030", _CJK, 0.8),
+    ("big5", _CJK, 0.8),
+    ("cp1251", ((0x0400, 0x04FF),), 0.8),
+)
+
+
+def normalize_charset(label: Optional[str]) -> Optional[str]:
+    """Python codec name for a charset label, or None if unknown."""
+    if not label:
+        return None
+    try:
+        name = codecs.lookup(label.strip().strip("\"'")).name
+    except LookupError:
+        return None
+    return _WHATWG_ALIASES.get(name, name)
+
+
+def bom_charset(head: bytes) -> Optional[str]:
+    for bom, charset in _BOMS:
+        if head.startswith(bom):
+            return charset
+    return None
+
+
+def header_charset(content_type: Optional[str]) -> Optional[str]:
+    match = _HEADER.search(content_type or "")
+    return normalize_charset(match.group(1)) if match else None
+
+
+def meta_charset(head: bytes) -> Optional[str]:
+    """Charset declared in the markup of the first ``DECLARATION_BYTES``."""
+    head = head[:DECLARATION_BYTES]
+    match = _XML_DECLARATION.search(head) or _META.search(head)
+    if not match:
+        return None
+    charset = normalize_charset(match.group(1).decode("ascii", "ignore"))
+    # A document that could be read far enough to find the tag is not UTF-16
+    return "utf-8" if charset and charset.startswith("utf-16") else charset
+
+
+def _is_utf8(sample: bytes) -> bool:
+    try:
+        # Not final: the sample may end in the middle of a character
+        codecs.getincrementaldecoder("utf-8")().decode(sample, False)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def _mostly_isolated(sample: bytes) -> bool:
+    """Whether most high bytes sit alone between ASCII bytes ("café", "naïve")."""
+    runs = [len(run) for run in _HIGH_RUN.findall(sample)]
+    high = sum(runs)
+    return high == 0 or sum(run for run in runs if run > 1) < high / 2
+
+
+def _script_share(text: str, ranges) -> float:
+    """Share of non-ASCII characters of ``text`` that fall in ``ranges``."""
+    wide = [ord(char) for char in text if ord(char) >= 0x80]
+    if not wide:
+        return 0.0
+    hits = sum(1 for code in wide if any(lo <= code <= hi for lo, hi in ranges))
+    return hits / len(wide)
+
+
+def detect_charset(sample: bytes) -> str:
+    """Best guess at the charset of an undeclared body from a sample of it."""
+    sample = sample[:DETECT_BYTES]
+    if _is_utf8(sample):
+        return "utf-8"
+    if _mostly_isolated(sample):
+        return "cp1252"
+    if from_bytes is not None:
+        best = from_bytes(sample[:NORMALIZER_BYTES]).best()
+        charset = normalize_charset(best.encoding) if best is not None else None
+        if charset:
+            return charset
+    for charset, ranges, threshold in _LEGACY:
+        try:
+            text = sample.decode(charset)
+        except UnicodeDecodeError:
+            continue
+        if _script_share(text, ranges) >= threshold:
+            return charset
+    return "cp1252"
+
+
+def choose_charset(
+    content_type: Optional[str], head: bytes, hint: Optional[str] = None
+) -> Tuple[str, str]:
+    """
+    Charset to decode a body starting with ``head`` with.
+
+    Returns:
+        Tuple of (charset, where it came from: bom, header, meta, hint or detected)
+    """
+    for source, charset in (
+        ("bom", bom_charset(head)),
+        ("header", header_charset(content_type)),
+        ("meta", meta_charset(head)),
+        ("hint", normalize_charset(hint)),
+    ):
+        if charset:
+            return charset, source
+    return detect_charset(head), "detected"
+
+
+def _decode_fallback(raw: bytes, tried: str) -> Tuple[str, str]:
+    """Decode a body whose chosen charset failed: utf-8, cp1252, then latin-1."""
+    for charset in ("utf-8", "cp1252"):
+        if charset == tried:
+            continue
+        try:
+            return raw.decode(charset), charset
+        except UnicodeDecodeError:
+            continue
+    # latin-1 never raises UnicodeDecodeError — guaranteed to succeed
+    return raw.decode("latin-1"), "latin-1"
+
+
+class StreamDecoder:
+    """
+    Decode a body chunk by chunk as it is downloaded.
+
+    The charset is chosen once the first ``DECLARATION_BYTES`` have arrived
+    (or at the end of a shorter body). Chunks are decoded incrementally; if
+    a later chunk does not fit the chosen charset, the whole body is decoded
+    again with the fallbacks.
+    """
+
+    def __init__(self, content_type: Optional[str] = None, hint: Optional[str] = None):
+        self.content_type = content_type
+        self.hint = hint
+        self.charset: Optional[str] = None
+        self.source: Optional[str] = None
+        self._raw: List[bytes] = []
+        self._parts: List[str] = []
+        self._decoder: Optional[codecs.IncrementalDecoder] = None
+        self._failed = False
+
+    def feed(self, chunk: bytes, final: bool = False) -> None:
+        self._raw.append(chunk)
+        if self._failed:
+            return
+        if self._decoder is None:
+            head = b"".join(self._raw)
+            if len(head) < DECLARATION_BYTES and not final:
+                return
+            self.charset, self.source = choose_charset(self.content_type, head, self.hint)
+            self._decoder = codecs.getincrementaldecoder(self.charset)()
+            chunk = head
+        try:
+            self._parts.append(self._decoder.decode(chunk, final))
+        except UnicodeDecodeError:
+            self._failed = True
+
+    def close(self) -> str:
+        """The decoded body."""
+        self.feed(b"", final=True)
+        if self._failed:
+            text, self.charset = _decode_fallback(b"".join(self._raw), self.charset or "")
+            self.source = "fallback"
+            return text
+        return "".join(self._parts)
+
+
+def decode_body(
+    raw: bytes, content_type: Optional[str] = None, hint: Optional[str] = None
+) -> Tuple[str, str]:
+    """
+    Decode a whole body in one pass.
+
+    Returns:
+        Tuple of (text, charset used)
+    """
+    charset, _ = choose_charset(content_type, raw[:DETECT_BYTES], hint)
+    try:
+        return raw.decode(charset), charset
+    except UnicodeDecodeError:
+        return _decode_fallback(raw, charset)
@@ -0,0 +1,238 @@
+"""
+Circuit Breakers
+
+During an upstream incident every request would otherwise wait out its full
+timeout, filling the thread pool with doomed calls. A ``CircuitBreaker``
+tracks the outcomes of recent calls to one upstream (a search type and
+backend, or a fetched host) and fails fast while that upstream is degraded:
+
+- **closed**: calls go through. When at least ``min_calls`` calls were made
+  in the last ``window`` seconds and ``failure_ratio`` of them failed, the
+  circuit opens.
+- **open**: calls are rejected immediately with ``CircuitOpenError`` for
+  ``open_seconds``.
+- **half-open**: up to ``half_open_probes`` calls go through as probes. A
+  successful probe closes the circuit, a failed one opens it again.
+
+Only failures that say something about the upstream's health count (see
+``search_failed`` and ``fetch_failed``); an empty result or a 404 does not.
+Circuits are reported by ``/health`` and the ``oas_circuit_*`` metrics.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Iterator, Optional, Tuple
+
+from .metrics import circuit_rejections, circuit_transitions, circuits_open
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(
+            f"{name} is failing; requests are paused for {int(retry_after) + 1}s. "
+            "Please try again later."
+        )
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Retry-After": str(int(self.retry_after) + 1)}
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker for one upstream. Thread-safe."""
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        window: float = 30.0,
+        min_calls: int = 5,
+        failure_ratio: float = 0.5,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1,
+    ):
+        self.name = name
+        self.kind = kind
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._probes = 0
+        self._outcomes: Deque[Tuple[float, bool]] = deque()  # (time, failed)
+        self._lock = threading.Lock()
+
+    def _transition(self, state: str) -> None:
+        if state == self.state:
+            return
+        if self.state == CLOSED:
+            circuits_open.inc(kind=self.kind)
+        elif state == CLOSED:
+            circuits_open.dec(kind=self.kind)
+        self.state = state
+        circuit_transitions.inc(kind=self.kind, state=state)
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+        self._outcomes.clear()
+        self._probes = 0
+
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a probe through (0 otherwise)."""
+        if self.state != OPEN:
+            return 0.0
+        return max(self.opened_at + self.open_seconds - time.monotonic(), 0.0)
+
+    def allow(self) -> None:
+        """Admit a call or raise ``CircuitOpenError``; admitted calls must report back."""
+        with self._lock:
+            if self.state == OPEN and self.retry_after() <= 0:
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return
+            if self.state == CLOSED:
+                return
+            retry_after = self.retry_after() if self.state == OPEN else 1.0
+        circuit_rejections.inc(kind=self.kind)
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record(self, failed: bool) -> None:
+        """Report the outcome of an admitted call."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._transition(OPEN if failed else CLOSED)
+                return
+            if self.state == OPEN:
+                return  # a call admitted before the circuit opened
+            now = time.monotonic()
+            self._outcomes.append((now, failed))
+            while self._outcomes and self._outcomes[0][0] < now - self.window:
+                self._outcomes.popleft()
+            failures = sum(1 for _, outcome in self._outcomes if outcome)
+            calls = len(self._outcomes)
+            if calls >= self.min_calls and failures >= self.failure_ratio * calls:
+                self._transition(OPEN)
+
+    def cancel(self) -> None:
+        """Give back the probe slot of an admitted call that ended without an outcome."""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes:
+                self._probes -= 1
+
+    @contextmanager
+    def guard(self, is_failure: Callable[[BaseException], bool] = lambda e: True) -> Iterator[None]:
+        """Run the enclosed call through the breaker."""
+        self.allow()
+        try:
+            yield
+        except Exception as e:
+            self.record(is_failure(e))
+            raise
+        except BaseException:
+            self.cancel()
+            raise
+        self.record(False)
+
+    def as_dict(self) -> Dict[str, object]:
+        with self._lock:
+            return {"state": self.state, "retry_after": round(self.retry_after(), 1)}
+
+
+class CircuitRegistry:
+    """Circuit breakers created on first use, keeping at most ``max_circuits``."""
+
+    def __init__(self, max_circuits: int = 1024):
+        self.max_circuits = max_circuits
+        self._circuits: "OrderedDict[str, CircuitBreaker]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name: str, kind: str) -> CircuitBreaker:
+        from ..config import circuit_config
+
+        with self._lock:
+            breaker = self._circuits.get(name)
+            if breaker is not None:
+                self._circuits.move_to_end(name)
+                return breaker
+            breaker = CircuitBreaker(
+                name,
+                kind,
+                window=circuit_config.WINDOW_SECONDS,
+                min_calls=circuit_config.MIN_CALLS,
+                failure_ratio=circuit_config.FAILURE_RATIO,
+                open_seconds=circuit_config.OPEN_SECONDS,
+                half_open_probes=circuit_config.HALF_OPEN_PROBES,
+            )
+            self._circuits[name] = breaker
+            # Forget the least recently used closed circuits (e.g. one-off hosts)
+            for old_name in list(self._circuits):
+                if len(self._circuits) <= self.max_circuits:
+                    break
+                if self._circuits[old_name].state == CLOSED:
+                    del self._circuits[old_name]
+            return breaker
+
+    def tripped(self) -> Dict[str, Dict[str, object]]:
+        """State of every circuit that is not closed."""
+        with self._lock:
+            circuits = list(self._circuits.values())
+        return {c.name: c.as_dict() for c in circuits if c.state != CLOSED}
+
+    def clear(self) -> None:
+        with self._lock:
+            for breaker in self._circuits.values():
+                with breaker._lock:
+                    breaker._transition(CLOSED)
+            self._circuits.clear()
+
+
+circuits = CircuitRegistry()
+
+
+def search_failed(exc: BaseException) -> bool:
+    """DDGS reports an empty result as an error; only real failures count."""
+    return "No results found" not in str(exc)
+
+
+def fetch_failed(exc: BaseException) -> bool:
+    """Timeouts, connection errors and 5xx count against a host; 4xx and bad content do not."""
+    code = getattr(exc, "code", None)  # urllib's HTTPError
+    if isinstance(code, int):
+        return code >= 500
+    message = str(exc).lower()
+    if "timed out" in message or "timeout" in message or "http 5" in message:
+        return True
+    return isinstance(exc, (ConnectionError, OSError)) and "decode" not in message
+
+
+@contextmanager
+def search_circuit(search_type: str, backend: str) -> Iterator[None]:
+    """Guard a DDGS search call with the circuit of its search type and backend."""
+    from ..config import circuit_config
+
+    if not circuit_config.ENABLED:
+        yield
+        return
+    with circuits.get(f"search:{search_type}:{backend}", "search").guard(search_failed):
+        yield
+
+
+def fetch_circuit(host: str) -> Optional[CircuitBreaker]:
+    """The circuit of a fetched host, or None when circuit breaking is disabled."""
+    from ..config import circuit_config
+
+    if not circuit_config.ENABLED or not host:
+        return None
+    return circuits.get(f"fetch:{host}", "fetch")
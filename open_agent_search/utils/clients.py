@@ -0,0 +1,27 @@
+"""
+Per-thread Client Pool
+
+DDGS instances cache their engines and HTTP sessions (and with them open TLS
+connections). Creating one per call throws that away, while sharing one
+instance across executor threads is not safe. ``thread_client()`` keeps one
+instance per worker thread for each factory and argument set.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_local = threading.local()
+
+
+def thread_client(factory: Callable[..., T], **kwargs: Any) -> T:
+    """Return this thread's client built by ``factory(**kwargs)``, creating it once."""
+    clients: Dict[Tuple, Any] = getattr(_local, "clients", None)
+    if clients is None:
+        clients = _local.clients = {}
+    key = (factory, tuple(sorted(kwargs.items())))
+    client = clients.get(key)
+    if client is None:
+        client = clients[key] = factory(**kwargs)
+    return client
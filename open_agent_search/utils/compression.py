@@ -0,0 +1,166 @@
+"""
+Response Compression
+
+``CompressionMiddleware`` compresses complete response bodies with the best
+encoding both sides support. gzip is always available; zstd and brotli are
+used when the optional ``zstandard`` and ``brotli`` packages are installed.
+
+Only responses that declare a Content-Length are buffered and compressed.
+Streaming responses (NDJSON batches, MCP server-sent events) pass through
+untouched, so compression never delays the first byte of a stream.
+"""
+
+import gzip
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from .async_helpers import run_in_threadpool
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+# Bodies this large are compressed in the thread pool, off the event loop
+OFFLOAD_BYTES = 256 * 1024
+
+_COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/msgpack",
+    "application/x-msgpack",
+    "application/xml",
+    "application/javascript",
+)
+
+
+def _encoders(levels: Dict[str, int]) -> Dict[str, Callable[[bytes], bytes]]:
+    """Encoders for every encoding whose library is installed."""
+    encoders: Dict[str, Callable[[bytes], bytes]] = {
+        "gzip": lambda data: gzip.compress(data, compresslevel=levels["gzip"], mtime=0),
+    }
+    if brotli is not None:
+        encoders["br"] = lambda data: brotli.compress(data, quality=levels["br"])
+    if zstandard is not None:
+
+        def zstd(data: bytes) -> bytes:
+            # Compressors are not thread-safe, so each call gets its own
+            return zstandard.ZstdCompressor(level=levels["zstd"]).compress(data)
+
+        encoders["zstd"] = zstd
+    return encoders
+
+
+def parse_accept_encoding(header: str) -> List[Tuple[str, float]]:
+    """Parse an Accept-Encoding header into ``(coding, q)`` pairs."""
+    codings = []
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings.append((coding, q))
+    return codings
+
+
+def negotiate(header: str, preference: List[str]) -> Optional[str]:
+    """
+    Pick the encoding for an Accept-Encoding header.
+
+    The highest client q-value wins; ties go to the earlier entry in
+    ``preference``. Returns None when nothing acceptable is available.
+    """
+    accepted = dict(parse_accept_encoding(header))
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in preference:
+        q = accepted.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class CompressionMiddleware:
+    """ASGI middleware that compresses complete bodies of compressible responses."""
+
+    def __init__(
+        self,
+        app: Any,
+        minimum_size: int = 1024,
+        preference: Tuple[str, ...] = ("zstd", "br", "gzip"),
+        levels: Optional[Dict[str, int]] = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encoders = _encoders({"gzip": 5, "br": 4, "zstd": 3, **(levels or {})})
+        self.preference = [coding for coding in preference if coding in self.encoders]
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        coding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.preference)
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Dict[str, Any]] = None
+        chunks: List[bytes] = []
+
+        async def send_compressed(message: Dict[str, Any]) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                if self._compressible(MutableHeaders(scope=message)):
+                    start = message
+                else:
+                    await send(message)
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            encoder = self.encoders[coding]
+            if len(body) >= OFFLOAD_BYTES:
+                compressed = await run_in_threadpool(encoder, body)
+            else:
+                compressed = encoder(body)
+            headers = MutableHeaders(scope=start)
+            headers["Content-Encoding"] = coding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compressible(self, headers: MutableHeaders) -> bool:
+        """Only bodies of known, large enough size are buffered and compressed."""
+        content_type = headers.get("content-type", "")
+        try:
+            length = int(headers.get("content-length", ""))
+        except ValueError:
+            return False  # streamed
+        return (
+            length >= self.minimum_size
+            and "content-encoding" not in headers
+            and content_type.startswith(_COMPRESSIBLE_TYPES)
+            and not content_type.startswith("text/event-stream")
+        )
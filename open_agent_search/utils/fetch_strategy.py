@@ -0,0 +1,91 @@
+"""
+Per-Host Fetch Strategy Memory
+
+``fetch_url_content`` tries primp first and the stdlib urllib fetcher after
+a failure. A host whose pages primp cannot fetch or decode would pay for two
+downloads on every request, so the fetcher that worked is remembered per
+host, with the charset the page was decoded with and whether the host sent a
+compressed body, for ``FETCH_STRATEGY_TTL_SECONDS``. Later fetches from that
+host start with the remembered fetcher and charset.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class FetchStrategy:
+    fetcher: str  # "primp" or "urllib"
+    charset: Optional[str] = None
+    compressed: bool = False
+    learned_at: float = field(default_factory=time.monotonic)
+
+
+class FetchStrategies:
+    """Bounded LRU of fetch strategies by host, each valid for ``ttl`` seconds. Thread-safe."""
+
+    def __init__(self, ttl: float = 3600.0, max_hosts: int = 1024):
+        self.ttl = ttl
+        self.max_hosts = max_hosts
+        self._hosts: "OrderedDict[str, FetchStrategy]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, host: str) -> Optional[FetchStrategy]:
+        with self._lock:
+            strategy = self._hosts.get(host)
+            if strategy is None:
+                return None
+            if time.monotonic() - strategy.learned_at >= self.ttl:
+                del self._hosts[host]
+                return None
+            self._hosts.move_to_end(host)
+            return strategy
+
+    def remember(
+        self, host: str, fetcher: str, charset: Optional[str] = None, compressed: bool = False
+    ) -> None:
+        if not host or self.ttl <= 0:
+            return
+        with self._lock:
+            known = self._hosts.get(host)
+            strategy = FetchStrategy(fetcher, charset, compressed)
+            if known is not None and known.fetcher == fetcher:
+                # Keep the original time, so a fallback is re-checked once its TTL ends
+                strategy.learned_at = known.learned_at
+            self._hosts[host] = strategy
+            self._hosts.move_to_end(host)
+            while len(self._hosts) > self.max_hosts:
+                self._hosts.popitem(last=False)
+
+    def forget(self, host: str) -> None:
+        with self._lock:
+            self._hosts.pop(host, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._hosts.clear()
+
+    def __len__(self) -> int:
+        return len(self._hosts)
+
+
+_strategies: Optional[FetchStrategies] = None
+_strategies_lock = threading.Lock()
+
+
+def get_fetch_strategies() -> FetchStrategies:
+    """Process-wide strategy memory, created from the config on first use."""
+    global _strategies
+    if _strategies is None:
+        from ..config import fetch_config
+
+        with _strategies_lock:
+            if _strategies is None:
+                _strategies = FetchStrategies(
+                    ttl=fetch_config.STRATEGY_TTL_SECONDS,
+                    max_hosts=fetch_config.STRATEGY_MAX_HOSTS,
+                )
+    return _strategies
@@ -0,0 +1,379 @@
+"""
+Local Search Index
+
+An optional inverted index over content that passes through the service:
+pages extracted by ``fetch_url_content`` and text/news result snippets.
+Agents re-researching a topic can query it (``/api/search/local`` or the
+``search_local`` MCP tool) in milliseconds, without upstream calls.
+
+New documents go to an in-memory segment. Once it holds
+``LOCAL_INDEX_FLUSH_DOCS`` documents it is written to disk as an immutable
+JSON segment, and when there are more than ``LOCAL_INDEX_MAX_SEGMENTS``
+segments they are merged into one, dropping superseded documents and,
+past ``LOCAL_INDEX_MAX_DOCS``, the oldest ones. Re-indexing a URL supersedes
+its earlier version. Ranking is BM25 with collection statistics summed over
+all segments.
+
+Indexing is best-effort: ``index_results``, ``index_page`` and
+``mix_local_results`` log failures (a full disk, an unwritable index path)
+instead of raising them into the search or fetch that uses the index.
+"""
+
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .bm25 import idf, term_score, tokenize
+from .passages import select_passages
+
+logger = logging.getLogger(__name__)
+
+PAGE = "page"
+SNIPPET = "snippet"
+
+# Characters of the best passage shown as a local result's body
+EXCERPT_CHARS = 300
+
+
+@dataclass
+class IndexedDoc:
+    url: str
+    title: str
+    text: str
+    kind: str
+    indexed_at: float
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}:{self.url}"
+
+
+class Segment:
+    """Documents with their lengths and term postings (doc id, term frequency)."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        self.docs: List[IndexedDoc] = []
+        self.lengths: List[int] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+
+    def add(self, doc: IndexedDoc, term_freqs: Dict[str, int]) -> None:
+        doc_id = len(self.docs)
+        self.docs.append(doc)
+        self.lengths.append(sum(term_freqs.values()))
+        for term, tf in term_freqs.items():
+            self.postings.setdefault(term, []).append((doc_id, tf))
+
+    def term_freqs(self) -> List[Dict[str, int]]:
+        """Per-document term frequencies, rebuilt from the postings."""
+        freqs: List[Dict[str, int]] = [{} for _ in self.docs]
+        for term, postings in self.postings.items():
+            for doc_id, tf in postings:
+                freqs[doc_id][term] = tf
+        return freqs
+
+    def write(self, path: Path) -> None:
+        """Write the segment atomically and remember its path."""
+        data = {
+            "docs": [asdict(doc) for doc in self.docs],
+            "lengths": self.lengths,
+            "postings": self.postings,
+        }
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, path)
+        self.path = path
+
+    @classmethod
+    def load(cls, path: Path) -> "Segment":
+        data = json.loads(path.read_text(encoding="utf-8"))
+        segment = cls(path)
+        segment.docs = [IndexedDoc(**doc) for doc in data["docs"]]
+        segment.lengths = data["lengths"]
+        segment.postings = {
+            term: [tuple(posting) for posting in postings]
+            for term, postings in data["postings"].items()
+        }
+        return segment
+
+
+class LocalIndex:
+    """Segmented BM25 index persisted under ``path``. Thread-safe."""
+
+    def __init__(
+        self,
+        path: str,
+        flush_docs: int = 256,
+        max_segments: int = 8,
+        max_text_chars: int = 20000,
+        max_docs: int = 100000,
+    ):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.flush_docs = flush_docs
+        self.max_segments = max_segments
+        self.max_text_chars = max_text_chars
+        self.max_docs = max_docs
+        self._lock = threading.RLock()
+        self.segments: List[Segment] = []
+        for segment_path in sorted(self.path.glob("seg-*.json")):
+            try:
+                self.segments.append(Segment.load(segment_path))
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning("Skipping unreadable index segment %s: %r", segment_path, e)
+        self.memtable = Segment()
+        self._next_seq = 1 + max((int(s.path.stem[4:]) for s in self.segments), default=0)
+        # Newest version of each document key; older versions are skipped
+        self._latest: Dict[str, float] = {}
+        for segment in self.segments:
+            for doc in segment.docs:
+                self._latest[doc.key] = max(doc.indexed_at, self._latest.get(doc.key, 0.0))
+
+    def _live(self, doc: IndexedDoc) -> bool:
+        return self._latest.get(doc.key) == doc.indexed_at
+
+    def add(self, url: str, title: str, text: str, kind: str = PAGE) -> None:
+        """Index (or re-index) one document."""
+        if not url or not (title or text):
+            return
+        doc = IndexedDoc(url, title or "", (text or "")[: self.max_text_chars], kind, time.time())
+        term_freqs = Counter(tokenize(f"{doc.title}\n{doc.text}"))
+        with self._lock:
+            self.memtable.add(doc, term_freqs)
+            self._latest[doc.key] = doc.indexed_at
+            if len(self.memtable.docs) >= self.flush_docs:
+                self._flush_locked()
+
+    def add_results(self, results: List[Dict[str, Any]]) -> None:
+        """Index search results (text: title/href/body, news: title/url/body) as snippets."""
+        for result in results:
+            self.add(
+                result.get("href") or result.get("url") or "",
+                result.get("title", ""),
+                result.get("body", ""),
+                SNIPPET,
+            )
+
+    def flush(self) -> None:
+        """Write the in-memory segment to disk, if it holds anything."""
+        with self._lock:
+            if self.memtable.docs:
+                self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        path = self.path / f"seg-{self._next_seq:06d}.json"
+        self._next_seq += 1
+        self.memtable.write(path)
+        self.segments.append(self.memtable)
+        self.memtable = Segment()
+        if len(self.segments) > self.max_segments:
+            self._merge_locked()
+
+    def _merge_locked(self) -> None:
+        """
+        Merge every on-disk segment into one, dropping superseded documents
+        and all but the newest ``max_docs``.
+        """
+        live = [
+            (doc, term_freqs)
+            for segment in self.segments
+            for doc, term_freqs in zip(segment.docs, segment.term_freqs())
+            if self._live(doc)
+        ]
+        if len(live) > self.max_docs:
+            newest = heapq.nlargest(self.max_docs, live, key=lambda item: item[0].indexed_at)
+            live = sorted(newest, key=lambda item: item[0].indexed_at)
+        merged = Segment()
+        for doc, term_freqs in live:
+            merged.add(doc, term_freqs)
+        path = self.path / f"seg-{self._next_seq:06d}.json"
+        self._next_seq += 1
+        merged.write(path)
+        old, self.segments = self.segments, [merged]
+        # Forget dropped documents so _latest stays as bounded as the segments
+        self._latest = {doc.key: doc.indexed_at for doc in merged.docs}
+        for doc in self.memtable.docs:
+            self._latest[doc.key] = max(doc.indexed_at, self._latest.get(doc.key, 0.0))
+        for segment in old:
+            if segment.path is not None:
+                segment.path.unlink(missing_ok=True)
+
+    def search(
+        self,
+        query: str,
+        max_results: int = 10,
+        kind: Optional[str] = None,
+        max_age: Optional[float] = None,
+        require_all: bool = False,
+    ) -> List[Tuple[float, IndexedDoc]]:
+        """
+        BM25-ranked ``(score, doc)`` pairs for ``query``, best first.
+
+        Args:
+            kind: Only documents of this kind (``page`` or ``snippet``)
+            max_age: Only documents indexed at most this many seconds ago
+            require_all: Only documents containing every query term
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        oldest = time.time() - max_age if max_age is not None else 0.0
+        with self._lock:
+            segments = [*self.segments, self.memtable]
+            doc_count = sum(len(segment.docs) for segment in segments)
+            if not doc_count:
+                return []
+            avg_length = sum(sum(segment.lengths) for segment in segments) / doc_count
+            scores: Dict[Tuple[int, int], float] = {}
+            matched: Counter = Counter()
+            for term in terms:
+                doc_freq = sum(len(segment.postings.get(term, ())) for segment in segments)
+                if not doc_freq:
+                    continue
+                term_idf = idf(doc_freq, doc_count)
+                for seg_id, segment in enumerate(segments):
+                    for doc_id, tf in segment.postings.get(term, ()):
+                        doc = segment.docs[doc_id]
+                        if (kind and doc.kind != kind) or doc.indexed_at < oldest:
+                            continue
+                        if not self._live(doc):
+                            continue
+                        key = (seg_id, doc_id)
+                        length = segment.lengths[doc_id]
+                        scores[key] = scores.get(key, 0.0) + term_score(
+                            tf, length, avg_length, term_idf
+                        )
+                        matched[key] += 1
+            if require_all:
+                scores = {key: score for key, score in scores.items() if matched[key] == len(terms)}
+            best = heapq.nlargest(max_results, scores.items(), key=lambda item: item[1])
+            return [(score, segments[seg_id].docs[doc_id]) for (seg_id, doc_id), score in best]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "documents": len(self._latest),
+                "segments": len(self.segments),
+                "unflushed": len(self.memtable.docs),
+            }
+
+
+_index: Optional[LocalIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_local_index() -> Optional[LocalIndex]:
+    """Return the process-wide index, or None when LOCAL_INDEX_ENABLED is off."""
+    global _index
+    from ..config import local_index_config
+
+    if not local_index_config.ENABLED:
+        return None
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = LocalIndex(
+                    local_index_config.PATH,
+                    flush_docs=local_index_config.FLUSH_DOCS,
+                    max_segments=local_index_config.MAX_SEGMENTS,
+                    max_docs=local_index_config.MAX_DOCS,
+                )
+    return _index
+
+
+def flush_local_index() -> None:
+    """Persist unflushed documents (called on shutdown)."""
+    if _index is not None:
+        _index.flush()
+
+
+def index_results(results: List[Dict[str, Any]]) -> None:
+    """Index search result snippets when the local index is enabled; never raises."""
+    try:
+        index = get_local_index()
+        if index is not None:
+            index.add_results(results)
+    except Exception as e:
+        logger.warning("Could not index search results: %r", e)
+
+
+def index_page(url: str, title: str, text: str) -> None:
+    """Index an extracted page when the local index is enabled; never raises."""
+    try:
+        index = get_local_index()
+        if index is not None:
+            index.add(url, title, text)
+    except Exception as e:
+        logger.warning("Could not index %r: %r", url, e)
+
+
+def _result(query: str, score: float, doc: IndexedDoc) -> Dict[str, Any]:
+    body = doc.text
+    if len(body) > EXCERPT_CHARS:
+        body = select_passages(body, query, max_chars=EXCERPT_CHARS).content
+    return {
+        "title": doc.title,
+        "href": doc.url,
+        "body": body,
+        "kind": doc.kind,
+        "score": round(score, 3),
+        "age": int(time.time() - doc.indexed_at),
+    }
+
+
+def search_local(
+    index: LocalIndex,
+    query: str,
+    max_results: int = 10,
+    kind: Optional[str] = None,
+    max_age: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """Search the index and format hits like text search results."""
+    hits = index.search(query, max_results=max_results, kind=kind, max_age=max_age)
+    return [_result(query, score, doc) for score, doc in hits]
+
+
+def mix_local_results(
+    query: str, results: List[Dict[str, Any]], max_results: int
+) -> List[Dict[str, Any]]:
+    """
+    Put fresh local pages matching every query term ahead of upstream results.
+
+    Only applies when LOCAL_INDEX_MIX is on. Local hits are marked
+    ``"source": "local"``, URLs already in ``results`` are not repeated and
+    the list is cut back to ``max_results``. Blocks on the index lock, so
+    async callers run it in a thread; on any index error ``results`` are
+    returned unmixed.
+    """
+    from ..config import local_index_config
+
+    if not local_index_config.MIX_RESULTS:
+        return results
+    try:
+        index = get_local_index()
+        if index is None:
+            return results
+        hits = index.search(
+            query,
+            max_results=local_index_config.MIX_COUNT,
+            kind=PAGE,
+            max_age=local_index_config.FRESH_SECONDS,
+            require_all=True,
+        )
+    except Exception as e:
+        logger.warning("Could not mix local results: %r", e)
+        return results
+    seen = {result.get("href") for result in results}
+    local = [
+        {**_result(query, score, doc), "source": "local"}
+        for score, doc in hits
+        if doc.url not in seen
+    ]
+    return (local + results)[:max_results]
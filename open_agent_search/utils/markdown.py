@@ -0,0 +1,380 @@
+"""
+Streaming HTML to Markdown
+
+``html_to_markdown`` turns a page into Markdown (headings, paragraphs,
+lists, links, emphasis, code, block quotes and tables) in a single pass of
+the stdlib ``HTMLParser``, without building a document tree. Output is
+written block by block as the parser reports tags and text.
+
+Without a tree the Readability scoring of ``parse_html`` is not available,
+so boilerplate is dropped as it streams by: ``script``, ``style``, ``nav``,
+``header``, ``footer`` and ``aside`` elements, form controls (but not the
+text of a ``form``, which some frameworks wrap around the whole page),
+navigation landmarks, and
+containers with a class or id made of a boilerplate word (``comments``,
+``sidebar-left``, ``cookie-banner``, ``wy-breadcrumbs``, ...). If the page
+has a ``<main>`` element, or exactly one ``<article>``, with enough text,
+only its blocks are returned.
+"""
+
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from .structure import _LANGUAGE, _PILCROW
+
+_SKIPPED_TAGS = frozenset(
+    {"script", "style", "nav", "header", "footer", "aside", "noscript", "template", "svg"}
+    | {"iframe", "button", "select", "input", "textarea"}
+)
+_SKIPPED_CLASS = re.compile(
+    r"(^|[-_])(comments?|sidebar|cookie|consent|banner|share|sharing|social|related|advert|ads|"
+    r"popup|modal|breadcrumbs?|newsletter|promo)([-_]|$)",
+    re.I,
+)
+_SKIPPED_ROLES = frozenset({"navigation", "banner", "contentinfo", "complementary", "dialog"})
+_CONTAINER_TAGS = frozenset({"div", "section", "ul", "ol", "table", "span", "p"})
+_VOID_TAGS = frozenset(
+    {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "wbr"}
+)
+_BLOCK_TAGS = frozenset(
+    {
+        "p",
+        "div",
+        "section",
+        "article",
+        "main",
+        "figure",
+        "figcaption",
+        "dl",
+        "dt",
+        "dd",
+        "details",
+        "summary",
+        "address",
+        "form",
+        "fieldset",
+    }
+)
+_HEADINGS = {f"h{level}": level for level in range(1, 7)}
+_INLINE_MARKS = {"strong": "**", "b": "**", "em": "*", "i": "*", "code": "`"}
+_WHITESPACE = re.compile(r"\s+")
+
+MIN_MAIN_CHARS = 200
+
+
+class _MarkdownWriter(HTMLParser):
+    def __init__(self, base_url: str = ""):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.title = ""
+        self.description = ""
+        # Finished blocks; consecutive tight blocks (list items) join with one newline
+        self.blocks: List[Tuple[str, bool]] = []
+        self.inline: List[str] = []
+        self.in_title = False
+        self.skip_tag: Optional[str] = None
+        self.skip_depth = 0
+        self.heading = 0
+        self.quote_depth = 0
+        self.lists: List[List] = []  # [tag, items so far]
+        self.item_marker: Optional[str] = None
+        # Open links, emphasis and code: (tag, inline index, link url)
+        self.spans: List[Tuple[str, int, Optional[str]]] = []
+        self.pre: Optional[List[str]] = None
+        self.pre_language: Optional[str] = None
+        self.table: Optional[List[List[str]]] = None
+        self.cell: Optional[List[str]] = None
+        self.main_depth = 0
+        self.main_span: Optional[List[int]] = None
+        self.article_spans: List[List[int]] = []
+        self.article_depth = 0
+
+    # -- blocks --------------------------------------------------------
+
+    def _flush(self) -> None:
+        """End the current block of inline text."""
+        text = _WHITESPACE.sub(" ", "".join(self.inline)).strip()
+        self.inline = []
+        self.spans = []
+        if not text:
+            return
+        if self.heading:
+            text = "#" * self.heading + " " + _PILCROW.sub("", text)
+        tight = False
+        if self.item_marker is not None:
+            indent = "  " * (len(self.lists) - 1)
+            text = indent + self.item_marker + text
+            self.item_marker = None
+            tight = True
+        self._emit(text, tight)
+
+    def _emit(self, text: str, tight: bool = False) -> None:
+        if self.quote_depth:
+            prefix = "> " * self.quote_depth
+            text = "\n".join(
+                prefix + line if line else prefix.rstrip() for line in text.split("\n")
+            )
+        self.blocks.append((text, tight))
+
+    # -- skipping ------------------------------------------------------
+
+    def _skips(self, tag: str, attrs: Dict[str, Optional[str]]) -> bool:
+        if tag in _SKIPPED_TAGS:
+            return True
+        if (attrs.get("role") or "").lower() in _SKIPPED_ROLES:
+            return True
+        if tag not in _CONTAINER_TAGS:
+            return False
+        names = (attrs.get("class") or "").split() + [attrs.get("id") or ""]
+        return any(name and _SKIPPED_CLASS.search(name) for name in names)
+
+    # -- parser callbacks ----------------------------------------------
+
+    def handle_starttag(self, tag: str, attrs_list) -> None:
+        if self.skip_tag is not None:
+            if tag == self.skip_tag:
+                self.skip_depth += 1
+            return
+        attrs = dict(attrs_list)
+        if tag == "title":
+            self.in_title = True
+            return
+        if tag == "meta":
+            if (attrs.get("name") or "").lower() == "description":
+                self.description = (attrs.get("content") or "").strip()
+            return
+        if self._skips(tag, attrs):
+            if tag not in _VOID_TAGS:
+                self.skip_tag, self.skip_depth = tag, 1
+            return
+        if self.pre is not None:
+            if tag == "code" and self.pre_language is None:
+                self.pre_language = _language(attrs)
+            return
+        if self.cell is not None and tag not in ("td", "th", "tr", "table"):
+            if tag == "br":
+                self.cell.append(" ")
+            return
+
+        if tag in _HEADINGS:
+            self._flush()
+            self.heading = _HEADINGS[tag]
+        elif tag in ("ul", "ol"):
+            self._flush()
+            self.lists.append([tag, 0])
+        elif tag == "li":
+            self._flush()
+            if not self.lists:
+                self.lists.append(["ul", 0])
+            self.lists[-1][1] += 1
+            kind, count = self.lists[-1]
+            self.item_marker = f"{count}. " if kind == "ol" else "- "
+        elif tag == "pre":
+            self._flush()
+            self.pre, self.pre_language = [], _language(attrs)
+        elif tag == "blockquote":
+            self._flush()
+            self.quote_depth += 1
+        elif tag == "table":
+            self._flush()
+            self.table = []
+        elif tag == "tr" and self.table is not None:
+            self.table.append([])
+        elif tag in ("td", "th") and self.table is not None:
+            if not self.table:
+                self.table.append([])
+            self.cell = []
+        elif tag == "hr":
+            self._flush()
+            self._emit("---")
+        elif tag == "br":
+            self.inline.append(" ")
+        elif tag == "a":
+            href = (attrs.get("href") or "").strip()
+            url = None
+            if href and not href.startswith(("#", "javascript:", "mailto:")):
+                url = urljoin(self.base_url, href)
+            self.spans.append((tag, len(self.inline), url))
+        elif tag in _INLINE_MARKS:
+            self.spans.append((tag, len(self.inline), None))
+        elif tag in _BLOCK_TAGS:
+            self._flush()
+            if tag == "main":
+                self._open_region("main")
+            elif tag == "article":
+                self._open_region("article")
+
+    def handle_endtag(self, tag: str) -> None:
+        if self.skip_tag is not None:
+            if tag == self.skip_tag:
+                self.skip_depth -= 1
+                if self.skip_depth <= 0:
+                    self.skip_tag = None
+            return
+        if tag == "title":
+            self.in_title = False
+            return
+        if self.pre is not None:
+            if tag == "pre":
+                code = "".join(self.pre).strip("\n")
+                self.pre = None
+                if code.strip():
+                    fence = "```" if "```" not in code else "~~~"
+                    self._emit(f"{fence}{self.pre_language or ''}\n{code}\n{fence}")
+            return
+        if self.cell is not None and tag in ("td", "th"):
+            text = _WHITESPACE.sub(" ", "".join(self.cell)).strip().replace("|", "\\|")
+            self.table[-1].append(text)
+            self.cell = None
+            return
+        if self.cell is not None:
+            return
+
+        if tag in _HEADINGS:
+            self._flush()
+            self.heading = 0
+        elif tag in ("ul", "ol"):
+            self._flush()
+            if self.lists:
+                self.lists.pop()
+        elif tag == "li":
+            self._flush()
+        elif tag == "blockquote":
+            self._flush()
+            self.quote_depth = max(self.quote_depth - 1, 0)
+        elif tag == "table" and self.table is not None:
+            self._emit_table()
+        elif tag == "a" or tag in _INLINE_MARKS:
+            self._close_span(tag)
+        elif tag in _BLOCK_TAGS:
+            self._flush()
+            if tag == "main":
+                self._close_region("main")
+            elif tag == "article":
+                self._close_region("article")
+
+    def handle_startendtag(self, tag: str, attrs) -> None:
+        self.handle_starttag(tag, attrs)
+        if tag not in _VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_data(self, data: str) -> None:
+        if self.skip_tag is not None:
+            return
+        if self.in_title:
+            self.title += data
+        elif self.pre is not None:
+            self.pre.append(data)
+        elif self.cell is not None:
+            self.cell.append(data)
+        else:
+            self.inline.append(data)
+
+    def _close_span(self, tag: str) -> None:
+        """Wrap the text since the matching open tag in its Markdown markup."""
+        for position in range(len(self.spans) - 1, -1, -1):
+            if self.spans[position][0] == tag:
+                break
+        else:
+            return
+        _, start, url = self.spans[position]
+        del self.spans[position:]
+        raw = "".join(self.inline[start:])
+        text = _WHITESPACE.sub(" ", raw).strip()
+        if not text:
+            return
+        if tag == "a":
+            if not url:
+                return
+            text = f"[{text}]({url})"
+        else:
+            mark = _INLINE_MARKS[tag]
+            text = mark + text + mark
+        # Whitespace stays outside the markup, where Markdown expects it
+        before = " " if raw[:1].isspace() else ""
+        after = " " if raw[-1:].isspace() else ""
+        self.inline[start:] = [before + text + after]
+
+    # -- regions and tables --------------------------------------------
+
+    def _open_region(self, tag: str) -> None:
+        if tag == "main":
+            self.main_depth += 1
+            if self.main_depth == 1 and self.main_span is None:
+                self.main_span = [len(self.blocks), -1]
+        else:
+            self.article_depth += 1
+            if self.article_depth == 1:
+                self.article_spans.append([len(self.blocks), -1])
+
+    def _close_region(self, tag: str) -> None:
+        if tag == "main" and self.main_depth:
+            self.main_depth -= 1
+            if self.main_depth == 0 and self.main_span is not None and self.main_span[1] < 0:
+                self.main_span[1] = len(self.blocks)
+        elif tag == "article" and self.article_depth:
+            self.article_depth -= 1
+            if self.article_depth == 0:
+                self.article_spans[-1][1] = len(self.blocks)
+
+    def _emit_table(self) -> None:
+        rows = [row for row in self.table or [] if any(row)]
+        self.table = None
+        if not rows:
+            return
+        width = max(len(row) for row in rows)
+        rows = [row + [""] * (width - len(row)) for row in rows]
+        lines = ["| " + " | ".join(rows[0]) + " |", "|" + " --- |" * width]
+        lines.extend("| " + " | ".join(row) + " |" for row in rows[1:])
+        self._emit("\n".join(lines))
+
+    def markdown(self) -> str:
+        self._flush()
+        blocks = self.blocks
+        span = self.main_span
+        if span is None and len(self.article_spans) == 1:
+            span = self.article_spans[0]
+        if span is not None:
+            end = span[1] if span[1] >= 0 else len(blocks)
+            region = blocks[span[0] : end]
+            if sum(len(text) for text, _ in region) >= MIN_MAIN_CHARS:
+                blocks = region
+        parts: List[str] = []
+        previous_tight = False
+        for text, tight in blocks:
+            if parts:
+                parts.append("\n" if tight and previous_tight else "\n\n")
+            parts.append(text)
+            previous_tight = tight
+        return "".join(parts)
+
+
+def _language(attrs: Dict[str, Optional[str]]) -> Optional[str]:
+    for name in (attrs.get("class") or "").split():
+        match = _LANGUAGE.match(name)
+        if match and match.group(1).lower() not in ("default", "none", "text"):
+            return match.group(1).lower()
+    return None
+
+
+def html_to_markdown(html_text: str, url: str = "") -> Tuple[str, str, str]:
+    """
+    Convert an HTML page to Markdown in one streaming pass.
+
+    Returns:
+        Tuple of (title, description, markdown content)
+    """
+    writer = _MarkdownWriter(url)
+    writer.feed(html_text)
+    writer.close()
+    return _WHITESPACE.sub(" ", writer.title).strip(), writer.description, writer.markdown()
+
+
+def close_fences(markdown: str) -> str:
+    """Close a code fence left open by trimming."""
+    fences = [line for line in markdown.split("\n") if line.startswith(("```", "~~~"))]
+    if len(fences) % 2:
+        return markdown + "\n" + fences[-1][:3]
+    return markdown
@@ -0,0 +1,351 @@
+"""
+Prometheus-style Metrics
+
+A small, dependency-free metrics registry that renders the Prometheus text
+exposition format (version 0.0.4). Metrics are process-local and thread-safe,
+so controllers running in the thread pool can record into them directly.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .timing import current_timings
+
+# Latency buckets in seconds, tuned for upstream search and page fetches
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Upper bound on label combinations per metric. Fetched hosts are unbounded,
+# so anything past this limit is folded into a single "other" series.
+MAX_SERIES_PER_METRIC = 500
+
+_OVERFLOW_LABEL = "other"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    """Base class for labelled metrics."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str], series: Dict) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        if key not in series and len(series) >= MAX_SERIES_PER_METRIC:
+            key = tuple(_OVERFLOW_LABEL for _ in self.labelnames)
+        return key
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        if not self.labelnames:
+            self._values[()] = 0.0
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only be incremented")
+        with self._lock:
+            key = self._key(labels, self._values)
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        return self._values.get(key, 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        if not self.labelnames:
+            self._values[()] = 0.0
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels, self._values)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        with self._lock:
+            key = self._key(labels, self._values)
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        return self._values.get(key, 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed bucket boundaries."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Per series: [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        with self._lock:
+            key = self._key(labels, self._values)
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the wall-clock duration of the enclosed block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> float:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        series = self._values.get(key)
+        return series[-1] if series else 0.0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._values.items())
+        lines = []
+        for key, series in items:
+            cumulative = 0.0
+            for bound, bucket_count in zip(self.buckets, series):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                labels = _format_labels(self.labelnames, key, le)
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(series[-1])}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together on scrape."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# Service metrics
+http_request_duration = REGISTRY.register(
+    Histogram(
+        "oas_http_request_duration_seconds",
+        "HTTP request latency by route template.",
+        ("method", "route", "status"),
+    )
+)
+search_duration = REGISTRY.register(
+    Histogram(
+        "oas_search_duration_seconds",
+        "Upstream DDGS search latency by search type and backend.",
+        ("search_type", "backend"),
+    )
+)
+fetch_duration = REGISTRY.register(
+    Histogram(
+        "oas_fetch_duration_seconds",
+        "Content fetch latency by fetcher.",
+        ("fetcher",),
+    )
+)
+upstream_errors = REGISTRY.register(
+    Counter(
+        "oas_upstream_errors_total",
+        "Upstream errors by source and exception class.",
+        ("source", "exception"),
+    )
+)
+executor_queue_depth = REGISTRY.register(
+    Gauge(
+        "oas_executor_queue_depth",
+        "Jobs submitted to the thread pool that have not started running yet.",
+    )
+)
+executor_jobs_running = REGISTRY.register(
+    Gauge(
+        "oas_executor_jobs_running",
+        "Jobs currently running in the thread pool.",
+    )
+)
+bytes_downloaded = REGISTRY.register(
+    Counter(
+        "oas_content_bytes_downloaded_total",
+        "Bytes downloaded by the content fetcher.",
+        ("fetcher",),
+    )
+)
+
+cache_requests = REGISTRY.register(
+    Counter(
+        "oas_cache_requests_total",
+        "Result cache lookups by namespace and outcome.",
+        ("namespace", "result"),
+    )
+)
+
+circuits_open = REGISTRY.register(
+    Gauge(
+        "oas_circuits_open",
+        "Circuit breakers currently open or half-open, by kind (search or fetch).",
+        ("kind",),
+    )
+)
+circuit_transitions = REGISTRY.register(
+    Counter(
+        "oas_circuit_transitions_total",
+        "Circuit breaker state changes by kind and new state.",
+        ("kind", "state"),
+    )
+)
+circuit_rejections = REGISTRY.register(
+    Counter(
+        "oas_circuit_rejections_total",
+        "Calls rejected without reaching upstream because their circuit was open.",
+        ("kind",),
+    )
+)
+
+prefetches = REGISTRY.register(
+    Counter(
+        "oas_prefetch_total",
+        "Next-page prefetches by namespace and outcome.",
+        ("namespace", "outcome"),
+    )
+)
+
+
+def record_upstream_error(source: str, exc: BaseException) -> None:
+    """Count an upstream failure under its exception class name."""
+    upstream_errors.inc(source=source, exception=type(exc).__name__)
+
+
+@contextmanager
+def track_search(search_type: str, backend: str) -> Iterator[None]:
+    """Time a DDGS search call and count the exception class if it fails.
+
+    The duration is also recorded as the ``search.<type>`` request phase.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        record_upstream_error(f"search:{search_type}", e)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        search_duration.observe(elapsed, search_type=search_type, backend=backend)
+        timings = current_timings()
+        if timings is not None:
+            timings.add(f"search.{search_type}", elapsed)
+
+
+def render_latest() -> str:
+    """Render every registered metric in the Prometheus text format."""
+    return REGISTRY.render()
@@ -0,0 +1,132 @@
+"""
+Query-Relevant Passages
+
+Instead of keeping the head of a page, ``select_passages`` splits the
+extracted text into passages of a few hundred characters, ranks them with
+BM25 against the query and keeps the best ones that fit the character (or
+token) budget, in page order. Skipped text between kept passages is marked
+with ``[...]``. When no passage matches the query, the head of the page is
+kept, as without a query.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from .bm25 import BM25, tokenize
+from .tokens import estimate_tokens, token_offset
+
+PASSAGE_CHARS = 500
+GAP = "\n[...]\n"
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass
+class PassageSelection:
+    content: str
+    selected: int
+    total: int
+
+
+def _split_long(line: str, size: int) -> List[str]:
+    """Split an over-long line into chunks of whole sentences (or hard cuts)."""
+    if len(line) <= size:
+        return [line]
+    chunks: List[str] = []
+    current = ""
+    for sentence in _SENTENCE_END.split(line):
+        while len(sentence) > size:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(sentence[:size])
+            sentence = sentence[size:]
+        if current and len(current) + 1 + len(sentence) > size:
+            chunks.append(current)
+            current = ""
+        current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_passages(text: str, size: int = PASSAGE_CHARS) -> List[str]:
+    """Group the lines of extracted text into passages of about ``size`` characters."""
+    passages: List[str] = []
+    current: List[str] = []
+    length = 0
+    for line in text.split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        for piece in _split_long(line, size):
+            if current and length + len(piece) > size:
+                passages.append("\n".join(current))
+                current, length = [], 0
+            current.append(piece)
+            length += len(piece) + 1
+    if current:
+        passages.append("\n".join(current))
+    return passages
+
+
+def select_passages(
+    text: str,
+    query: str,
+    max_chars: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+) -> PassageSelection:
+    """
+    Keep the passages of ``text`` that best match ``query`` within the budget.
+
+    The budget is ``max_tokens`` tokens when given, otherwise ``max_chars``
+    characters; with both, both apply.
+    """
+    passages = split_passages(text)
+    if not passages:
+        return PassageSelection("", 0, 0)
+
+    costs: List[Callable[[str], int]] = []
+    limits: List[int] = []
+    if max_tokens is not None:
+        costs.append(estimate_tokens)
+        limits.append(max_tokens)
+    if max_chars is not None or max_tokens is None:
+        costs.append(len)
+        limits.append(max_chars if max_chars is not None else len(text))
+    gap_costs = [cost(GAP) for cost in costs]
+
+    scores = BM25(tokenize(passage) for passage in passages).scores(tokenize(query))
+    # Best first; ties (including "no match") in page order
+    ranked = sorted(range(len(passages)), key=lambda i: (-scores[i], i))
+    matched = scores[ranked[0]] > 0
+
+    used = [0] * len(costs)
+    chosen: List[int] = []
+    for i in ranked:
+        if matched and scores[i] <= 0:
+            break
+        passage_costs = [cost(passages[i]) + gap for cost, gap in zip(costs, gap_costs)]
+        if all(u + c <= limit for u, c, limit in zip(used, passage_costs, limits)):
+            chosen.append(i)
+            used = [u + c for u, c in zip(used, passage_costs)]
+        elif not matched:
+            break  # head of the page: stop at the first passage that does not fit
+
+    if not chosen:
+        # Even the best passage is over budget: keep its beginning
+        best = passages[ranked[0]]
+        end = len(best)
+        if max_tokens is not None:
+            end = token_offset(best, max_tokens)
+        if max_chars is not None:
+            end = min(end, max_chars)
+        return PassageSelection(best[:end], 1, len(passages))
+
+    chosen.sort()
+    parts = [passages[chosen[0]]]
+    for previous, index in zip(chosen, chosen[1:]):
+        parts.append("\n" if index == previous + 1 else GAP)
+        parts.append(passages[index])
+    return PassageSelection("".join(parts), len(chosen), len(passages))
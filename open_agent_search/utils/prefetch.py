@@ -0,0 +1,112 @@
+"""
+Speculative Next-Page Prefetch
+
+After a paginated search is served, page N+1 is fetched in the background
+and stored in the result cache, so an agent paging through results gets the
+next page from the cache.
+
+Prefetches never compete with foreground work:
+
+- they run on their own small executor, never the request thread pool;
+- they are skipped while foreground jobs are queued in the request pool;
+- at most ``max_inflight`` run at once and at most ``per_minute`` start per
+  minute (a token bucket), bounding the extra upstream load.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from .metrics import executor_queue_depth, prefetches
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+def in_prefetch() -> bool:
+    """True while running inside a prefetch job (prefetches do not chain)."""
+    return getattr(_local, "active", False)
+
+
+class Prefetcher:
+    """Low-priority background runner with an in-flight cap and a rate budget."""
+
+    def __init__(self, workers: int = 1, max_inflight: int = 2, per_minute: int = 30):
+        self.workers = workers
+        self.max_inflight = max_inflight
+        self.per_minute = per_minute
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._pending: set = set()
+        self._tokens = float(per_minute)
+        self._refilled_at = time.monotonic()
+
+    def _take_token(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(
+            float(self.per_minute),
+            self._tokens + (now - self._refilled_at) * self.per_minute / 60,
+        )
+        self._refilled_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def submit(self, namespace: str, key: str, func: Callable[..., Any], kwargs: Dict) -> bool:
+        """Schedule ``func(**kwargs)`` unless the budget or foreground load says no."""
+        if executor_queue_depth.value() > 0:
+            prefetches.inc(namespace=namespace, outcome="skipped_busy")
+            return False
+        with self._lock:
+            if key in self._pending:
+                return False
+            if self._inflight >= self.max_inflight or not self._take_token():
+                prefetches.inc(namespace=namespace, outcome="skipped_budget")
+                return False
+            self._inflight += 1
+            self._pending.add(key)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="oas-prefetch"
+                )
+        prefetches.inc(namespace=namespace, outcome="scheduled")
+        self._executor.submit(self._run, namespace, key, func, kwargs)
+        return True
+
+    def _run(self, namespace: str, key: str, func: Callable[..., Any], kwargs: Dict) -> None:
+        _local.active = True
+        try:
+            func(**kwargs)
+            prefetches.inc(namespace=namespace, outcome="done")
+        except Exception as e:
+            prefetches.inc(namespace=namespace, outcome="failed")
+            logger.debug("Prefetch %s failed: %r", namespace, e)
+        finally:
+            _local.active = False
+            with self._lock:
+                self._inflight -= 1
+                self._pending.discard(key)
+
+
+_prefetcher: Optional[Prefetcher] = None
+
+
+def get_prefetcher() -> Optional[Prefetcher]:
+    """Return the process-wide prefetcher, or None when prefetch is disabled."""
+    global _prefetcher
+    from ..config import prefetch_config
+
+    if not prefetch_config.ENABLED:
+        return None
+    if _prefetcher is None:
+        _prefetcher = Prefetcher(
+            workers=prefetch_config.WORKERS,
+            max_inflight=prefetch_config.MAX_INFLIGHT,
+            per_minute=prefetch_config.PER_MINUTE,
+        )
+    return _prefetcher
@@ -0,0 +1,170 @@
+"""
+Sampling CPU Profiler
+
+A low-overhead wall-clock sampler built on ``sys._current_frames()``. A
+background thread snapshots the Python stack of every thread (event loop and
+thread-pool workers alike) at a fixed interval and aggregates identical
+stacks. Output is the "collapsed stack" format understood by flamegraph.pl,
+speedscope and inferno: ``thread;frame;frame;...;leaf count`` per line.
+
+Two modes are supported:
+
+- On-demand: ``profile_for(seconds)`` samples all threads for N seconds.
+- Request sampling: a fraction of requests (``PROFILE_SAMPLE_RATE``) keep the
+  shared ``request_sampler`` running while they are in flight, so its dump
+  covers busy periods of sampled traffic only.
+"""
+
+import asyncio
+import os
+import random
+import sys
+import threading
+from typing import Dict, Optional, Tuple
+
+# Leaf frames of threads that are parked rather than doing work. Samples that
+# end in one of these are dropped unless idle stacks are requested.
+_IDLE_LEAVES = {
+    ("threading.py", "Condition.wait"),
+    ("threading.py", "Event.wait"),
+    ("selectors.py", "EpollSelector.select"),
+    ("selectors.py", "KqueueSelector.select"),
+    ("selectors.py", "SelectSelector.select"),
+    ("thread.py", "_worker"),
+    ("queue.py", "Queue.get"),
+}
+
+
+def _frame_label(code) -> Tuple[str, str]:
+    return os.path.basename(code.co_filename), code.co_qualname
+
+
+class StackSampler:
+    """Periodically sample every thread's stack and count collapsed stacks."""
+
+    def __init__(
+        self,
+        interval: float = 0.01,
+        max_depth: int = 64,
+        max_stacks: int = 20000,
+        include_idle: bool = False,
+    ):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.max_stacks = max_stacks
+        self.include_idle = include_idle
+        self.samples = 0
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._users = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        with self._lock:
+            if self.running:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="oas-stack-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=1)
+
+    def acquire(self) -> None:
+        """Register an interested caller; the sampler runs while any are active."""
+        with self._lock:
+            self._users += 1
+            start = self._users == 1
+        if start:
+            self.start()
+
+    def release(self) -> None:
+        with self._lock:
+            self._users = max(0, self._users - 1)
+            stop = self._users == 0
+        if stop:
+            self.stop()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample_once()
+
+    def sample_once(self) -> None:
+        """Take one snapshot of all threads except the sampler itself."""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        me = threading.get_ident()
+        stacks = []
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            leaf = _frame_label(frame.f_code)
+            if not self.include_idle and leaf in _IDLE_LEAVES:
+                continue
+            labels = []
+            depth = 0
+            while frame is not None and depth < self.max_depth:
+                filename, qualname = _frame_label(frame.f_code)
+                labels.append(f"{filename}:{qualname}")
+                frame = frame.f_back
+                depth += 1
+            labels.append(names.get(ident, f"thread-{ident}").replace(" ", "_"))
+            stacks.append(";".join(reversed(labels)))
+
+        with self._lock:
+            self.samples += 1
+            for stack in stacks:
+                if stack in self._counts or len(self._counts) < self.max_stacks:
+                    self._counts[stack] = self._counts.get(stack, 0) + 1
+                else:
+                    self._counts["[truncated]"] = self._counts.get("[truncated]", 0) + 1
+
+    def collapsed(self) -> str:
+        """Render aggregated samples in collapsed-stack format."""
+        with self._lock:
+            items = sorted(self._counts.items())
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self.samples = 0
+
+
+async def profile_for(
+    seconds: float, interval: float = 0.01, include_idle: bool = False
+) -> StackSampler:
+    """Sample every thread for ``seconds`` without blocking the event loop."""
+    sampler = StackSampler(interval=interval, include_idle=include_idle)
+    sampler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        sampler.stop()
+    return sampler
+
+
+class RequestSampling:
+    """Decides which requests are profiled and keeps the shared sampler running for them."""
+
+    def __init__(self, sampler: StackSampler, rate: float):
+        self.sampler = sampler
+        self.rate = rate
+
+    def begin(self) -> bool:
+        """Return True (and start sampling) if this request was selected."""
+        if self.rate <= 0 or random.random() >= self.rate:
+            return False
+        self.sampler.acquire()
+        return True
+
+    def end(self, sampled: bool) -> None:
+        if sampled:
+            self.sampler.release()
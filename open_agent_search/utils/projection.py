@@ -0,0 +1,31 @@
+"""
+Result Field Projection
+
+Search results carry every field the upstream engine returns. ``fields`` lets
+a caller keep only the keys it needs (e.g. ``title,href,body``), which
+shrinks the response, its serialization time and the tokens an LLM spends
+reading it. Projection happens after the cache, so cached entries always
+hold full results.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+
+def parse_fields(value: Union[str, Iterable[str], None]) -> Optional[List[str]]:
+    """
+    Normalize a comma-separated string or a list of field names.
+
+    Returns None (keep every field) when nothing is requested.
+    """
+    if value is None:
+        return None
+    parts = value.split(",") if isinstance(value, str) else value
+    names = [name.strip() for name in parts if name and name.strip()]
+    return list(dict.fromkeys(names)) or None
+
+
+def project(results: List[Dict[str, Any]], fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+    """Keep only ``fields`` in each result; keys a result lacks are skipped."""
+    if not fields:
+        return results
+    return [{name: result[name] for name in fields if name in result} for result in results]
@@ -0,0 +1,414 @@
+"""
+Main-Content Extraction
+
+``parse_html`` used to return the text of ``<main>``, ``<article>`` or
+``<body>``, which on many sites is mostly menus, cookie banners and related
+links. ``main_content`` scores the page the way Readability does instead:
+
+- Every paragraph-like element (``p``, ``pre``, ``td``, ``li``, text-holding
+  ``div`` ...) with at least 25 characters of its own text scores
+  ``1 + commas + min(length / 100, 3)``, credited to its parent and half of
+  it to its grandparent.
+- Candidates start from a bonus for their tag and for class or id names that
+  hint at content (``article``, ``post``, ``content``) or boilerplate
+  (``comment``, ``sidebar``, ``share``), and their score is scaled by
+  ``1 - link density``.
+- The best candidate is kept, with siblings scoring at least a fifth of it.
+
+Text, link and comma counts are gathered in one iterative pass over the tree,
+so the cost stays linear on deeply nested pages, and stripped elements
+(``script``, ``nav``, ...) are skipped rather than removed from the tree.
+
+``SiteTemplates`` learns per host which element held the content and which
+blocks of text (whole paragraphs, list items or headings such as "Edit this
+page" or a footer notice) recur on most pages. Once the same element was
+picked on two pages, later pages of the host go straight to it without
+scoring, and the recurring blocks are dropped from the text. Words inside a
+block, such as link text or code tokens, and ``pre`` contents are never
+learned on their own.
+"""
+
+import hashlib
+import re
+import threading
+from collections import Counter, OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Sequence, Set, Tuple
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4.element import CData
+
+# Elements whose text is never content
+STRIPPED_TAGS = frozenset(
+    {"script", "style", "nav", "footer", "header", "noscript", "template", "svg", "iframe"}
+)
+_PARAGRAPH_TAGS = frozenset(
+    {"p", "pre", "td", "blockquote", "li", "dd", "div", "section", "article", "main"}
+)
+_TAG_BONUS = {
+    "article": 10,
+    "main": 10,
+    "div": 5,
+    "section": 5,
+    "pre": 3,
+    "td": 3,
+    "blockquote": 3,
+    "ul": -3,
+    "ol": -3,
+    "li": -3,
+    "form": -3,
+    "dl": -3,
+    "th": -5,
+}
+_POSITIVE = re.compile(
+    r"article|body|content|entry|main|page|post|text|blog|story|prose|markdown|document", re.I
+)
+_NEGATIVE = re.compile(
+    r"comment|footer|menu|nav|sidebar|sponsor|share|social|related|promo|banner|cookie|"
+    r"consent|popup|modal|breadcrumb|advert|widget|masthead|toc|pagination",
+    re.I,
+)
+# Elements that start a new block of text; everything else is inline
+_BLOCK_TAGS = frozenset(
+    _PARAGRAPH_TAGS
+    | {"h1", "h2", "h3", "h4", "h5", "h6", "ul", "ol", "dl", "dt", "table", "tr", "th"}
+    | {"caption", "figure", "figcaption", "aside", "form", "fieldset", "hr", "br", "address"}
+)
+_SELECTOR_NAME = re.compile(r"^[A-Za-z_][\w-]*$")
+
+MIN_PARAGRAPH_CHARS = 25
+MIN_CONTENT_CHARS = 200
+
+
+class _Stats:
+    __slots__ = ("tag", "text", "links", "own", "commas")
+
+    def __init__(self, tag: Tag):
+        self.tag = tag
+        self.text = 0  # characters in the subtree
+        self.links = 0  # characters inside links in the subtree
+        self.own = 0  # characters not inside a nested paragraph
+        self.commas = 0
+
+    @property
+    def link_density(self) -> float:
+        return self.links / self.text if self.text else 0.0
+
+
+def _is_text(node: object) -> bool:
+    return isinstance(node, NavigableString) and (
+        type(node) is NavigableString or isinstance(node, CData)
+    )
+
+
+def _measure(root: Tag) -> Dict[int, _Stats]:
+    """Text, link and own-paragraph counts of every element under ``root``, in one pass."""
+    stats: Dict[int, _Stats] = {}
+    root_stats = stats[id(root)] = _Stats(root)
+    # (element, its stats, remaining children, inside a link, nearest paragraph's stats)
+    stack = [(root, root_stats, iter(root.contents), False, root_stats)]
+    while stack:
+        tag, tag_stats, children, in_link, paragraph = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            if stack:
+                parent_stats = stack[-1][1]
+                parent_stats.text += tag_stats.text
+                parent_stats.links += tag_stats.links
+            continue
+        if isinstance(child, Tag):
+            if child.name in STRIPPED_TAGS:
+                continue
+            child_stats = stats[id(child)] = _Stats(child)
+            child_link = in_link or child.name == "a"
+            child_paragraph = child_stats if child.name in _PARAGRAPH_TAGS else paragraph
+            stack.append((child, child_stats, iter(child.contents), child_link, child_paragraph))
+        elif _is_text(child):
+            length = len(child.strip())
+            if length:
+                tag_stats.text += length
+                if in_link:
+                    tag_stats.links += length
+                paragraph.own += length
+                paragraph.commas += child.count(",")
+    return stats
+
+
+def _class_weight(tag: Tag) -> int:
+    weight = 0
+    for value in (" ".join(tag.get("class") or ()), tag.get("id") or ""):
+        if not value:
+            continue
+        if _NEGATIVE.search(value):
+            weight -= 25
+        if _POSITIVE.search(value):
+            weight += 25
+    return weight
+
+
+def _score(stats: Dict[int, _Stats]) -> Dict[int, float]:
+    """Readability score of every candidate element."""
+    scores: Dict[int, float] = {}
+
+    def credit(tag: Optional[Tag], points: float) -> None:
+        if tag is None or not tag.name or tag.name in ("html", "[document]"):
+            return
+        key = id(tag)
+        if key not in scores:
+            scores[key] = _TAG_BONUS.get(tag.name, 0) + _class_weight(tag)
+        scores[key] += points
+
+    for entry in stats.values():
+        if entry.tag.name not in _PARAGRAPH_TAGS or entry.own < MIN_PARAGRAPH_CHARS:
+            continue
+        points = 1 + entry.commas + min(entry.own / 100, 3)
+        parent = entry.tag.parent
+        credit(parent, points)
+        credit(parent.parent if parent is not None else None, points / 2)
+
+    for key in scores:
+        entry = stats.get(key)
+        if entry is not None:
+            scores[key] *= 1 - entry.link_density
+    return scores
+
+
+def _selector(tag: Tag) -> Optional[str]:
+    """A CSS selector finding ``tag`` again on another page of the site."""
+    element_id = tag.get("id")
+    if element_id and _SELECTOR_NAME.match(element_id) and not re.search(r"\d{3}", element_id):
+        return f"{tag.name}#{element_id}"
+    classes = [c for c in tag.get("class") or () if _SELECTOR_NAME.match(c)]
+    if classes:
+        return tag.name + "".join(f".{c}" for c in classes)
+    if tag.name in ("main", "article"):
+        return tag.name
+    return None
+
+
+class _Block:
+    """Text lines of one block-level run of a page, e.g. a paragraph or list item."""
+
+    __slots__ = ("lines", "code")
+
+    def __init__(self, code: bool = False):
+        self.lines: List[str] = []
+        self.code = code
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.lines)
+
+
+def text_blocks(elements: Sequence[Tag]) -> List[_Block]:
+    """
+    Stripped, non-empty text lines of ``elements`` grouped into blocks, skipping
+    ``STRIPPED_TAGS``. Links, emphasis and other inline elements stay part of
+    the block around them; ``pre`` contents form a code block.
+    """
+    blocks: List[_Block] = []
+    current = _Block()
+    for element in elements:
+        # (children, whether leaving this level ends a block)
+        stack = [(iter(element.contents), False)]
+        while stack:
+            children, is_block = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                if is_block and current.lines:
+                    blocks.append(current)
+                    current = _Block()
+            elif isinstance(child, Tag):
+                if child.name in STRIPPED_TAGS:
+                    continue
+                is_block = child.name in _BLOCK_TAGS
+                if is_block and current.lines:
+                    blocks.append(current)
+                    current = _Block()
+                if child.name == "pre":
+                    current.code = True
+                stack.append((iter(child.contents), is_block))
+            elif _is_text(child):
+                line = child.strip()
+                if line:
+                    current.lines.append(line)
+        if current.lines:
+            blocks.append(current)
+            current = _Block()
+    return blocks
+
+
+def text_lines(elements: Sequence[Tag]) -> List[str]:
+    """Stripped, non-empty text lines of ``elements``, skipping ``STRIPPED_TAGS``."""
+    return [line for block in text_blocks(elements) for line in block.lines]
+
+
+def _line_hash(line: str) -> bytes:
+    return hashlib.blake2b(line.encode(), digest_size=8).digest()
+
+
+class SiteTemplate:
+    """What was learned about one host's page layout."""
+
+    __slots__ = ("pages", "lines", "selector", "selector_hits", "urls")
+
+    def __init__(self):
+        self.pages = 0
+        self.lines: Counter = Counter()  # line hash -> pages it appeared on
+        self.selector: Optional[str] = None
+        self.selector_hits = 0
+        self.urls: Deque[str] = deque(maxlen=64)
+
+    def boilerplate(self, min_pages: int = 3, share: float = 0.6) -> Set[bytes]:
+        """Hashes of lines found on at least ``share`` of the pages seen."""
+        if self.pages < min_pages:
+            return set()
+        needed = max(2, share * self.pages)
+        return {line for line, count in self.lines.items() if count >= needed}
+
+
+class SiteTemplates:
+    """Bounded LRU of site templates by host. Thread-safe."""
+
+    def __init__(self, max_hosts: int = 512, max_lines: int = 4096):
+        self.max_hosts = max_hosts
+        self.max_lines = max_lines
+        self._hosts: "OrderedDict[str, SiteTemplate]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, host: str) -> Optional[SiteTemplate]:
+        with self._lock:
+            template = self._hosts.get(host)
+            if template is not None:
+                self._hosts.move_to_end(host)
+            return template
+
+    def learn(self, host: str, url: str, lines: Sequence[str], selector: Optional[str]) -> None:
+        """Record the block texts and content element of one page of ``host``."""
+        if not host:
+            return
+        hashes = {_line_hash(line) for line in lines}
+        with self._lock:
+            template = self._hosts.get(host)
+            if template is None:
+                template = self._hosts[host] = SiteTemplate()
+                while len(self._hosts) > self.max_hosts:
+                    self._hosts.popitem(last=False)
+            self._hosts.move_to_end(host)
+            if url in template.urls:
+                return  # the same page again says nothing about the layout
+            template.urls.append(url)
+            template.pages += 1
+            template.lines.update(hashes)
+            if len(template.lines) > self.max_lines:
+                template.lines = Counter(dict(template.lines.most_common(self.max_lines // 2)))
+            if selector is not None and selector == template.selector:
+                template.selector_hits += 1
+            else:
+                template.selector, template.selector_hits = selector, 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._hosts.clear()
+
+    def __len__(self) -> int:
+        return len(self._hosts)
+
+
+_templates: Optional[SiteTemplates] = None
+_templates_lock = threading.Lock()
+
+
+def get_site_templates() -> Optional[SiteTemplates]:
+    """Process-wide site templates, or None when they are disabled."""
+    global _templates
+    from ..config import fetch_config
+
+    if not fetch_config.SITE_TEMPLATES:
+        return None
+    if _templates is None:
+        with _templates_lock:
+            if _templates is None:
+                _templates = SiteTemplates(max_hosts=fetch_config.TEMPLATE_MAX_HOSTS)
+    return _templates
+
+
+def _fallback(soup: BeautifulSoup) -> List[Tag]:
+    element = soup.find("main") or soup.find("article") or soup.find("body")
+    return [element] if element is not None else [soup]
+
+
+def main_content(soup: BeautifulSoup) -> Tuple[List[Tag], Optional[str]]:
+    """
+    Elements holding the main content of a page, by Readability scoring.
+
+    Returns:
+        Tuple of (elements in document order, selector of the top element)
+    """
+    stats = _measure(soup)
+    scores = _score(stats)
+    if not scores:
+        return _fallback(soup), None
+    top_key = max(scores, key=scores.__getitem__)
+    top = stats[top_key].tag
+    if stats[top_key].text < MIN_CONTENT_CHARS:
+        return _fallback(soup), None
+
+    threshold = max(10.0, scores[top_key] * 0.2)
+    elements: List[Tag] = []
+    parent = top.parent
+    siblings = parent.contents if parent is not None else [top]
+    for sibling in siblings:
+        if not isinstance(sibling, Tag) or sibling.name in STRIPPED_TAGS:
+            continue
+        if sibling is top or scores.get(id(sibling), 0.0) >= threshold:
+            elements.append(sibling)
+            continue
+        entry = stats.get(id(sibling))
+        if (
+            sibling.name == "p"
+            and entry is not None
+            and entry.text >= 80
+            and entry.link_density < 0.25
+        ):
+            elements.append(sibling)
+    return elements, _selector(top)
+
+
+def extract_main(soup: BeautifulSoup, url: str = "", host: str = "") -> Tuple[str, List[Tag]]:
+    """
+    Main content of a page, using and updating the host's template.
+
+    Returns:
+        Tuple of (text lines joined by newlines, the elements they came from)
+    """
+    templates = get_site_templates() if host else None
+    template = templates.get(host) if templates is not None else None
+
+    elements: Optional[List[Tag]] = None
+    selector: Optional[str] = None
+    if template is not None and template.selector and template.selector_hits >= 2:
+        matches = soup.select(template.selector, limit=2)
+        if len(matches) == 1:
+            blocks = text_blocks(matches)
+            if sum(len(line) for block in blocks for line in block.lines) >= MIN_CONTENT_CHARS:
+                elements, selector = matches, template.selector
+    if elements is None:
+        elements, selector = main_content(soup)
+        blocks = text_blocks(elements)
+
+    # Boilerplate is learned and dropped as whole blocks, never as inline
+    # fragments (a link's text, a highlighted code token) or code
+    texts = [block.text for block in blocks if not block.code]
+    if templates is not None:
+        templates.learn(host, url, texts, selector)
+        template = template or templates.get(host)
+    if template is not None:
+        boilerplate = template.boilerplate()
+        if boilerplate:
+            kept = [
+                block for block in blocks if block.code or _line_hash(block.text) not in boilerplate
+            ]
+            blocks = kept or blocks
+    return "\n".join(line for block in blocks for line in block.lines), elements
@@ -0,0 +1,125 @@
+"""
+robots.txt Rules
+
+Crawls obey the robots.txt of the site they walk. Rules are parsed with the
+stdlib ``RobotFileParser`` and kept per site (scheme, host and port) for
+``CRAWL_ROBOTS_TTL_SECONDS``, so crawls of the same site share one download.
+
+Following RFC 9309, a missing robots.txt (any 4xx) allows everything, while
+a server error or an unreachable robots.txt disallows everything. Such rules
+are marked ``reachable = False`` so callers can report the failure, and
+retry later, instead of caching it as the site's answer.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+# Size of robots.txt read, as suggested by RFC 9309
+MAX_ROBOTS_BYTES = 500 * 1024
+
+
+def site_of(url: str) -> str:
+    """``scheme://host[:port]`` of a URL, the scope robots.txt rules apply to."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def robots_url(url: str) -> str:
+    return site_of(url) + "/robots.txt"
+
+
+class RobotsRules:
+    """What a site's robots.txt allows one user agent to fetch."""
+
+    def __init__(self, parser: RobotFileParser, user_agent: str, reachable: bool = True):
+        self._parser = parser
+        self.user_agent = user_agent
+        self.reachable = reachable
+
+    @classmethod
+    def parse(cls, text: str, user_agent: str) -> "RobotsRules":
+        parser = RobotFileParser()
+        parser.parse(text.splitlines())
+        return cls(parser, user_agent)
+
+    @classmethod
+    def from_status(cls, status_code: int, text: str, user_agent: str) -> "RobotsRules":
+        """Rules for a robots.txt response (RFC 9309 status handling)."""
+        parser = RobotFileParser()
+        if status_code == 200:
+            parser.parse(text[:MAX_ROBOTS_BYTES].splitlines())
+        elif 400 <= status_code < 500:
+            parser.allow_all = True
+        else:
+            return cls.unreachable(user_agent)
+        return cls(parser, user_agent)
+
+    @classmethod
+    def unreachable(cls, user_agent: str) -> "RobotsRules":
+        parser = RobotFileParser()
+        parser.disallow_all = True
+        return cls(parser, user_agent, reachable=False)
+
+    def allowed(self, url: str) -> bool:
+        return self._parser.can_fetch(self.user_agent, url)
+
+    def crawl_delay(self) -> float:
+        delay = self._parser.crawl_delay(self.user_agent)
+        return float(delay) if delay else 0.0
+
+
+class RobotsCache:
+    """Bounded LRU of robots.txt rules by site, each valid for ``ttl`` seconds. Thread-safe."""
+
+    def __init__(self, ttl: float = 3600.0, max_sites: int = 512):
+        self.ttl = ttl
+        self.max_sites = max_sites
+        self._sites: "OrderedDict[str, Tuple[float, RobotsRules]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, site: str) -> Optional[RobotsRules]:
+        with self._lock:
+            entry = self._sites.get(site)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] >= self.ttl:
+                del self._sites[site]
+                return None
+            self._sites.move_to_end(site)
+            return entry[1]
+
+    def put(self, site: str, rules: RobotsRules) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._sites[site] = (time.monotonic(), rules)
+            self._sites.move_to_end(site)
+            while len(self._sites) > self.max_sites:
+                self._sites.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sites.clear()
+
+    def __len__(self) -> int:
+        return len(self._sites)
+
+
+_robots: Optional[RobotsCache] = None
+_robots_lock = threading.Lock()
+
+
+def get_robots_cache() -> RobotsCache:
+    """Process-wide robots.txt cache, created from the config on first use."""
+    global _robots
+    if _robots is None:
+        from ..config import crawl_config
+
+        with _robots_lock:
+            if _robots is None:
+                _robots = RobotsCache(ttl=crawl_config.ROBOTS_TTL_SECONDS)
+    return _robots
@@ -0,0 +1,89 @@
+"""
+Response Serialization
+
+Search and content routes return large lists of plain dicts. Returning a
+response model makes FastAPI validate, copy and encode every result again,
+so those routes build the payload with ``model_payload()`` and return it with
+``render()``, which serializes it once with the fastest encoder available:
+
+- orjson when the optional ``orjson`` package is installed, otherwise
+  compact stdlib json;
+- MessagePack when the client sends ``Accept: application/msgpack`` and the
+  optional ``msgpack`` package is installed.
+
+The response model is still declared on the route, so the OpenAPI schema is
+unchanged.
+"""
+
+import json
+from typing import Any, Dict, Optional, Type
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode ``content`` as compact UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=str
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when it is available."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class MsgPackResponse(Response):
+    """MessagePack response; requires the optional ``msgpack`` package."""
+
+    media_type = "application/msgpack"
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, use_bin_type=True, default=str)
+
+
+def wants_msgpack(request: Request) -> bool:
+    """True if the client accepts MessagePack and it can be produced."""
+    if msgpack is None:
+        return False
+    accept = request.headers.get("accept", "").lower()
+    return any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES)
+
+
+def model_payload(model: Type[BaseModel], **fields: Any) -> Dict[str, Any]:
+    """The fields of ``model`` with defaults applied, without validating the values."""
+    instance = model.model_construct(**fields)
+    return {name: getattr(instance, name) for name in type(instance).model_fields}
+
+
+def render(
+    request: Request,
+    content: Any,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """Serialize ``content`` as MessagePack or JSON, as negotiated by the Accept header."""
+    response_class = MsgPackResponse if wants_msgpack(request) else FastJSONResponse
+    response = response_class(content, status_code=status_code, headers=headers)
+    if msgpack is not None:
+        response.headers["Vary"] = "Accept"
+    return response
@@ -0,0 +1,203 @@
+"""
+Near-Duplicate Query Lookup
+
+Agents phrase one information need in several ways ("python asyncio
+tutorial", "asyncio tutorial python", "python asyncio tutorials"), and each
+phrasing misses the exact-key result cache. ``QueryIndex`` remembers the
+queries whose results were cached and finds a similar earlier query for a
+new one.
+
+Queries are normalized (lowercased words, common stopwords dropped, order
+ignored) and shingled into their words plus the character trigrams of each
+word, so inflections still overlap. A MinHash signature of the shingles is
+split into LSH bands; queries sharing a band are candidates, and a candidate
+is accepted only when the exact Jaccard similarity of the shingle sets
+reaches the threshold and both queries contain the same numbers ("python
+3.11" never matches "python 3.12"). Direction words (``to``, ``from``,
+``vs``, ...) are kept, and a query containing one only matches a query with
+the same words in the same order, so "usd to eur" never matches "eur to
+usd". Candidates are only compared within the same remaining call
+parameters (region, page, ...).
+"""
+
+import hashlib
+import random
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+_WORD = re.compile(r"\w+")
+_NUMBER = re.compile(r"\d")
+
+STOPWORDS = frozenset(
+    "a an the of for in on at by and or with is are be how what do does i my".split()
+)
+# Words that make the order of the others meaningful ("paris to london")
+DIRECTION_WORDS = frozenset("to from vs versus into than before after".split())
+
+# 2^61 - 1, a Mersenne prime larger than any 60-bit shingle hash
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 60) - 1
+
+
+def query_words(query: str) -> List[str]:
+    """Lowercased words of ``query`` without stopwords (all words if only stopwords)."""
+    words = [word.lower() for word in _WORD.findall(query)]
+    return [word for word in words if word not in STOPWORDS] or words
+
+
+def shingles(query: str) -> FrozenSet[str]:
+    """Words of a query plus the character trigrams of each padded word."""
+    result: Set[str] = set()
+    for word in query_words(query):
+        result.add(word)
+        padded = f"#{word}#"
+        result.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return frozenset(result)
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def _numbers(query: str) -> FrozenSet[str]:
+    return frozenset(word for word in query_words(query) if _NUMBER.search(word))
+
+
+def _word_order(query: str) -> Optional[Tuple[str, ...]]:
+    """The query's words in order if it has a direction word, else None."""
+    words = query_words(query)
+    if DIRECTION_WORDS.isdisjoint(words):
+        return None
+    return tuple(words)
+
+
+def _shingle_hash(shingle: str) -> int:
+    digest = hashlib.blake2b(shingle.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") & _MAX_HASH
+
+
+class MinHasher:
+    """MinHash signatures with ``num_perm`` universal hash permutations."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.params = [(rng.randrange(1, _PRIME), rng.randrange(_PRIME)) for _ in range(num_perm)]
+
+    def signature(self, items: FrozenSet[str]) -> Tuple[int, ...]:
+        hashes = [_shingle_hash(item) for item in items] or [0]
+        return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in self.params)
+
+
+@dataclass
+class SimilarQuery:
+    """An earlier query found for a new one, and the cache key of its result."""
+
+    query: str
+    cache_key: str
+    similarity: float
+
+
+@dataclass
+class _Entry:
+    scope: str
+    query: str
+    cache_key: str
+    shingles: FrozenSet[str]
+    numbers: FrozenSet[str]
+    order: Optional[Tuple[str, ...]]
+    bands: Tuple[Tuple[int, ...], ...]
+
+
+class QueryIndex:
+    """
+    Bounded LSH index of cached queries. Thread-safe.
+
+    With the default 16 bands of 4 rows, a pair of queries with a Jaccard
+    similarity of 0.8 shares a band (becomes a candidate) more than 99.9% of
+    the time. Candidates are then checked against the exact similarity.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        num_perm: int = 64,
+        bands: int = 16,
+        max_entries: int = 4096,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+        self._hasher = MinHasher(num_perm)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._buckets: Dict[Tuple[str, int, Tuple[int, ...]], Set[str]] = {}
+
+    def _bands(self, items: FrozenSet[str]) -> Tuple[Tuple[int, ...], ...]:
+        signature = self._hasher.signature(items)
+        return tuple(signature[i : i + self.rows] for i in range(0, len(signature), self.rows))
+
+    def add(self, scope: str, query: str, cache_key: str) -> None:
+        """Remember that ``query``, with other parameters ``scope``, is cached at ``cache_key``."""
+        items = shingles(query)
+        if not items:
+            return
+        entry = _Entry(
+            scope, query, cache_key, items, _numbers(query), _word_order(query), self._bands(items)
+        )
+        with self._lock:
+            self._remove_locked(cache_key)
+            self._entries[cache_key] = entry
+            for band_id, band in enumerate(entry.bands):
+                self._buckets.setdefault((scope, band_id, band), set()).add(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._remove_locked(next(iter(self._entries)))
+
+    def _remove_locked(self, cache_key: str) -> None:
+        entry = self._entries.pop(cache_key, None)
+        if entry is None:
+            return
+        for band_id, band in enumerate(entry.bands):
+            bucket = self._buckets.get((entry.scope, band_id, band))
+            if bucket is not None:
+                bucket.discard(cache_key)
+                if not bucket:
+                    del self._buckets[(entry.scope, band_id, band)]
+
+    def discard(self, cache_key: str) -> None:
+        """Forget an entry, e.g. once its cached result has expired."""
+        with self._lock:
+            self._remove_locked(cache_key)
+
+    def lookup(self, scope: str, query: str) -> Optional[SimilarQuery]:
+        """The most similar earlier query in ``scope`` at or above the threshold."""
+        items = shingles(query)
+        if not items:
+            return None
+        numbers = _numbers(query)
+        order = _word_order(query)
+        bands = self._bands(items)
+        best: Optional[SimilarQuery] = None
+        with self._lock:
+            candidates: Set[str] = set()
+            for band_id, band in enumerate(bands):
+                candidates |= self._buckets.get((scope, band_id, band), set())
+            for cache_key in candidates:
+                entry = self._entries[cache_key]
+                if entry.numbers != numbers or entry.order != order:
+                    continue
+                similarity = jaccard(items, entry.shingles)
+                if similarity >= self.threshold and (best is None or similarity > best.similarity):
+                    best = SimilarQuery(entry.query, cache_key, similarity)
+            if best is not None:
+                self._entries.move_to_end(best.cache_key)
+        return best
+
+    def __len__(self) -> int:
+        return len(self._entries)
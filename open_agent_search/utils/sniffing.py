@@ -0,0 +1,173 @@
+"""
+Content-Type Sniffing
+
+Decides from the ``Content-Type`` header and the first bytes of a response
+what kind of document a URL serves, before it is decoded and parsed:
+``html``, ``xml``, ``json``, ``markdown`` or ``text``. PDFs, images,
+archives, media and other binaries raise ``UnsupportedContent`` so the
+fetcher can stop downloading at once. Magic bytes win over the header, since
+servers often label files wrongly; without a usable header the body decides.
+"""
+
+from typing import Mapping, Optional, Tuple
+
+HTML = "html"
+XML = "xml"
+JSON = "json"
+MARKDOWN = "markdown"
+TEXT = "text"
+
+# Bytes of the body inspected
+SNIFF_BYTES = 8192
+
+_MAGIC: Tuple[Tuple[bytes, str], ...] = (
+    (b"%PDF-", "application/pdf"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"\x00\x00\x01\x00", "image/x-icon"),
+    (b"BM6", "image/bmp"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+    (b"PK\x03\x04", "application/zip"),
+    (b"\x1f\x8b", "application/gzip"),
+    (b"BZh", "application/x-bzip2"),
+    (b"\xfd7zXZ\x00", "application/x-xz"),
+    (b"7z\xbc\xaf\x27\x1c", "application/x-7z-compressed"),
+    (b"Rar!\x1a\x07", "application/vnd.rar"),
+    (b"\x7fELF", "application/x-executable"),
+    (b"MZ\x90\x00", "application/x-msdownload"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/x-ole-storage"),
+    (b"OggS", "audio/ogg"),
+    (b"ID3", "audio/mpeg"),
+    (b"fLaC", "audio/flac"),
+    (b"\x1a\x45\xdf\xa3", "video/webm"),
+    (b"wOFF", "font/woff"),
+    (b"wOF2", "font/woff2"),
+    (b"\x00asm", "application/wasm"),
+    (b"SQLite format 3\x00", "application/vnd.sqlite3"),
+)
+
+_HTML_MARKERS = (b"<!doctype html", b"<html", b"<head", b"<body")
+_BINARY_TYPES = ("image/", "audio/", "video/", "font/", "model/")
+_BINARY_APPLICATION = frozenset(
+    {
+        "application/pdf",
+        "application/zip",
+        "application/gzip",
+        "application/x-gzip",
+        "application/x-tar",
+        "application/x-7z-compressed",
+        "application/vnd.rar",
+        "application/x-rar-compressed",
+        "application/msword",
+        "application/vnd.ms-excel",
+        "application/vnd.ms-powerpoint",
+        "application/wasm",
+        "application/x-msdownload",
+        "application/x-executable",
+        "application/x-shockwave-flash",
+    }
+)
+
+
+class UnsupportedContent(Exception):
+    """The URL serves a binary document that cannot be extracted as text."""
+
+    def __init__(self, media_type: str):
+        self.media_type = media_type
+        super().__init__(f"Unsupported content type: {media_type}")
+
+
+def media_type(content_type: Optional[str]) -> str:
+    """``text/html`` from ``text/html; charset=utf-8`` (lowercased, '' if missing)."""
+    return (content_type or "").split(";", 1)[0].strip().lower()
+
+
+def header(headers: Optional[Mapping[str, str]], name: str) -> str:
+    """Case-insensitive header lookup on a plain mapping."""
+    if not headers:
+        return ""
+    value = headers.get(name)
+    if value is None:
+        lowered = name.lower()
+        value = next((v for k, v in headers.items() if k.lower() == lowered), "")
+    return value or ""
+
+
+def magic_type(head: bytes) -> Optional[str]:
+    """Media type of a binary format recognised by its leading bytes."""
+    for magic, kind in _MAGIC:
+        if head.startswith(magic):
+            return kind
+    if head[4:8] == b"ftyp":
+        return "video/mp4"
+    if head.startswith(b"RIFF") and head[8:12] in (b"WEBP", b"WAVE", b"AVI "):
+        return {b"WEBP": "image/webp", b"WAVE": "audio/wav", b"AVI ": "video/x-msvideo"}[head[8:12]]
+    return None
+
+
+def _looks_binary(head: bytes) -> bool:
+    """NUL bytes or many control characters: not text in any common encoding."""
+    if not head:
+        return False
+    if b"\x00" in head and not head.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return True
+    control = sum(1 for byte in head if byte < 9 or 13 < byte < 32)
+    return control / len(head) > 0.1
+
+
+def _sniff_body(head: bytes) -> str:
+    start = head.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if start.startswith(_HTML_MARKERS) or b"<html" in start[:1024]:
+        return HTML
+    if start.startswith(b"<?xml") or start.startswith(b"<rss") or start.startswith(b"<feed"):
+        return XML
+    if start.startswith((b"{", b"[")):
+        return JSON
+    if start.startswith(b"<"):
+        return HTML
+    return TEXT
+
+
+def sniff(content_type: Optional[str], head: bytes, url: str = "") -> str:
+    """
+    Kind of document served with ``content_type`` whose body starts with ``head``.
+
+    Raises:
+        UnsupportedContent: For PDFs, images, archives, media and other binaries
+    """
+    binary = magic_type(head)
+    if binary is not None:
+        raise UnsupportedContent(binary)
+
+    kind = media_type(content_type)
+    if kind.startswith(_BINARY_TYPES) or kind in _BINARY_APPLICATION:
+        raise UnsupportedContent(kind)
+    if kind in ("text/html", "application/xhtml+xml"):
+        return HTML
+    if kind in ("text/markdown", "text/x-markdown"):
+        return MARKDOWN
+    if kind == "application/json" or kind.endswith("+json"):
+        return JSON
+    if kind in ("text/xml", "application/xml") or kind.endswith("+xml"):
+        # XHTML served as XML is still a web page
+        return HTML if _sniff_body(head) == HTML else XML
+
+    # Generic, missing or unknown types: decide from the body
+    if _looks_binary(head):
+        raise UnsupportedContent(kind or "application/octet-stream")
+    body = _sniff_body(head)
+    if body == TEXT and urlpath_suffix(url) in (".md", ".markdown"):
+        return MARKDOWN
+    if kind.startswith("text/") and kind != "text/plain" and body != HTML:
+        return TEXT  # CSS, CSV, JavaScript, ...
+    return body
+
+
+def urlpath_suffix(url: str) -> str:
+    """Lowercased file extension of a URL's path ('' if none)."""
+    path = url.split("?", 1)[0].split("#", 1)[0]
+    name = path.rsplit("/", 1)[-1]
+    return name[name.rfind(".") :].lower() if "." in name else ""
@@ -0,0 +1,217 @@
+"""
+Structured Page Extraction
+
+The flattened page text loses what agents most often come back for: where a
+link pointed, the rows of a table, a code sample's layout. With
+``structured=true`` the content endpoints return these as well, taken from the
+same parse as the text:
+
+- ``sections``: the heading tree of the main content, each heading with its
+  level, anchor id (when the page has one) and nested ``sections``.
+- ``links``: absolute http(s) links of the whole page with their anchor text,
+  without fragments and deduplicated.
+- ``tables``: each table of the main content as its caption, header cells
+  and rows of cell text.
+- ``code``: code blocks of the main content with their language when the
+  markup names it.
+
+Markdown documents get the same structure from their headings, links, pipe
+tables and fenced code blocks. Other documents return empty lists.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urldefrag, urljoin
+
+from bs4 import BeautifulSoup, Tag
+
+from .readability import STRIPPED_TAGS
+
+MAX_LINKS = 300
+MAX_TABLES = 20
+MAX_TABLE_ROWS = 200
+MAX_CODE_BLOCKS = 50
+MAX_CODE_CHARS = 10000
+
+_HEADINGS = {f"h{level}": level for level in range(1, 7)}
+_LANGUAGE = re.compile(r"^(?:language|lang|highlight|brush:?)-?([\w+#.-]+)$", re.I)
+_PILCROW = re.compile(r"\s*[¶#§]\s*$")
+
+_MD_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+_MD_FENCE = re.compile(r"^(`{3,}|~{3,})\s*([\w+#.-]*)")
+_MD_LINK = re.compile(r"(?<!!)\[([^\]]*)\]\(\s*<?([^)\s>]+)>?(?:\s+\"[^\"]*\")?\s*\)")
+_MD_TABLE_SEPARATOR = re.compile(r"^\|?\s*:?-{2,}:?\s*(\|\s*:?-{2,}:?\s*)*\|?$")
+
+
+def empty_structure() -> Dict[str, List[Any]]:
+    return {"sections": [], "links": [], "tables": [], "code": []}
+
+
+def _section_tree(headings: Iterable[Tuple[int, str, Optional[str]]]) -> List[Dict[str, Any]]:
+    """Nest (level, heading, anchor) triples into a tree of sections."""
+    root: List[Dict[str, Any]] = []
+    stack: List[Tuple[int, List[Dict[str, Any]]]] = [(0, root)]
+    for level, heading, anchor in headings:
+        section: Dict[str, Any] = {"heading": heading, "level": level}
+        if anchor:
+            section["id"] = anchor
+        section["sections"] = []
+        while stack[-1][0] >= level:
+            stack.pop()
+        stack[-1][1].append(section)
+        stack.append((level, section["sections"]))
+    return root
+
+
+def _add_link(links: Dict[str, Dict[str, str]], base_url: str, href: str, text: str) -> None:
+    href = href.strip()
+    if not href or href.startswith("#") or len(links) >= MAX_LINKS:
+        return
+    url = urldefrag(urljoin(base_url, href))[0]
+    if not url.startswith(("http://", "https://")):
+        return
+    known = links.get(url)
+    if known is None:
+        links[url] = {"url": url, "text": text}
+    elif not known["text"] and text:
+        known["text"] = text
+
+
+def _code_language(pre: Tag) -> Optional[str]:
+    """Language named by the classes of a ``pre``, its ``code`` or its wrappers."""
+    candidates: List[Tag] = [pre]
+    code = pre.find("code")
+    if isinstance(code, Tag):
+        candidates.insert(0, code)
+    parent = pre.parent
+    for _ in range(2):
+        if parent is None:
+            break
+        candidates.append(parent)
+        parent = parent.parent
+    for element in candidates:
+        for name in element.get("class") or ():
+            match = _LANGUAGE.match(name)
+            if match and match.group(1).lower() not in ("default", "none", "text"):
+                return match.group(1).lower()
+    return None
+
+
+def _table(table: Tag) -> Optional[Dict[str, Any]]:
+    caption = table.find("caption")
+    headers: List[str] = []
+    rows: List[List[str]] = []
+    for row in table.find_all("tr"):
+        cells = row.find_all(["th", "td"], recursive=False)
+        texts = [cell.get_text(" ", strip=True) for cell in cells]
+        if not any(texts):
+            continue
+        if not headers and not rows and all(cell.name == "th" for cell in cells):
+            headers = texts
+        elif len(rows) < MAX_TABLE_ROWS:
+            rows.append(texts)
+    if not headers and not rows:
+        return None
+    return {
+        "caption": caption.get_text(" ", strip=True) if caption else "",
+        "headers": headers,
+        "rows": rows,
+    }
+
+
+def html_structure(soup: BeautifulSoup, elements: List[Tag], base_url: str) -> Dict[str, Any]:
+    """Sections, tables and code of the main ``elements``, and links of the whole page."""
+    headings: List[Tuple[int, str, Optional[str]]] = []
+    tables: List[Dict[str, Any]] = []
+    code: List[Dict[str, Any]] = []
+    stack = [iter(elements)]
+    while stack:
+        child = next(stack[-1], None)
+        if child is None:
+            stack.pop()
+            continue
+        if not isinstance(child, Tag) or child.name in STRIPPED_TAGS:
+            continue
+        if child.name in _HEADINGS:
+            text = _PILCROW.sub("", child.get_text(" ", strip=True))
+            if text:
+                anchor = child.get("id")
+                if not anchor and child.parent is not None and child.parent.name == "section":
+                    anchor = child.parent.get("id")
+                headings.append((_HEADINGS[child.name], text, anchor))
+        elif child.name == "table":
+            if len(tables) < MAX_TABLES:
+                table = _table(child)
+                if table is not None:
+                    tables.append(table)
+        elif child.name == "pre":
+            text = child.get_text().strip("\n")
+            if text.strip() and len(code) < MAX_CODE_BLOCKS:
+                code.append({"language": _code_language(child), "code": text[:MAX_CODE_CHARS]})
+        else:
+            stack.append(iter(child.contents))
+
+    links: Dict[str, Dict[str, str]] = {}
+    for anchor in soup.find_all("a", href=True):
+        _add_link(links, base_url, anchor["href"], anchor.get_text(" ", strip=True))
+        if len(links) >= MAX_LINKS:
+            break
+    return {
+        "sections": _section_tree(headings),
+        "links": list(links.values()),
+        "tables": tables,
+        "code": code,
+    }
+
+
+def _markdown_row(line: str) -> List[str]:
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def markdown_structure(text: str, base_url: str) -> Dict[str, Any]:
+    """Headings, links, pipe tables and fenced code blocks of a Markdown document."""
+    headings: List[Tuple[int, str, Optional[str]]] = []
+    links: Dict[str, Dict[str, str]] = {}
+    tables: List[Dict[str, Any]] = []
+    code: List[Dict[str, Any]] = []
+    lines = text.splitlines()
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        fence = _MD_FENCE.match(line)
+        if fence:
+            end = i + 1
+            while end < len(lines) and not lines[end].startswith(fence.group(1)):
+                end += 1
+            if len(code) < MAX_CODE_BLOCKS:
+                block = "\n".join(lines[i + 1 : end])
+                code.append({"language": fence.group(2) or None, "code": block[:MAX_CODE_CHARS]})
+            i = end + 1
+            continue
+        heading = _MD_HEADING.match(line)
+        if heading:
+            headings.append((len(heading.group(1)), heading.group(2), None))
+        elif (
+            line.lstrip().startswith("|")
+            and i + 1 < len(lines)
+            and _MD_TABLE_SEPARATOR.match(lines[i + 1].strip())
+        ):
+            end = i + 2
+            rows = []
+            while end < len(lines) and lines[end].lstrip().startswith("|"):
+                if len(rows) < MAX_TABLE_ROWS:
+                    rows.append(_markdown_row(lines[end]))
+                end += 1
+            if len(tables) < MAX_TABLES:
+                tables.append({"caption": "", "headers": _markdown_row(line), "rows": rows})
+            i = end
+            continue
+        for match in _MD_LINK.finditer(line):
+            _add_link(links, base_url, match.group(2), match.group(1).strip())
+        i += 1
+    return {
+        "sections": _section_tree(headings),
+        "links": list(links.values()),
+        "tables": tables,
+        "code": code,
+    }
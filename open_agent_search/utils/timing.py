@@ -0,0 +1,95 @@
+"""
+Per-request Phase Timings
+
+Records how long each phase of a request takes (URL validation, download,
+decode, parse, trim, upstream search, ...) so it can be returned in a
+``Server-Timing`` header or an opt-in ``timings`` payload field.
+
+Timings live in a context variable. ``run_in_threadpool`` copies the context
+into worker threads, so phases measured inside blocking controllers are
+recorded on the request that scheduled them.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+
+class RequestTimings:
+    """Accumulated phase durations for one request (or a nested scope of it)."""
+
+    def __init__(self, parent: Optional["RequestTimings"] = None):
+        self.parent = parent
+        self.started = time.perf_counter()
+        self._phases: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        """Add a duration to a phase. Repeated phases accumulate."""
+        with self._lock:
+            self._phases[name] = self._phases.get(name, 0.0) + seconds
+        if self.parent is not None:
+            self.parent.add(name, seconds)
+
+    def as_dict(self) -> Dict[str, float]:
+        """Phase durations in milliseconds, rounded for display."""
+        with self._lock:
+            return {name: round(seconds * 1000, 2) for name, seconds in self._phases.items()}
+
+    def server_timing(self, total: bool = True) -> str:
+        """Render the phases as a ``Server-Timing`` header value."""
+        metrics = [f"{name};dur={ms}" for name, ms in self.as_dict().items()]
+        if total:
+            elapsed = round((time.perf_counter() - self.started) * 1000, 2)
+            metrics.append(f"total;dur={elapsed}")
+        return ", ".join(metrics)
+
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "oas_request_timings", default=None
+)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """Return the timings of the active request, if any."""
+    return _current_timings.get()
+
+
+@contextmanager
+def timing_scope() -> Iterator[RequestTimings]:
+    """
+    Open a timing scope for the enclosed block.
+
+    Nested scopes forward every phase to their parent, so a per-URL scope in
+    ``fetch_multiple_urls`` still contributes to the request's header.
+    """
+    timings = RequestTimings(parent=_current_timings.get())
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time the enclosed block as ``name``. No-op outside a timing scope."""
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def timings_payload(enabled: bool) -> Optional[Dict[str, float]]:
+    """Return the active request's timings for an opt-in ``timings`` field."""
+    timings = _current_timings.get()
+    if not enabled or timings is None:
+        return None
+    return timings.as_dict()
@@ -0,0 +1,97 @@
+"""
+Token Estimation and Budgets
+
+LLM consumers budget in tokens, not characters. ``estimate_tokens`` is a
+fast local approximation of BPE tokenizers such as cl100k: one token per five
+characters of a word (so one per short English word), one per two characters
+of a punctuation run and one per character of non-Latin scripts. It is
+deterministic and dependency-free, and close enough to real tokenizers on
+prose to budget with; it is not exact.
+
+``allocate_budget`` splits one budget across several documents by weight, so
+``fetch_multiple_urls`` can spend a shared budget where the query matches.
+"""
+
+import math
+import re
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+_PIECE = re.compile(r"\w+|[^\w\s]+")
+_WORD = re.compile(r"\w+")
+# Each match is one token beyond the first of its word / punctuation run, so
+# counting matches gives ceil(len / 5) per word and ceil(len / 2) per run
+_WORD_EXTRA = re.compile(r"(?<=\w)\w{5}")
+_PUNCT_EXTRA = re.compile(r"(?<=[^\w\s])[^\w\s]{2}")
+
+
+def _piece_tokens(piece: str) -> int:
+    if not piece.isascii():
+        return len(piece)  # CJK and most non-Latin text: about one token per character
+    return math.ceil(len(piece) / (5 if piece[0].isalnum() or piece[0] == "_" else 2))
+
+
+def _pieces(text: str) -> Iterator[Tuple[int, int]]:
+    """Yield ``(end offset, tokens)`` for every piece of ``text``."""
+    for match in _PIECE.finditer(text):
+        yield match.end(), _piece_tokens(match.group())
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate number of tokens in ``text``."""
+    if not text.isascii():
+        return sum(tokens for _, tokens in _pieces(text))
+    # Same count as the loop above, done by the regex engine
+    return (
+        len(_PIECE.findall(text)) + len(_WORD_EXTRA.findall(text)) + len(_PUNCT_EXTRA.findall(text))
+    )
+
+
+def token_offset(text: str, max_tokens: int) -> int:
+    """Character offset at which the first ``max_tokens`` tokens of ``text`` end."""
+    offset, used = 0, 0
+    for end, tokens in _pieces(text):
+        used += tokens
+        if used > max_tokens:
+            return offset
+        offset = end
+    return len(text)
+
+
+def query_terms(query: Optional[str]) -> List[str]:
+    """Lowercased, de-duplicated words of a query."""
+    if not query:
+        return []
+    return list(dict.fromkeys(word.lower() for word in _WORD.findall(query)))
+
+
+def relevance(terms: Sequence[str], text: str) -> float:
+    """Fraction of the query terms that occur in ``text`` (0 to 1)."""
+    if not terms:
+        return 0.0
+    words = set(word.lower() for word in _WORD.findall(text))
+    return sum(term in words for term in terms) / len(terms)
+
+
+def allocate_budget(sizes: Sequence[int], weights: Sequence[float], budget: int) -> List[int]:
+    """
+    Split ``budget`` tokens across documents of ``sizes`` tokens by ``weights``.
+
+    A document never gets more than it needs; what it leaves unused is
+    redistributed to the others by weight (water-filling).
+    """
+    allocation = [0] * len(sizes)
+    active = [i for i, size in enumerate(sizes) if size > 0 and weights[i] > 0]
+    remaining = budget
+    while active and remaining > 0:
+        total_weight = sum(weights[i] for i in active)
+        shares = {i: remaining * weights[i] / total_weight for i in active}
+        satisfied = [i for i in active if sizes[i] <= shares[i]]
+        if not satisfied:
+            for i in active:
+                allocation[i] = int(shares[i])
+            break
+        for i in satisfied:
+            allocation[i] = sizes[i]
+            remaining -= sizes[i]
+        active = [i for i in active if i not in satisfied]
+    return allocation
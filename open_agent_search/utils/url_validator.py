@@ -8,9 +8,12 @@ Blocks requests to internal networks, cloud metadata endpoints, and non-HTTP sch
 import ipaddress
 import logging
 import socket
+import threading
+import time
+from typing import Dict, Iterable, List, Tuple
 from urllib.parse import urlparse
 
-from fastapi import HTTPException
+from starlette.exceptions import HTTPException
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +27,47 @@ BLOCKED_IPS = {
 # Allowed URL schemes
 ALLOWED_SCHEMES = {"http", "https"}
 
+# Resolved addresses are reused briefly so repeat fetches (and hosts resolved
+# during warm-up) skip the blocking getaddrinfo call.
+DNS_CACHE_TTL = 60.0
+DNS_CACHE_MAX_ENTRIES = 1024
+
+_dns_cache: Dict[str, Tuple[float, List[str]]] = {}
+_dns_lock = threading.Lock()
+
+
+def resolve_host(hostname: str) -> List[str]:
+    """Resolve ``hostname`` to IP strings, caching results for ``DNS_CACHE_TTL``.
+
+    Raises:
+        socket.gaierror: If the hostname cannot be resolved
+    """
+    now = time.monotonic()
+    with _dns_lock:
+        cached = _dns_cache.get(hostname)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+    results = socket.getaddrinfo(hostname, None, socket.AF_UNSPEC, socket.SOCK_STREAM)
+    ips = [str(result[4][0]) for result in results]
+
+    with _dns_lock:
+        if len(_dns_cache) >= DNS_CACHE_MAX_ENTRIES:
+            _dns_cache.clear()
+        _dns_cache[hostname] = (now + DNS_CACHE_TTL, ips)
+    return ips
+
+
+def prefetch_dns(hostnames: Iterable[str]) -> Dict[str, str]:
+    """Resolve hostnames ahead of time; returns an error message per failed host."""
+    errors = {}
+    for hostname in hostnames:
+        try:
+            resolve_host(hostname)
+        except OSError as e:
+            errors[hostname] = str(e)
+    return errors
+
 
 def _is_private_ip(ip_str: str) -> bool:
     """Check if an IP address is private, loopback, link-local, or reserved."""
@@ -86,13 +130,11 @@ def validate_url(url: str) -> str:
 
     # Resolve hostname and check IP
     try:
-        resolved_ips = socket.getaddrinfo(hostname, None, socket.AF_UNSPEC, socket.SOCK_STREAM)
+        resolved_ips = resolve_host(hostname)
     except socket.gaierror:
         raise HTTPException(status_code=400, detail=f"Could not resolve hostname: {hostname}")
 
-    for result in resolved_ips:
-        ip_str = str(result[4][0])
-
+    for ip_str in resolved_ips:
         if ip_str in BLOCKED_IPS:
             raise HTTPException(status_code=400, detail="Access to this host is not allowed")
 
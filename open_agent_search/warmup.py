@@ -0,0 +1,157 @@
+"""
+Application Warm-up
+
+Runs once in the background after startup so the first real requests do not
+pay for thread creation, parser imports and client construction. Each step is
+timed and failures are recorded rather than raised: a failed warm-up step
+only means that cost is paid later, it never keeps the service from becoming
+ready. ``/health`` reports ``warming_up`` (503) until ``warmup_state.ready``.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .config import WarmupConfig
+
+logger = logging.getLogger(__name__)
+
+_WARMUP_HTML = (
+    "<html><head><title>warm-up</title><meta name='description' content='x'></head>"
+    "<body><nav>skip</nav><main><p>Warm-up paragraph. Second sentence.</p></main></body></html>"
+)
+
+
+@dataclass
+class WarmupState:
+    """Readiness flag plus per-step outcome, reported by /health."""
+
+    ready: bool = True
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    steps: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, Any]:
+        duration = None
+        if self.started_at is not None:
+            end = self.finished_at or time.perf_counter()
+            duration = round((end - self.started_at) * 1000, 1)
+        return {"ready": self.ready, "duration_ms": duration, "steps": self.steps}
+
+
+warmup_state = WarmupState()
+
+
+def _default_executor_size() -> int:
+    # Mirrors the ThreadPoolExecutor default used by the event loop
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+async def _prestart_executor(threads: int) -> Dict[str, Any]:
+    """Start executor threads and build each thread's DDGS client."""
+    from ddgs import DDGS
+
+    from .utils import run_in_threadpool
+    from .utils.clients import thread_client
+
+    threads = max(0, min(threads, _default_executor_size()))
+    seen = set()
+    lock = threading.Lock()
+
+    def occupy() -> None:
+        thread_client(DDGS, timeout=10)
+        with lock:
+            seen.add(threading.get_ident())
+        # Hold the thread briefly so the next submission spawns a new one
+        time.sleep(0.05)
+
+    await asyncio.gather(*(run_in_threadpool(occupy) for _ in range(threads)))
+    return {"threads": len(seen)}
+
+
+async def _import_parsers() -> Dict[str, Any]:
+    """Import controllers (ddgs, bs4) and run one extraction to warm the parser."""
+    from .controllers import content, unified  # noqa: F401
+    from .utils import run_in_threadpool
+
+    title, _, _ = await run_in_threadpool(content.parse_html, _WARMUP_HTML)
+    content.trim_content("warm-up " * 50, 100)
+    return {"parsed": bool(title)}
+
+
+async def _prefetch_dns(hosts: List[str]) -> Dict[str, Any]:
+    from .utils import run_in_threadpool
+    from .utils.url_validator import prefetch_dns
+
+    errors = await run_in_threadpool(prefetch_dns, hosts)
+    return {"hosts": len(hosts), "failed": sorted(errors)}
+
+
+async def _replay_queries(queries: List[str]) -> Dict[str, Any]:
+    """Run hot text queries so their results land in the cache."""
+    from .controllers.text import search_text
+    from .utils import run_in_threadpool
+
+    results = await asyncio.gather(
+        *(run_in_threadpool(search_text, query=query) for query in queries),
+        return_exceptions=True,
+    )
+    failed = [query for query, result in zip(queries, results) if isinstance(result, Exception)]
+    return {"queries": len(queries), "failed": failed}
+
+
+async def _step(name: str, func: Callable[[], Awaitable[Dict[str, Any]]]) -> None:
+    start = time.perf_counter()
+    try:
+        detail = await func()
+        status = "ok"
+    except Exception as e:
+        logger.warning("Warm-up step %s failed: %r", name, e)
+        detail = {"error": str(e) or type(e).__name__}
+        status = "failed"
+    warmup_state.steps[name] = {
+        "status": status,
+        "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+        **detail,
+    }
+
+
+async def run_warmup(config: WarmupConfig) -> None:
+    """Run every configured warm-up step, then mark the service ready."""
+    warmup_state.ready = False
+    warmup_state.started_at = time.perf_counter()
+    warmup_state.finished_at = None
+    warmup_state.steps = {}
+
+    steps: List[tuple] = [
+        ("executor", lambda: _prestart_executor(config.EXECUTOR_THREADS)),
+        ("parsers", _import_parsers),
+    ]
+    if config.DNS_HOSTS:
+        steps.append(("dns", lambda: _prefetch_dns(config.DNS_HOSTS)))
+    if config.QUERIES:
+        steps.append(("queries", lambda: _replay_queries(config.QUERIES)))
+
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(*(_step(name, func) for name, func in steps)),
+            timeout=config.TIMEOUT_SECONDS,
+        )
+    except asyncio.TimeoutError:
+        logger.warning("Warm-up timed out after %.1fs", config.TIMEOUT_SECONDS)
+        for name, _ in steps:
+            warmup_state.steps.setdefault(name, {"status": "timeout"})
+    finally:
+        warmup_state.finished_at = time.perf_counter()
+        warmup_state.ready = True
+        logger.info("Warm-up finished: %s", warmup_state.as_dict())
+
+
+def start_warmup(config: WarmupConfig) -> asyncio.Task:
+    """Mark the service not ready and schedule the warm-up on the running loop."""
+    warmup_state.ready = False
+    return asyncio.create_task(run_warmup(config))
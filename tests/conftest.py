@@ -1,5 +1,7 @@
 """Shared pytest fixtures for Open Agent Search tests."""
 
+import time
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -11,7 +13,11 @@ def client():
     """Provide a FastAPI TestClient instance.
 
     Uses session scope because FastMCP's StreamableHTTPSessionManager
-    can only be started once per instance.
+    can only be started once per instance. Waits for the startup warm-up
+    so tests see a ready service.
     """
     with TestClient(app) as c:
+        deadline = time.monotonic() + 30
+        while c.get("/health").status_code == 503 and time.monotonic() < deadline:
+            time.sleep(0.05)
         yield c
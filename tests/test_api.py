@@ -33,3 +33,866 @@ def test_content_fetch_missing_url(client):
     """Content fetch without url returns 422."""
     response = client.get("/api/content/fetch")
     assert response.status_code == 422
+
+
+def test_metrics_exposes_route_latency(client, monkeypatch):
+    """Metrics endpoint renders per-route histograms in Prometheus format to admins."""
+    from open_agent_search.config import profiling_config
+
+    assert client.get("/metrics").status_code == 404
+    monkeypatch.setattr(profiling_config, "ADMIN_TOKEN", "secret")
+    assert client.get("/metrics").status_code == 401
+    client.get("/health")
+    response = client.get("/metrics", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert "# TYPE oas_http_request_duration_seconds histogram" in body
+    assert 'route="/health"' in body
+    assert "oas_executor_queue_depth" in body
+    assert "host=" not in body
+
+
+def test_server_timing_header(client):
+    """Responses carry per-phase timings in a Server-Timing header."""
+    response = client.get("/api/content/fetch", params={"url": "http://127.0.0.1/"})
+    assert response.status_code == 400
+    server_timing = response.headers["server-timing"]
+    assert "validate;dur=" in server_timing
+    assert "total;dur=" in server_timing
+
+
+def test_admin_profile_requires_token(client, monkeypatch):
+    """Profiling endpoints are hidden without a token and reject wrong tokens."""
+    from open_agent_search.config import profiling_config
+
+    monkeypatch.setattr(profiling_config, "ADMIN_TOKEN", "")
+    assert client.get("/admin/profile/sampled").status_code == 404
+
+    monkeypatch.setattr(profiling_config, "ADMIN_TOKEN", "secret")
+    assert client.get("/admin/profile/sampled").status_code == 401
+    response = client.get("/admin/profile/sampled", headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200
+    assert "x-profile-samples" in response.headers
+
+
+def test_stack_sampler_collapses_busy_thread():
+    """The sampler records busy threads as collapsed stacks."""
+    import threading
+    import time
+
+    from open_agent_search.utils.profiler import StackSampler
+
+    stop = threading.Event()
+
+    def busy_loop():
+        while not stop.is_set():
+            sum(range(1000))
+
+    worker = threading.Thread(target=busy_loop, name="busy worker")
+    worker.start()
+    sampler = StackSampler(interval=0.002)
+    sampler.start()
+    time.sleep(0.1)
+    sampler.stop()
+    stop.set()
+    worker.join()
+
+    lines = sampler.collapsed().splitlines()
+    assert sampler.samples > 0
+    assert any(
+        line.startswith("busy_worker;") and "test_api.py:" in line and "busy_loop" in line
+        for line in lines
+    )
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_cached_search_serves_repeat_calls():
+    """Identical controller calls within the TTL hit the cache."""
+    from open_agent_search.utils.cache import MemoryCache, cached_search, configure_cache
+
+    calls = []
+
+    @cached_search("test")
+    def search(query, max_results=10):
+        calls.append(query)
+        return [{"title": query}]
+
+    previous = configure_cache(MemoryCache(max_entries=8))
+    try:
+        assert search("python") == search(query="python", max_results=10)
+        search("rust")
+    finally:
+        configure_cache(previous)
+    assert calls == ["python", "rust"]
+
+
+def test_serverless_profile_loads_routers_on_demand():
+    """With SERVERLESS=true only the router a request needs is imported."""
+    import os
+    import subprocess
+    import sys
+
+    code = """
+import sys
+from fastapi.testclient import TestClient
+from open_agent_search.app import app
+client = TestClient(app)
+assert client.get("/health").status_code == 200
+assert "ddgs" not in sys.modules and "fastmcp" not in sys.modules
+assert client.get("/api/search/text").status_code == 422
+assert "open_agent_search.routes.text" in sys.modules
+assert "open_agent_search.routes.content" not in sys.modules
+import open_agent_search.routes.text as text_routes
+assert app.state.limiter.enabled and text_routes.limiter.enabled
+"""
+    env = {**os.environ, "SERVERLESS": "true"}
+    subprocess.run([sys.executable, "-c", code], check=True, env=env, capture_output=True)
+
+
+def test_warmup_runs_configured_steps():
+    """Warm-up records each step and ends ready even when a step fails."""
+    import asyncio
+    from types import SimpleNamespace
+
+    from open_agent_search.warmup import run_warmup, warmup_state
+
+    config = SimpleNamespace(
+        EXECUTOR_THREADS=2,
+        DNS_HOSTS=["localhost", "does-not-exist.invalid"],
+        QUERIES=[],
+        TIMEOUT_SECONDS=10.0,
+    )
+    asyncio.run(run_warmup(config))
+    assert warmup_state.ready
+    assert warmup_state.steps["executor"]["status"] == "ok"
+    assert warmup_state.steps["parsers"]["status"] == "ok"
+    assert warmup_state.steps["dns"]["failed"] == ["does-not-exist.invalid"]
+
+
+def test_batch_plan_dedupes_and_prices():
+    """Identical specs run once and only unique specs count towards the cost."""
+    from open_agent_search.controllers.batch import plan_batch
+    from open_agent_search.models.schemas import BatchSearchSpec
+    from open_agent_search.utils.cache import MemoryCache, NullCache, configure_cache
+
+    specs = [
+        BatchSearchSpec(query="python"),
+        BatchSearchSpec(query="python"),
+        BatchSearchSpec(type="news", query="python", max_results=25),
+    ]
+    previous = configure_cache(NullCache())
+    try:
+        plan = plan_batch(specs, max_cost=50)
+    finally:
+        configure_cache(previous)
+    assert [group.indices for group in plan.groups] == [[0, 1], [2]]
+    assert plan.cost == 1 + 3
+
+    # A fresh cached result is free; an expired one will hit upstream and is charged
+    cache = MemoryCache()
+    previous = configure_cache(cache)
+    try:
+        fresh_key = plan.groups[0].func.key_for(**plan.groups[0].kwargs)
+        stale_key = plan.groups[1].func.key_for(**plan.groups[1].kwargs)
+        cache.set(fresh_key, [], ttl=60)
+        cache.set(stale_key, [], ttl=0, max_stale=60)
+        assert plan_batch(specs, max_cost=50).cost == 3
+    finally:
+        configure_cache(previous)
+
+
+def test_batch_projects_each_spec_with_its_own_fields():
+    """Specs sharing a search still get their own fields."""
+    import asyncio
+
+    from benchmarks.stubs import StubConfig, install_stubs
+    from open_agent_search.controllers.batch import plan_batch, search_batch
+    from open_agent_search.models.schemas import BatchSearchSpec
+
+    specs = [BatchSearchSpec(query="python", fields=["title"]), BatchSearchSpec(query="python")]
+    with install_stubs(StubConfig(latency_ms=0, jitter_ms=0)):
+        plan = plan_batch(specs, max_cost=50)
+        items = asyncio.run(search_batch(plan, concurrency=2))
+    assert len(plan.groups) == 1
+    assert set(items[0]["results"][0]) == {"title"}
+    assert {"title", "href", "body"} <= set(items[1]["results"][0])
+
+
+def test_batch_search_rejects_over_budget(client):
+    """Batches above the cost limit are rejected before any search runs."""
+    searches = [{"query": f"query {i}", "max_results": 100} for i in range(6)]
+    response = client.post("/api/search/batch", json={"searches": searches})
+    assert response.status_code == 400
+    assert "exceeds the limit" in response.json()["error"]
+
+
+def test_prefetch_warms_next_page(monkeypatch):
+    """Serving page N prefetches page N+1 into the cache."""
+    import time
+
+    from open_agent_search.config import prefetch_config
+    from open_agent_search.utils import prefetch
+    from open_agent_search.utils.cache import MemoryCache, cached_search, configure_cache
+
+    monkeypatch.setattr(prefetch_config, "ENABLED", True)
+    monkeypatch.setattr(prefetch, "_prefetcher", None)
+    pages = []
+
+    @cached_search("test-prefetch")
+    def search(query, max_results=2, page=1):
+        pages.append(page)
+        return [{"title": f"{query} {page}"}] * max_results
+
+    cache = MemoryCache()
+    previous = configure_cache(cache)
+    try:
+        search("python")
+        deadline = time.monotonic() + 5
+        while cache.get(search.key_for("python", page=2)) is None:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert search("python", page=2) == [{"title": "python 2"}] * 2
+    finally:
+        configure_cache(previous)
+    assert pages[:2] == [1, 2]
+    assert pages.count(2) == 1
+
+
+def test_stale_entry_served_while_revalidating(monkeypatch):
+    """An expired entry within the stale window is returned, then refreshed in the background."""
+    import time
+
+    from open_agent_search.config import cache_config
+    from open_agent_search.utils.cache import (
+        MemoryCache,
+        cache_headers,
+        cache_scope,
+        cached_search,
+        configure_cache,
+    )
+
+    monkeypatch.setattr(cache_config, "TTL_SECONDS", 0.0)
+    monkeypatch.setattr(cache_config, "MAX_STALE_SECONDS", 60.0)
+    versions = iter(range(1, 10))
+    calls = iter(range(1, 10))
+
+    @cached_search("test-stale")
+    def search(query):
+        return [{"version": next(versions)}]
+
+    @cached_search("test-fresh-only")
+    def fresh_search(query):
+        return [{"call": next(calls)}]
+
+    cache = MemoryCache()
+    previous = configure_cache(cache)
+    try:
+        assert search("python") == [{"version": 1}]
+        with cache_scope() as lookups:
+            assert search("python") == [{"version": 1}]
+        assert [lookup.status for lookup in lookups] == ["stale"]
+        headers = cache_headers(lookups)
+        assert headers["Cache-Status"].startswith("oas; hit; ttl=")
+        assert "Age" in headers
+
+        deadline = time.monotonic() + 5
+        while cache.get(search.key_for("python")).value == [{"version": 1}]:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert search("python") == [{"version": 2}]
+
+        # Callers that cannot report staleness wait for the refresh instead
+        assert fresh_search("python") == [{"call": 1}]
+        with cache_scope(fresh_only=True) as lookups:
+            assert fresh_search("python") == [{"call": 2}]
+        assert [lookup.status for lookup in lookups] == ["miss"]
+    finally:
+        configure_cache(previous)
+
+
+def test_large_responses_are_compressed(client):
+    """Large search responses are gzip-encoded when the client accepts it."""
+    from benchmarks.stubs import StubConfig, install_stubs
+
+    with install_stubs(StubConfig(latency_ms=0, jitter_ms=0)):
+        response = client.get(
+            "/api/search/all",
+            params={"q": "python", "max_results_per_type": 20},
+            headers={"Accept-Encoding": "gzip"},
+        )
+        plain = client.get(
+            "/api/search/all", params={"q": "python"}, headers={"Accept-Encoding": "identity"}
+        )
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    body = response.json()
+    assert body["success"] is True and body["timings"] is None
+    assert body["total_results"] == len(body["text_results"]) + len(body["image_results"]) + len(
+        body["video_results"]
+    ) + len(body["news_results"]) + len(body["book_results"])
+    assert "content-encoding" not in plain.headers
+
+
+def test_negotiate_encoding():
+    """Client q-values decide the encoding; ties go to the server preference."""
+    from open_agent_search.utils.compression import negotiate
+
+    preference = ["zstd", "br", "gzip"]
+    assert negotiate("gzip, br", preference) == "br"
+    assert negotiate("br;q=0.5, gzip", preference) == "gzip"
+    assert negotiate("*;q=0.1, gzip;q=0", ["gzip"]) is None
+    assert negotiate("", preference) is None
+
+
+def test_fields_project_search_results(client):
+    """``fields`` keeps only the requested keys of every result."""
+    from benchmarks.stubs import StubConfig, install_stubs
+    from open_agent_search.utils.projection import parse_fields
+
+    assert parse_fields(" title, url,,title ") == ["title", "url"]
+    assert parse_fields("") is None
+
+    with install_stubs(StubConfig(latency_ms=0, jitter_ms=0)):
+        images = client.get("/api/search/images", params={"q": "cats", "fields": "title,url"})
+        unified = client.get("/api/search/all", params={"q": "cats", "fields": "title"})
+    assert images.status_code == 200
+    assert all(set(result) == {"title", "url"} for result in images.json()["results"])
+    body = unified.json()
+    assert all(set(result) == {"title"} for result in body["video_results"] + body["text_results"])
+
+
+def test_token_budget_allocation():
+    """A shared budget is split by weight, and short pages pass on what they leave."""
+    from open_agent_search.controllers.content import trim_tokens
+    from open_agent_search.utils.tokens import allocate_budget, estimate_tokens
+
+    assert allocate_budget([100, 5000, 3000], [1, 1, 1], 3000) == [100, 1450, 1450]
+    assert allocate_budget([100, 5000, 3000], [0.25, 1.25, 0.25], 3000) == [100, 2416, 483]
+    assert allocate_budget([0, 10], [1, 1], 100) == [0, 10]
+
+    text = "One sentence here. " * 200
+    trimmed = trim_tokens(text, 50)
+    assert estimate_tokens(trimmed) <= 50 and trimmed.endswith(".")
+
+
+def test_fetch_multiple_shares_token_budget(client):
+    """fetch-multiple trims pages to one shared budget, favouring pages matching the query."""
+    from benchmarks.stubs import StubConfig, corpus_pages, corpus_url, install_stubs
+
+    urls = [corpus_url(name) for name in corpus_pages()]
+    with install_stubs(StubConfig(latency_ms=0, jitter_ms=0)):
+        response = client.post(
+            "/api/content/fetch-multiple",
+            json={"urls": urls, "max_tokens": 1000, "query": "event loop"},
+        )
+    results = [result for result in response.json()["results"] if "content" in result]
+    assert results
+    assert sum(result["returned_tokens"] for result in results) <= 1000
+    assert all(result["returned_tokens"] <= result["token_budget"] for result in results)
+    best = max(results, key=lambda result: result["relevance"])
+    assert best["token_budget"] == max(result["token_budget"] for result in results)
+
+
+def test_select_passages_prefers_query_matches():
+    """Passages matching the query are kept in page order, with skipped text marked."""
+    from open_agent_search.utils.bm25 import BM25, tokenize
+    from open_agent_search.utils.passages import GAP, select_passages
+
+    scores = BM25([tokenize("the cat sat"), tokenize("a dog ran"), tokenize("cat and dog")]).scores(
+        ["cat"]
+    )
+    assert scores[1] == 0 and scores[0] > 0 and scores[2] > 0
+
+    filler = "\n".join(f"Filler line {i} about nothing in particular." for i in range(60))
+    text = f"{filler}\nConfigure the retry timeout per request.\n{filler}\nRetry timeout end."
+    selection = select_passages(text, "retry timeout", max_chars=1200)
+    assert "Configure the retry timeout" in selection.content
+    assert selection.content.endswith("Retry timeout end.")
+    assert GAP in selection.content and len(selection.content) <= 1200
+    assert selection.selected < selection.total
+
+    head = select_passages(text, "unrelated words", max_chars=300)
+    assert head.content.startswith("Filler line 0") and len(head.content) <= 300
+
+
+def test_local_index_segments_round_trip(tmp_path):
+    """Documents survive flushes, merges and reloads; re-indexing a URL replaces it."""
+    from open_agent_search.utils.local_index import LocalIndex
+
+    index = LocalIndex(str(tmp_path), flush_docs=2, max_segments=2)
+    index.add("https://a.example", "Event loops", "Asyncio runs an event loop per thread.")
+    index.add("https://b.example", "Threads", "A thread pool runs blocking calls.")
+    index.add_results([{"title": "Loop", "href": "https://c.example", "body": "event loop basics"}])
+    index.add("https://a.example", "Coroutines", "Coroutines are awaited, not called.")
+    index.add("https://d.example", "Other", "Nothing relevant here.")
+    index.flush()
+    assert index.stats()["segments"] <= 2
+
+    reloaded = LocalIndex(str(tmp_path))
+    hits = reloaded.search("event loop")
+    assert [doc.url for _, doc in hits] == ["https://c.example"]
+    assert reloaded.search("event loop", kind="page") == []
+    assert [doc.title for _, doc in reloaded.search("coroutines")] == ["Coroutines"]
+    assert reloaded.stats()["documents"] == 4
+    assert reloaded.search("thread pool", require_all=True)[0][1].url == "https://b.example"
+
+
+def test_local_index_is_bounded_and_best_effort(client, monkeypatch, tmp_path):
+    """Merges keep the newest documents, and indexing failures never fail a search."""
+    from benchmarks.stubs import StubConfig, install_stubs
+    from open_agent_search.config import local_index_config
+    from open_agent_search.utils import local_index
+    from open_agent_search.utils.local_index import LocalIndex
+
+    index = LocalIndex(str(tmp_path / "capped"), flush_docs=1, max_segments=1, max_docs=2)
+    for name in ("alpha", "bravo", "charlie", "delta"):
+        index.add(f"https://{name}.example", name, f"{name} page")
+    assert index.stats()["documents"] == 2
+    assert index.search("alpha") == [] and index.search("delta")
+
+    def add_fails(*args, **kwargs):
+        raise OSError("No space left on device")
+
+    broken = LocalIndex(str(tmp_path / "broken"))
+    monkeypatch.setattr(broken, "add", add_fails)
+    monkeypatch.setattr(local_index_config, "ENABLED", True)
+    monkeypatch.setattr(local_index, "_index", broken)
+    with install_stubs(StubConfig(latency_ms=0, jitter_ms=0)):
+        response = client.get("/api/search/text?q=indexing+disk+full")
+    assert response.status_code == 200
+    assert response.json()["results"]
+
+    # An index path that cannot be created leaves indexing and mixing disabled
+    (tmp_path / "file").write_text("not a directory")
+    monkeypatch.setattr(local_index_config, "PATH", str(tmp_path / "file" / "index"))
+    monkeypatch.setattr(local_index_config, "MIX_RESULTS", True)
+    monkeypatch.setattr(local_index, "_index", None)
+    with install_stubs(StubConfig(latency_ms=0, jitter_ms=0)):
+        response = client.get("/api/search/text?q=unwritable+index+path")
+    assert response.status_code == 200
+    assert response.json()["results"]
+
+
+def test_local_search_disabled(client):
+    """The local search route reports a disabled index as 404."""
+    response = client.get("/api/search/local?q=test")
+    assert response.status_code == 404
+    assert response.json()["success"] is False
+
+
+def test_similar_query_served_approximately(monkeypatch):
+    """A near-duplicate query is answered from the cache and flagged as approximate."""
+    from open_agent_search.config import cache_config
+    from open_agent_search.utils.cache import (
+        MemoryCache,
+        approximate_match,
+        cache_headers,
+        cache_scope,
+        cached_search,
+        configure_cache,
+    )
+
+    monkeypatch.setattr(cache_config, "SIMILAR_QUERIES", True)
+    calls = []
+
+    @cached_search("test-similar", similar="query")
+    def search(query, region="us-en"):
+        calls.append(query)
+        return [{"query": query}]
+
+    previous = configure_cache(MemoryCache())
+    try:
+        search("python asyncio tutorial")
+        with cache_scope(approximate=True) as lookups:
+            assert search("asyncio tutorial python") == [{"query": "python asyncio tutorial"}]
+        assert approximate_match(lookups) == {"query": "python asyncio tutorial", "similarity": 1.0}
+        assert cache_headers(lookups)["Cache-Status"].endswith("; approximate")
+
+        with cache_scope(approximate=True):
+            search("python asyncio tutorials")
+            search("python 3.12 asyncio tutorial")
+            search("python asyncio tutorial", region="uk-en")
+            search("rust ownership")
+        # Callers that cannot report approximate answers only get exact matches
+        with cache_scope() as lookups:
+            assert search("tutorial asyncio python") == [{"query": "tutorial asyncio python"}]
+        assert approximate_match(lookups) is None
+        assert calls == [
+            "python asyncio tutorial",
+            "python 3.12 asyncio tutorial",
+            "python asyncio tutorial",
+            "rust ownership",
+            "tutorial asyncio python",
+        ]
+    finally:
+        configure_cache(previous)
+
+
+def test_similar_queries_keep_direction():
+    """Reordered queries match unless a direction word makes the order meaningful."""
+    from open_agent_search.utils.similar_queries import QueryIndex
+
+    index = QueryIndex()
+    for query in ("flights from paris to london", "java vs python", "convert usd to eur"):
+        index.add("scope", query, query)
+    assert index.lookup("scope", "flights from london to paris") is None
+    assert index.lookup("scope", "python vs java") is None
+    assert index.lookup("scope", "convert eur to usd") is None
+    assert index.lookup("scope", "convert usd to eur").cache_key == "convert usd to eur"
+    index.add("scope", "python asyncio tutorial", "asyncio")
+    assert index.lookup("scope", "asyncio tutorial python").cache_key == "asyncio"
+
+
+def test_circuit_breaker_opens_and_probes():
+    """A failing upstream opens its circuit; after the pause one probe may close it."""
+    import time
+
+    import pytest
+
+    from open_agent_search.utils.circuit_breaker import (
+        CLOSED,
+        HALF_OPEN,
+        OPEN,
+        CircuitBreaker,
+        CircuitOpenError,
+    )
+
+    breaker = CircuitBreaker("search:text:auto", "search", min_calls=4, open_seconds=0.05)
+    for failed in (False, True, True, True):
+        breaker.allow()
+        breaker.record(failed)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.allow()
+    assert error.value.headers["Retry-After"] == "1"
+
+    time.sleep(0.06)
+    breaker.allow()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()  # only one probe at a time
+    breaker.record(False)
+    assert breaker.state == CLOSED
+
+
+def test_open_search_circuit_fails_fast(client):
+    """Once a backend keeps failing, searches get 503 with Retry-After and /health reports it."""
+    from benchmarks.stubs import StubConfig, install_stubs
+    from open_agent_search.utils.circuit_breaker import circuits
+
+    circuits.clear()
+    try:
+        with install_stubs(StubConfig(latency_ms=0, jitter_ms=0, error_rate=1.0)):
+            statuses = [
+                client.get("/api/search/text", params={"q": f"circuit {i}"}).status_code
+                for i in range(8)
+            ]
+            assert 503 not in statuses[:5]
+            response = client.get("/api/search/text", params={"q": "circuit open"})
+        assert response.status_code == 503
+        assert "Retry-After" in response.headers
+        health = client.get("/health").json()
+        assert health["status"] == "degraded"
+        assert health["circuits"]["search:text:auto"]["state"] == "open"
+    finally:
+        circuits.clear()
+
+
+def test_fetcher_remembered_per_host(client):
+    """After primp fails for a host, later fetches go straight to the urllib fetcher."""
+    from unittest import mock
+
+    from benchmarks.stubs import StubConfig, corpus_url, install_stubs
+    from open_agent_search.controllers import content
+    from open_agent_search.utils.fetch_strategy import get_fetch_strategies
+
+    attempts = []
+
+    class FailingClient:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def request(self, method, url):
+            attempts.append(url)
+            raise Exception("DecodeError: invalid byte sequence")
+
+    strategies = get_fetch_strategies()
+    strategies.clear()
+    url = corpus_url("windows1252_page")
+    with install_stubs(StubConfig(latency_ms=0, jitter_ms=0)):
+        with mock.patch.object(content, "HttpClient", FailingClient):
+            for max_length in (500, 600):
+                response = client.get(
+                    "/api/content/fetch", params={"url": url, "max_length": max_length}
+                )
+                assert response.status_code == 200
+    assert len(attempts) == 1
+    strategy = strategies.get("bench.local")
+    assert strategy.fetcher == "urllib" and strategy.charset == "cp1252"
+    strategies.clear()
+
+
+def test_sniff_content_types():
+    """Magic bytes and headers pick the extraction path; binaries are rejected."""
+    import pytest
+
+    from open_agent_search.controllers.content import extract_content
+    from open_agent_search.utils.sniffing import UnsupportedContent, sniff
+
+    assert sniff("text/html; charset=utf-8", b"<!DOCTYPE html><html>") == "html"
+    assert sniff(None, b"  <html><body>hi</body></html>") == "html"
+    assert sniff("application/octet-stream", b'{"a": 1}') == "json"
+    assert sniff("application/rss+xml", b"<?xml version='1.0'?><rss>") == "xml"
+    assert sniff("text/plain", b"# Title\n\nBody", "https://x.test/README.md") == "markdown"
+    for content_type, head in (
+        ("text/html", b"%PDF-1.7\n"),
+        ("application/pdf", b""),
+        (None, b"\x89PNG\r\n\x1a\n\x00\x00"),
+        ("application/octet-stream", b"\x00\x01\x02\x03" * 20),
+    ):
+        with pytest.raises(UnsupportedContent):
+            sniff(content_type, head)
+
+    title, _, content = extract_content("# Notes\n\n\n\nFirst line  \n", "markdown")
+    assert (title, content) == ("Notes", "# Notes\n\nFirst line")
+    assert extract_content('{"a":[1]}', "json")[2] == '{\n  "a": [\n    1\n  ]\n}'
+    feed = "<rss><channel><title>Feed &amp; Co</title><item><![CDATA[<b>x</b>]]></item>"
+    assert extract_content(feed, "xml")[:1] == ("Feed & Co",)
+
+
+def test_binary_content_rejected(client):
+    """A PDF is rejected with 415 without retrying the other fetcher."""
+    from unittest import mock
+
+    from benchmarks.stubs import StubConfig, StubResponse, corpus_url, install_stubs
+    from open_agent_search.controllers import content
+
+    attempts = []
+
+    class PdfClient:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def request(self, method, url):
+            attempts.append(url)
+            return StubResponse(200, b"%PDF-1.7\n...", {"content-type": "application/pdf"})
+
+    with install_stubs(StubConfig(latency_ms=0, jitter_ms=0)):
+        with mock.patch.object(content, "HttpClient", PdfClient):
+            response = client.get("/api/content/fetch", params={"url": corpus_url("report")})
+        assert response.status_code == 415
+        assert "application/pdf" in response.json()["error"]
+        assert len(attempts) == 1
+        page = client.get("/api/content/fetch", params={"url": corpus_url("blog_post")})
+        assert page.json()["content_type"] == "html"
+
+
+def test_charset_detection():
+    """BOM, header and meta declarations win; undeclared bodies are detected."""
+    from unittest import mock
+
+    from open_agent_search.utils import charset
+    from open_agent_search.utils.charset import StreamDecoder, decode_body
+
+    page = "<p>Café, naïve façade</p>".encode("cp1252")
+    assert decode_body(b'<meta charset="ISO-8859-1">' + page)[1] == "cp1252"
+    assert decode_body(page, "text/html; charset=utf-8")[1] == "cp1252"  # wrong header
+    assert decode_body(b"\xef\xbb\xbfok", "text/html; charset=latin-1") == ("ok", "utf-8-sig")
+    with mock.patch.object(charset, "from_bytes", None):
+        for text, encoding in (
+            ("Привет, мир! Это тестовая страница. " * 20, "cp1251"),
+            ("日本語のテキストです。これはテストです。" * 20, "shift_jis"),
+            ("这是一个中文测试页面，我们正在检测字符集。" * 20, "gb18030"),
+        ):
+            assert decode_body(text.encode(encoding)) == (text, encoding)
+
+    decoder = StreamDecoder()
+    body = ("a" * 9000 + "café").encode("cp1252")
+    for start in range(0, len(body), 1000):
+        decoder.feed(body[start : start + 1000])
+    assert decoder.close().endswith("café") and decoder.charset == "cp1252"
+
+
+def test_main_content_scoring_and_site_templates():
+    """Scoring skips comments and banners; recurring lines of a host are dropped."""
+    from benchmarks.stubs import corpus_pages
+    from open_agent_search.controllers.content import parse_html
+    from open_agent_search.utils.readability import get_site_templates
+
+    _, _, content = parse_html(corpus_pages()["blog_post"].read_text())
+    assert "Wrapping up" in content
+    assert "We use cookies" not in content and "uvloop" not in content
+
+    templates = get_site_templates()
+    templates.clear()
+    body = (
+        "<html><body><div class='sidebar'><a href='/a'>A</a><a href='/b'>B</a></div>"
+        "<div class='post-body'><p>Edit this page on GitHub, or report an issue.</p>"
+        "<p>{0} is the topic of this page, explained at length, with details, examples, "
+        "and more text than any menu would ever contain on its own.</p>"
+        "<p>Another paragraph about {0}, so that the page has enough content to score.</p>"
+        "</div></body></html>"
+    )
+    for topic in ("Sessions", "Streaming", "Retries"):
+        url = f"https://docs.example.test/{topic.lower()}"
+        _, _, content = parse_html(body.format(topic), url)
+    assert "Retries is the topic" in content
+    assert "Edit this page" not in content
+    template = templates.get("docs.example.test")
+    assert template.pages == 3 and template.selector == "div.post-body"
+    templates.clear()
+
+
+def test_site_templates_keep_inline_text():
+    """Recurring link, emphasis and code words are not boilerplate; whole blocks are."""
+    from open_agent_search.controllers.content import parse_html
+    from open_agent_search.utils.readability import get_site_templates
+
+    templates = get_site_templates()
+    templates.clear()
+    body = (
+        "<html><body><article><p>Edit this page on GitHub.</p>"
+        "<p>Paragraph {0} containing <a href='/x'>here</a> and <b>important</b> words, "
+        "long enough to be scored as the content of the page.</p>"
+        "<pre><code><span>def</span> f{0}(x):\n    <span>return</span> x</code></pre>"
+        "<p>Another paragraph {0} containing <code>x</code>, also long enough to count.</p>"
+        "</article></body></html>"
+    )
+    for n in range(1, 5):
+        _, _, content = parse_html(body.format(n), f"https://inline.example.test/{n}")
+    lines = content.splitlines()
+    assert "Edit this page on GitHub." not in lines
+    assert {"here", "important", "def", "return", "x", "f4(x):"} <= set(lines)
+    assert "Another paragraph 4 containing" in lines
+    templates.clear()
+
+
+def test_structured_content(client):
+    """structured=true adds headings, links and code from the same fetch."""
+    from benchmarks.stubs import StubConfig, corpus_url, install_stubs
+
+    with install_stubs(StubConfig(latency_ms=0, jitter_ms=0)):
+        plain = client.get("/api/content/fetch", params={"url": corpus_url("blog_post")})
+        assert "structure" not in plain.json()
+        data = client.get(
+            "/api/content/fetch",
+            params={"url": corpus_url("blog_post"), "structured": True},
+        ).json()
+    structure = data["structure"]
+    article = structure["sections"][0]
+    assert article["heading"] == "Understanding Python's asyncio Event Loop"
+    assert [s["heading"] for s in article["sections"]][-1] == "Wrapping up"
+    assert {"url": "https://bench.local/tags/python/", "text": "python"} in structure["links"]
+    assert structure["code"][0]["code"].startswith("import asyncio\n\nasync def fetch(n):")
+
+
+def test_markdown_format(client):
+    """format=markdown keeps headings, code fences, lists and absolute links."""
+    from benchmarks.stubs import StubConfig, corpus_url, install_stubs
+    from open_agent_search.controllers.content import extract_markdown
+    from open_agent_search.utils.markdown import close_fences, html_to_markdown
+    from open_agent_search.utils.sniffing import HTML
+
+    with install_stubs(StubConfig(latency_ms=0, jitter_ms=0)):
+        data = client.get(
+            "/api/content/fetch",
+            params={"url": corpus_url("blog_post"), "format": "markdown", "max_length": 20000},
+        ).json()
+    content = data["content"]
+    assert data["format"] == "markdown"
+    assert content.startswith("# Understanding Python's asyncio Event Loop")
+    assert "\n## Blocking calls stall everything\n" in content
+    assert "```\nimport asyncio\n" in content
+    assert "- Record the difference" in content
+    assert "[python](https://bench.local/tags/python/)" in content
+    assert "cookies" not in content
+
+    _, _, table = html_to_markdown(
+        "<table><tr><th>Name</th><th>Size</th></tr><tr><td>a|b</td><td>1</td></tr></table>"
+    )
+    assert table == "| Name | Size |\n| --- | --- |\n| a\\|b | 1 |"
+    assert close_fences("text\n\n```python\ncode") == "text\n\n```python\ncode\n```"
+
+    # ASP.NET WebForms wrap the whole body in one form; only its controls are dropped
+    _, _, page = html_to_markdown(
+        "<body><form id='aspnetForm'><input type='hidden' name='__VIEWSTATE' value='x'>"
+        "<h1>Notice</h1><p>The article text sits inside the form.</p>"
+        "<button>Subscribe</button><select><option>EN</option></select></form></body>"
+    )
+    assert page == "# Notice\n\nThe article text sits inside the form."
+    # A page whose only text is skipped falls back to the text extractor
+    assert extract_markdown("<body><aside><p>Only text</p></aside></body>", HTML)[2]
+
+
+def test_crawl(client):
+    """A crawl stays in scope, obeys robots.txt and drops duplicate URLs and pages."""
+    import json
+    from unittest import mock
+
+    from benchmarks.stubs import StubConfig, StubHttpClient, StubResponse, install_stubs
+    from open_agent_search.utils.robots import get_robots_cache
+
+    index_links = ("intro", "intro#setup", "/docs/intro?utm_source=x", "private", "copy")
+    index_links += ("/blog/", "https://other.test/docs/a", "guide.pdf")
+
+    def page(title, *links):
+        anchors = "".join(f'<li><a href="{link}">{link}</a></li>' for link in links)
+        body = f"<p>{title} is a page of the guide with enough words to count as content.</p>"
+        return f"<html><title>{title}</title><body><h1>{title}</h1>{body}<ul>{anchors}</ul>"
+
+    site = {
+        "/robots.txt": "User-agent: *\nDisallow: /docs/private",
+        "/docs/": page("Index", *index_links),
+        "/docs/intro": page("Intro", "/docs/deep"),
+        "/docs/copy": page("Index", *index_links),
+        "/docs/deep": page("Deep"),
+        "/docs/private": page("Private"),
+        "/blog/": page("Blog"),
+    }
+
+    def request(self, method, url, *args, **kwargs):
+        parts = url.split("/", 3)
+        path = "/" + parts[3].split("?")[0] if len(parts) > 3 else "/"
+        if parts[2] == "down.test":
+            raise ConnectionError("Name or service not known")
+        if parts[2] != "site.test" or path not in site:
+            return StubResponse(404, b"not found", {"Content-Type": "text/plain"})
+        kind = "text/plain" if path.endswith(".txt") else "text/html"
+        return StubResponse(200, site[path].encode(), {"Content-Type": kind})
+
+    get_robots_cache().clear()
+    with install_stubs(StubConfig(latency_ms=0, jitter_ms=0)):
+        with mock.patch.object(StubHttpClient, "request", request):
+            data = client.post(
+                "/api/content/crawl", json={"url": "https://site.test/docs/", "max_depth": 1}
+            ).json()
+            blocked = client.post(
+                "/api/content/crawl", json={"url": "https://site.test/docs/private"}
+            )
+            lines = client.post(
+                "/api/content/crawl",
+                json={"url": "https://site.test/docs/", "max_depth": 2, "stream": True},
+            ).text.splitlines()
+            down = client.post("/api/content/crawl", json={"url": "https://down.test/"})
+            assert get_robots_cache().get("https://down.test") is None
+    get_robots_cache().clear()
+
+    pages = {item["url"]: item for item in data["results"]}
+    assert set(pages) == {
+        "https://site.test/docs/",
+        "https://site.test/docs/intro",
+        "https://site.test/docs/copy",
+    }
+    assert pages["https://site.test/docs/intro"]["depth"] == 1
+    assert pages["https://site.test/docs/copy"]["duplicate_of"] == "https://site.test/docs/"
+    assert "structure" not in pages["https://site.test/docs/intro"]
+    assert data["stats"]["robots_skipped"] == 1 and data["stats"]["duplicates"] == 1
+    assert blocked.status_code == 403
+    assert down.status_code == 503 and "unreachable" in down.json()["error"]
+    streamed = [json.loads(line) for line in lines]
+    assert {"url": "https://site.test/docs/deep", "depth": 2} == {
+        key: streamed[-2][key] for key in ("url", "depth")
+    }
+    assert streamed[-1] == {"done": True, "stats": {**data["stats"], "pages": 3}}
@@ -0,0 +1,45 @@
+"""Smoke tests for the offline benchmark stubs and runner."""
+
+import asyncio
+
+from benchmarks.extraction import compare, extraction, load_cases
+from benchmarks.run import percentile, run_benchmarks
+from benchmarks.stubs import StubConfig
+
+
+def test_percentile_interpolates():
+    """Percentiles interpolate between neighbouring samples."""
+    samples = [1.0, 2.0, 3.0, 4.0]
+    assert percentile(samples, 50) == 2.5
+    assert percentile(samples, 100) == 4.0
+
+
+def test_stubbed_scenarios_run_offline():
+    """Route and MCP scenarios complete against the local stubs."""
+    config = StubConfig(latency_ms=0, jitter_ms=0)
+    results = asyncio.run(
+        run_benchmarks(config, requests=4, concurrency=2, only=["route:text", "mcp:search_web"])
+    )
+    assert set(results) == {"route:text", "mcp:search_web"}
+    assert all(stats["errors"] == 0 for stats in results.values())
+
+
+def test_extraction_gate_flags_regressions():
+    """The extraction gate reports metrics that grew beyond their threshold."""
+    baseline = {"blog": {"median_ms": 10.0, "alloc_blocks": 100, "alloc_kib": 5.0, "peak_kib": 50}}
+    current = {"blog": {"median_ms": 12.0, "alloc_blocks": 100, "alloc_kib": 5.0, "peak_kib": 60}}
+    regressions = compare(current, baseline, time_threshold=0.25, memory_threshold=0.1)
+    assert regressions == ["blog: peak_kib 50 -> 60 (+20.0%)"]
+
+
+def test_extraction_pipeline_on_non_utf8_page():
+    """The benchmarked pipeline decodes and extracts the windows-1252 corpus page."""
+    content = extraction(load_cases(["non_utf8_page"])["non_utf8_page"])()
+    assert "Café des Arts" in content or "Programme de la saison" in content
+
+
+def test_mcp_import_skips_heavy_dependencies():
+    """Importing the stdio MCP server loads no controllers, FastAPI or ddgs."""
+    from benchmarks.startup import import_sample
+
+    assert import_sample("open_agent_search.mcp")["heavy"] == []